@@ -0,0 +1,247 @@
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import threading
+from dataclasses import asdict, dataclass, replace
+
+import exceptions
+
+FIELDS = ('token', 'chat_id', 'enabled')
+SQLITE_SUFFIXES = ('.sqlite', '.sqlite3', '.db')
+SQLITE_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS accounts ('
+    'token TEXT PRIMARY KEY, chat_id TEXT NOT NULL, '
+    'enabled INTEGER NOT NULL DEFAULT 1)'
+)
+
+
+@dataclass(frozen=True)
+class Account:
+    """Аккаунт Практикума и чат, куда уходят его уведомления."""
+
+    token: str
+    chat_id: str
+    enabled: bool = True
+
+
+def parse_enabled(value):
+    """Флаг enabled из строки файла; пустое значение — включён."""
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() not in ('0', 'false', 'no', 'off')
+
+
+def file_format(path):
+    """Формат файла реестра по расширению."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in SQLITE_SUFFIXES:
+        return 'sqlite'
+    if extension in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    return 'csv'
+
+
+def iter_csv(path):
+    """Аккаунты из CSV с заголовком token,chat_id[,enabled]."""
+    with open(path, newline='', encoding='utf-8') as file:
+        for row in csv.DictReader(file):
+            yield Account(
+                row['token'].strip(), row['chat_id'].strip(),
+                parse_enabled(row.get('enabled') or 'true')
+            )
+
+
+def iter_jsonl(path):
+    """Аккаунты из файла JSON-строк."""
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            if line.strip():
+                row = json.loads(line)
+                yield Account(
+                    row['token'], str(row['chat_id']),
+                    parse_enabled(row.get('enabled', True))
+                )
+
+
+def iter_sqlite(path):
+    """Аккаунты из таблицы accounts базы SQLite."""
+    connection = sqlite3.connect(path)
+    try:
+        connection.execute(SQLITE_SCHEMA)
+        rows = connection.execute(
+            'SELECT token, chat_id, enabled FROM accounts'
+        )
+        for token, chat_id, enabled in rows:
+            yield Account(token, str(chat_id), bool(enabled))
+    finally:
+        connection.close()
+
+
+READERS = {'csv': iter_csv, 'jsonl': iter_jsonl, 'sqlite': iter_sqlite}
+
+
+def load_accounts(path):
+    """
+    Словарь аккаунтов по токену; дубликаты заменяются последними.
+
+    Недописанный или повреждённый файл и занятая база SQLite
+    дают RegistryError.
+    """
+    if not os.path.exists(path):
+        return {}
+    try:
+        return {
+            account.token: account
+            for account in READERS[file_format(path)](path)
+        }
+    except (OSError, ValueError, KeyError, AttributeError, TypeError,
+            csv.Error, sqlite3.Error) as error:
+        raise exceptions.RegistryError(
+            f'Не удалось прочитать реестр {path}: {error!r}'
+        )
+
+
+def save_accounts(path, accounts):
+    """Запись аккаунтов в файл реестра с заменой содержимого."""
+    accounts = list(accounts)
+    kind = file_format(path)
+    if kind == 'sqlite':
+        connection = sqlite3.connect(path)
+        try:
+            with connection:
+                connection.execute(SQLITE_SCHEMA)
+                connection.execute('DELETE FROM accounts')
+                connection.executemany(
+                    'INSERT INTO accounts VALUES (?, ?, ?)',
+                    [(a.token, a.chat_id, int(a.enabled)) for a in accounts]
+                )
+        finally:
+            connection.close()
+        return
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as file:
+        if kind == 'jsonl':
+            for account in accounts:
+                file.write(json.dumps(asdict(account)) + '\n')
+        else:
+            writer = csv.writer(file)
+            writer.writerow(FIELDS)
+            for account in accounts:
+                writer.writerow(
+                    (account.token, account.chat_id, int(account.enabled))
+                )
+    os.replace(tmp_path, path)
+
+
+def update_account(path, token, /, **changes):
+    """
+    Изменение полей одного аккаунта в файле реестра.
+
+    Порядок аккаунтов сохраняется, в том числе при замене токена.
+    Для отсутствующего токена — KeyError.
+    """
+    accounts = load_accounts(path)
+    updated = replace(accounts[token], **changes)
+    save_accounts(path, [
+        updated if account.token == token else account
+        for account in accounts.values()
+    ])
+    return updated
+
+
+class AccountDiff:
+    """Изменения реестра между двумя загрузками."""
+
+    def __init__(self, added, removed, changed):
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+
+class AccountRegistry:
+    """Реестр аккаунтов из файла с перечитыванием при его изменении."""
+
+    def __init__(self, path):
+        self.path = path
+        self.accounts = {}
+        self._signature = None
+        self._lock = threading.Lock()
+
+    def _file_signature(self):
+        signature = []
+        for path in (self.path, f'{self.path}-wal'):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                signature.append(None)
+            else:
+                signature.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def active(self):
+        """Включённые аккаунты."""
+        with self._lock:
+            return [a for a in self.accounts.values() if a.enabled]
+
+    def disable(self, token):
+        """Выключение аккаунта в файле реестра."""
+        with self._lock:
+            return update_account(self.path, token, enabled=False)
+
+    def enable(self, token, new_token=None):
+        """
+        Включение аккаунта, при new_token — с заменой токена.
+
+        Изменение применяется при следующем refresh().
+        """
+        changes = {'enabled': True}
+        if new_token is not None:
+            changes['token'] = new_token
+        with self._lock:
+            return update_account(self.path, token, **changes)
+
+    def refresh(self, force=False):
+        """
+        Перечитывание файла, если он изменился; возвращает AccountDiff.
+
+        Выключенные аккаунты считаются удалёнными из опроса.
+        """
+        signature = self._file_signature()
+        if not force and signature == self._signature:
+            return AccountDiff([], [], [])
+        loaded = load_accounts(self.path)
+        with self._lock:
+            old = {t: a for t, a in self.accounts.items() if a.enabled}
+            new = {t: a for t, a in loaded.items() if a.enabled}
+            self.accounts = loaded
+            self._signature = signature
+        return AccountDiff(
+            added=[new[token] for token in new.keys() - old.keys()],
+            removed=[old[token] for token in old.keys() - new.keys()],
+            changed=[
+                new[token] for token in new.keys() & old.keys()
+                if new[token] != old[token]
+            ],
+        )
+
+
+def main(argv=None):
+    """Перенос аккаунтов между файлами реестра разных форматов."""
+    parser = argparse.ArgumentParser(
+        description='Импорт и экспорт реестра аккаунтов (CSV/JSONL/SQLite).'
+    )
+    parser.add_argument('source')
+    parser.add_argument('target')
+    args = parser.parse_args(argv)
+    accounts = load_accounts(args.source)
+    save_accounts(args.target, accounts.values())
+    print(f'Перенесено аккаунтов: {len(accounts)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+import argparse
+from datetime import datetime, timezone
+
+import numpy as np
+
+from eventlog import HEADER, StringTable, read_header
+
+DTYPE = np.dtype([
+    ('account', '<u4'), ('homework', '<u4'), ('old', '<u4'),
+    ('new', '<u4'), ('current_date', '<i8'), ('lesson', '<u4'),
+    ('date_updated', '<i8'),
+])
+REVIEW_STATUS = 'reviewing'
+FINAL_STATUSES = ('approved', 'rejected')
+QUANTILES = (50, 90, 99)
+WEEK = 7 * 24 * 60 * 60
+# 1 января 1970 года — четверг, недели считаются с понедельника.
+WEEK_SHIFT = 3 * 24 * 60 * 60
+NO_LESSON = 'Без урока'
+
+
+def load_columns(path):
+    """Колонки журнала событий массивами numpy поверх mmap."""
+    read_header(path)
+    records = np.memmap(path, dtype=np.uint8, mode='r', offset=HEADER.size)
+    count = len(records) // DTYPE.itemsize
+    table = records[:count * DTYPE.itemsize].view(DTYPE)
+    return {name: table[name] for name in DTYPE.names}
+
+
+def string_ids(strings, values):
+    """Номера строк в таблице; отсутствующим строкам даётся -1."""
+    ids = {string: index for index, string in enumerate(strings)}
+    return np.array([ids.get(value, -1) for value in values], dtype=np.int64)
+
+
+def review_durations(columns, strings):
+    """
+    Длительности проверки reviewing → approved/rejected.
+
+    Возвращает урок, время завершения и длительность каждой проверки.
+    """
+    reviewing, = string_ids(strings, [REVIEW_STATUS])
+    final = string_ids(strings, FINAL_STATUSES)
+    order = np.lexsort((
+        columns['date_updated'], columns['homework'], columns['account']
+    ))
+    account = columns['account'][order]
+    homework = columns['homework'][order]
+    status = columns['new'][order]
+    timestamp = columns['date_updated'][order]
+    finished = (
+        (account[1:] == account[:-1])
+        & (homework[1:] == homework[:-1])
+        & (status[:-1] == reviewing)
+        & np.isin(status[1:], final)
+    )
+    finished_at = timestamp[1:][finished]
+    return {
+        'lesson': columns['lesson'][order][1:][finished],
+        'finished_at': finished_at,
+        'duration': finished_at - timestamp[:-1][finished],
+    }
+
+
+def week_start(timestamps):
+    """Начало недели (понедельник, UTC) для каждого момента времени."""
+    return (timestamps + WEEK_SHIFT) // WEEK * WEEK - WEEK_SHIFT
+
+
+def group_percentiles(keys, values, quantiles=QUANTILES):
+    """
+    Перцентили values в группах keys без цикла по записям.
+
+    Возвращает ключи групп, их размеры и матрицу перцентилей
+    с линейной интерполяцией.
+    """
+    order = np.lexsort((values, keys))
+    keys = keys[order]
+    values = values[order].astype(np.float64)
+    groups, starts, counts = np.unique(
+        keys, return_index=True, return_counts=True
+    )
+    positions = (counts - 1)[:, None] * (np.asarray(quantiles) / 100)
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.ceil(positions).astype(np.int64)
+    low = values[starts[:, None] + lower]
+    high = values[starts[:, None] + upper]
+    return groups, counts, low + (high - low) * (positions - lower)
+
+
+def build_report(path, by='lesson', quantiles=QUANTILES):
+    """Строки отчёта о длительности проверки по урокам или неделям."""
+    strings = StringTable(f'{path}.strings').strings
+    durations = review_durations(load_columns(path), strings)
+    if by == 'week':
+        keys = week_start(durations['finished_at'])
+    else:
+        keys = durations['lesson'].astype(np.int64)
+    groups, counts, table = group_percentiles(
+        keys, durations['duration'], quantiles
+    )
+    rows = []
+    for group, count, values in zip(groups, counts, table):
+        if by == 'week':
+            label = datetime.fromtimestamp(
+                int(group), timezone.utc
+            ).date().isoformat()
+        else:
+            label = strings[group]
+        rows.append((label or NO_LESSON, int(count), values.tolist()))
+    return rows
+
+
+def main(argv=None):
+    """Вывод процентилей длительности проверки из журнала событий."""
+    parser = argparse.ArgumentParser(
+        description='Длительность проверки домашних работ по журналу.'
+    )
+    parser.add_argument('path', help='файл журнала событий')
+    parser.add_argument('--by', choices=('lesson', 'week'), default='lesson')
+    parser.add_argument(
+        '--percentiles', type=float, nargs='+', default=QUANTILES
+    )
+    args = parser.parse_args(argv)
+    header = ['группа', 'проверок'] + [
+        f'p{quantile:g}, ч' for quantile in args.percentiles
+    ]
+    print('\t'.join(header))
+    for label, count, values in build_report(
+        args.path, args.by, args.percentiles
+    ):
+        hours = [f'{value / 3600:.1f}' for value in values]
+        print('\t'.join([label, str(count)] + hours))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+import logging
+
+from state import account_key
+
+CHECKPOINT_EVERY = 100
+CHECKPOINT_KEY = 'backfill'
+
+logger = logging.getLogger('homework.backfill')
+
+
+def save_checkpoint(state, account, checkpoint):
+    """Сохранение контрольной точки загрузки истории."""
+    state.set(account, CHECKPOINT_KEY, checkpoint)
+    state.flush()
+
+
+def resuming(token, state):
+    """Продолжается ли прерванная загрузка истории аккаунта."""
+    checkpoint = state.get(account_key(token), CHECKPOINT_KEY)
+    return bool(
+        checkpoint and not checkpoint.get('complete') and checkpoint['seen']
+    )
+
+
+def iter_backfill(token, state, fetch, checkpoint_every=CHECKPOINT_EVERY):
+    """
+    Поштучная выдача домашних работ аккаунта с начала истории.
+
+    fetch(token, from_date) выдаёт домашние работы по одной и возвращает
+    current_date ответа. Обработанные работы отмечаются в контрольной
+    точке, поэтому прерванная загрузка продолжается с места остановки.
+    Генератор возвращает current_date или None, если история уже
+    загружена.
+    """
+    account = account_key(token)
+    checkpoint = state.get(account, CHECKPOINT_KEY) or {
+        'from_date': 0, 'seen': []
+    }
+    if checkpoint.get('complete'):
+        return None
+    seen = set(checkpoint['seen'])
+    homeworks = fetch(token, checkpoint['from_date'])
+    processed = 0
+    while True:
+        try:
+            homework = next(homeworks)
+        except StopIteration as stop:
+            current_date = stop.value
+            break
+        homework_id = homework.get('id')
+        if homework_id is None:
+            homework_id = homework.get('homework_name')
+        if homework_id in seen:
+            continue
+        yield homework
+        seen.add(homework_id)
+        processed += 1
+        if processed % checkpoint_every == 0:
+            checkpoint['seen'] = sorted(seen, key=str)
+            save_checkpoint(state, account, checkpoint)
+    save_checkpoint(
+        state, account, {'from_date': current_date, 'complete': True}
+    )
+    logger.debug(f'История аккаунта {account} загружена: {processed}')
+    return current_date
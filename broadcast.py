@@ -0,0 +1,127 @@
+import argparse
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import telebot
+from dotenv import load_dotenv
+from telebot import TeleBot
+
+from accounts import load_accounts
+from exceptions import TOO_MANY_REQUESTS
+from governor import RateLimiter
+
+TELEGRAM_RATE = 30
+WORKERS = 8
+PROGRESS_EVERY = 100
+
+logger = logging.getLogger('homework.broadcast')
+
+
+class BroadcastResult:
+    """Итог рассылки: сколько доставлено и какие чаты не получили."""
+
+    def __init__(self, total):
+        self.total = total
+        self.sent = 0
+        self.failed = {}
+        self._lock = threading.Lock()
+
+    @property
+    def done(self):
+        """Количество обработанных чатов."""
+        return self.sent + len(self.failed)
+
+    def record(self, chat_id, error=None):
+        """Учёт результата отправки в один чат."""
+        with self._lock:
+            if error is None:
+                self.sent += 1
+            else:
+                self.failed[chat_id] = error
+            return self.done
+
+
+def retry_after(error):
+    """Пауза из ответа 429 Telegram или None для остальных ошибок."""
+    if getattr(error, 'error_code', None) != TOO_MANY_REQUESTS:
+        return None
+    parameters = error.result_json.get('parameters') or {}
+    return parameters.get('retry_after', 1)
+
+
+def broadcast(bot, chat_ids, message, workers=WORKERS, rate=TELEGRAM_RATE,
+              progress=None, sleep=time.sleep, **kwargs):
+    """
+    Отправка одного сообщения во все чаты параллельными потоками.
+
+    Повторяющиеся chat_id отбрасываются. Общий темп не превышает rate
+    сообщений в секунду, ответ 429 выдерживается и повторяется один
+    раз. progress(result) вызывается после каждого чата.
+    """
+    chats = list(dict.fromkeys(str(chat_id) for chat_id in chat_ids))
+    result = BroadcastResult(len(chats))
+    limiter = RateLimiter(rate)
+
+    def deliver(chat_id):
+        for attempt in range(2):
+            sleep(limiter.reserve(time.monotonic()))
+            try:
+                bot.send_message(chat_id=chat_id, text=message, **kwargs)
+            except telebot.apihelper.ApiException as error:
+                pause = retry_after(error)
+                if pause is None or attempt:
+                    done = result.record(chat_id, str(error))
+                    break
+                sleep(pause)
+            except Exception as error:
+                # Сетевые ошибки requests telebot не оборачивает;
+                # сбой одного чата не должен прерывать всю рассылку.
+                done = result.record(chat_id, str(error))
+                break
+            else:
+                done = result.record(chat_id)
+                break
+        if progress is not None:
+            progress(result)
+        if done % PROGRESS_EVERY == 0 or done == result.total:
+            logger.info(
+                f'Рассылка: {done}/{result.total}, '
+                f'ошибок {len(result.failed)}'
+            )
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(deliver, chats))
+    return result
+
+
+def main(argv=None):
+    """Рассылка сообщения во все чаты реестра аккаунтов."""
+    parser = argparse.ArgumentParser(
+        description='Отправка сообщения во все чаты реестра аккаунтов.'
+    )
+    parser.add_argument('accounts', help='реестр аккаунтов CSV/JSONL/SQLite')
+    parser.add_argument('message')
+    parser.add_argument('--workers', type=int, default=WORKERS)
+    parser.add_argument('--rate', type=float, default=TELEGRAM_RATE)
+    args = parser.parse_args(argv)
+    # Токен берётся из окружения без импорта homework: тот открывает
+    # main.log на перезапись и обрезал бы журнал работающего бота.
+    load_dotenv()
+    chats = [
+        account.chat_id for account in load_accounts(args.accounts).values()
+        if account.enabled
+    ]
+    result = broadcast(
+        TeleBot(token=os.getenv('TELEGRAM_TOKEN')), chats, args.message,
+        args.workers, args.rate
+    )
+    print(f'Доставлено {result.sent} из {result.total}')
+    for chat_id, error in result.failed.items():
+        print(f'{chat_id}: {error}')
+
+
+if __name__ == '__main__':
+    main()
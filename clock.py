@@ -0,0 +1,56 @@
+import asyncio
+import time
+
+
+class RealClock:
+    """Настенные часы: время Unix и настоящий sleep."""
+
+    def time(self):
+        """Текущее время Unix."""
+        return time.time()
+
+    def sleep(self, seconds):
+        """Блокирующее ожидание."""
+        time.sleep(seconds)
+
+    def wait(self, event, seconds):
+        """Ожидание, которое прерывает event.set()."""
+        event.wait(seconds)
+
+    async def asleep(self, seconds):
+        """Ожидание внутри цикла событий."""
+        await asyncio.sleep(seconds)
+
+
+class AsyncioClock(RealClock):
+    """Часы цикла событий asyncio."""
+
+    def time(self):
+        """Монотонное время работающего цикла событий."""
+        return asyncio.get_running_loop().time()
+
+
+class SimulatedClock:
+    """Часы виртуального времени: sleep() только сдвигает time()."""
+
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def time(self):
+        """Текущее виртуальное время."""
+        return self.now
+
+    def sleep(self, seconds):
+        """Мгновенный сдвиг виртуального времени."""
+        if seconds > 0:
+            self.now += seconds
+
+    def wait(self, event, seconds):
+        """Сдвиг времени, если event ещё не установлен."""
+        if not event.is_set():
+            self.sleep(seconds)
+
+    async def asleep(self, seconds):
+        """Сдвиг времени с передачей управления другим задачам."""
+        self.sleep(seconds)
+        await asyncio.sleep(0)
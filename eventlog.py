@@ -0,0 +1,210 @@
+import json
+import mmap
+import os
+import struct
+import threading
+from collections import namedtuple
+from datetime import datetime, timezone
+
+import exceptions
+
+MAGIC = b'HWEV'
+VERSION = 2
+HEADER = struct.Struct('<4sHH')
+RECORD = struct.Struct('<IIIIqIq')
+DATE_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+Event = namedtuple(
+    'Event',
+    ('account', 'homework_id', 'old_status', 'new_status', 'current_date',
+     'lesson_name', 'date_updated'),
+    defaults=(None, None)
+)
+
+
+def parse_date(value):
+    """Unix-время из date_updated ответа API."""
+    if not value:
+        return None
+    return int(
+        datetime.strptime(value, DATE_FORMAT)
+        .replace(tzinfo=timezone.utc)
+        .timestamp()
+    )
+
+
+class StringTable:
+    """Таблица интернированных строк, дописываемая в отдельный файл."""
+
+    def __init__(self, path):
+        self.path = path
+        self.strings = []
+        self.ids = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as file:
+                for line in file:
+                    self._add(json.loads(line))
+        self._file = None
+
+    def _add(self, string):
+        self.ids[string] = len(self.strings)
+        self.strings.append(string)
+
+    def intern(self, string):
+        """Номер строки; новая строка сразу дописывается в файл."""
+        string_id = self.ids.get(string)
+        if string_id is not None:
+            return string_id
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json.dumps(string, ensure_ascii=False) + '\n')
+        self._file.flush()
+        self._add(string)
+        return self.ids[string]
+
+    def close(self):
+        """Закрытие файла таблицы."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class EventLog:
+    """
+    Журнал переходов статусов из записей фиксированной длины.
+
+    Строки (аккаунт, id работы, статусы, урок) хранятся номерами
+    в таблице строк, запись содержит только числа, а чтение идёт
+    через mmap.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.strings = StringTable(f'{path}.strings')
+        self._lock = threading.Lock()
+        self._file = open(path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+            self._file.flush()
+        else:
+            try:
+                read_header(path)
+            except exceptions.EventLogError:
+                self._file.close()
+                raise
+
+    def append(self, account, homework_id, old_status, new_status,
+               current_date, lesson_name=None, date_updated=None):
+        """Добавление перехода статуса в журнал."""
+        intern = self.strings.intern
+        current_date = current_date or 0
+        with self._lock:
+            self._file.write(RECORD.pack(
+                intern(account),
+                intern(str(homework_id)),
+                intern(old_status or ''),
+                intern(new_status or ''),
+                current_date,
+                intern(lesson_name or ''),
+                date_updated or current_date,
+            ))
+
+    def flush(self):
+        """Сброс буфера записей на диск."""
+        with self._lock:
+            self._file.flush()
+
+    def close(self):
+        """Сброс и закрытие журнала."""
+        with self._lock:
+            self._file.close()
+        self.strings.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_header(path):
+    """Проверка заголовка журнала; возвращает версию формата."""
+    with open(path, 'rb') as file:
+        magic, version, record_size = HEADER.unpack(
+            file.read(HEADER.size)
+        )
+    if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+        raise exceptions.EventLogError(
+            f'Неподдерживаемый формат журнала {path}'
+        )
+    return version
+
+
+def iter_records(path):
+    """Выдача записей журнала кортежами номеров строк через mmap."""
+    read_header(path)
+    record_size = RECORD.size
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == HEADER.size:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            body = memoryview(data)[HEADER.size:]
+            # Недописанная последняя запись после сбоя пропускается.
+            body = body[:len(body) - len(body) % record_size]
+            records = RECORD.iter_unpack(body)
+            try:
+                yield from records
+            finally:
+                del records
+                body.release()
+
+
+def replay(path):
+    """Выдача событий журнала с восстановленными строками."""
+    strings = StringTable(f'{path}.strings').strings
+    for (account, homework_id, old, new, current_date, lesson,
+         date_updated) in iter_records(path):
+        yield Event(
+            strings[account],
+            strings[homework_id],
+            strings[old] or None,
+            strings[new] or None,
+            current_date,
+            strings[lesson] or None,
+            date_updated,
+        )
+
+
+def last_statuses(path):
+    """Последние статусы работ для восстановления дедупликации."""
+    strings = StringTable(f'{path}.strings').strings
+    latest = {}
+    for account, homework_id, _, new, *_ in iter_records(path):
+        latest[account, homework_id] = new
+    return {
+        (strings[account], strings[homework_id]): strings[new] or None
+        for (account, homework_id), new in latest.items()
+    }
+
+
+class TransitionRecorder:
+    """Обнаружение переходов статусов с записью в журнал."""
+
+    def __init__(self, log):
+        self.log = log
+        self.statuses = last_statuses(log.path)
+
+    def observe(self, account, homework, current_date):
+        """Запись перехода, если статус работы изменился."""
+        homework_id = str(homework.get('id') or homework.get('homework_name'))
+        new_status = homework.get('status')
+        old_status = self.statuses.get((account, homework_id))
+        if old_status == new_status:
+            return False
+        self.statuses[account, homework_id] = new_status
+        self.log.append(
+            account, homework_id, old_status, new_status, current_date,
+            homework.get('lesson_name'),
+            parse_date(homework.get('date_updated')),
+        )
+        return True
@@ -1,16 +1,39 @@
-class TokenMissError(Exception):
+TRANSIENT = 'transient'
+PERMANENT = 'permanent'
+QUARANTINE = 'quarantine'
+UNKNOWN = 'unknown'
+
+PERMANENT_STATUSES = (401, 403)
+TOO_MANY_REQUESTS = 429
+
+
+class TransientError(Exception):
     pass
 
 
-class RequestError(Exception):
+class PermanentError(Exception):
     pass
 
 
-class JsonDecodeError(Exception):
+class QuarantineError(Exception):
     pass
 
 
-class CurrentDateError(Exception):
+class TokenMissError(PermanentError):
+    pass
+
+
+class RequestError(Exception):
+    def __init__(self, message='', status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class JsonDecodeError(TransientError):
+    pass
+
+
+class CurrentDateError(TransientError):
     pass
 
 
@@ -20,3 +43,55 @@ class CurrentDateKeyError(CurrentDateError):
 
 class CurrentDateKeyTypeError(CurrentDateError):
     pass
+
+
+class UnknownStatusError(QuarantineError, ValueError):
+    pass
+
+
+class MessageFormatError(ValueError):
+    pass
+
+
+class RegistryError(Exception):
+    pass
+
+
+class EventLogError(Exception):
+    pass
+
+
+class ReplayFinishedError(Exception):
+    pass
+
+
+class WorkerReplacedError(Exception):
+    pass
+
+
+def classify(error):
+    """
+    Класс сбоя опроса для планировщика.
+
+    TRANSIENT — повторить скоро (таймауты, 429 и 5xx, обрезанное тело),
+    PERMANENT — аккаунт больше не опрашивать (токен отозван),
+    QUARANTINE — отложить конкретную работу (неизвестный статус),
+    UNKNOWN — прочие ошибки, опрос идёт в обычном темпе.
+    """
+    if isinstance(error, RequestError):
+        status_code = error.status_code
+        if status_code in PERMANENT_STATUSES:
+            return PERMANENT
+        if (
+            status_code is None or status_code == TOO_MANY_REQUESTS
+            or status_code >= 500
+        ):
+            return TRANSIENT
+        return UNKNOWN
+    if isinstance(error, PermanentError):
+        return PERMANENT
+    if isinstance(error, QuarantineError):
+        return QUARANTINE
+    if isinstance(error, TransientError):
+        return TRANSIENT
+    return UNKNOWN
@@ -0,0 +1,65 @@
+import threading
+
+from exceptions import TOO_MANY_REQUESTS
+
+
+class RateLimiter:
+    """Равномерный бюджет: не больше rate запросов в секунду."""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self._next = float('-inf')
+        self._lock = threading.Lock()
+
+    def delay(self, now):
+        """Сколько секунд ждать до следующего разрешённого запроса."""
+        with self._lock:
+            return max(self._next - now, 0.0)
+
+    def take(self, now):
+        """Расход разрешения на запрос в момент now."""
+        with self._lock:
+            self._next = max(now, self._next) + 1 / self.rate
+
+    def reserve(self, now):
+        """Бронирование ближайшего разрешения; возвращает ожидание до него."""
+        with self._lock:
+            start = max(now, self._next)
+            self._next = start + 1 / self.rate
+            return start - now
+
+
+class RateGovernor(RateLimiter):
+    """
+    Общий бюджет запросов к API с подстройкой AIMD.
+
+    Успешный быстрый ответ прибавляет к rate примерно increase
+    запросов в секунду за каждую секунду работы; 429, 5xx или
+    ответ медленнее latency_target уменьшают rate в decrease раз.
+    """
+
+    def __init__(self, rate=5.0, min_rate=0.2, max_rate=50.0,
+                 increase=0.1, decrease=0.5, latency_target=2.0):
+        super().__init__(rate)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+
+    @staticmethod
+    def is_overload(status_code):
+        """Признак перегрузки API по коду ответа."""
+        return status_code is not None and (
+            status_code == TOO_MANY_REQUESTS or status_code >= 500
+        )
+
+    def record(self, status_code, latency):
+        """Подстройка бюджета по коду и времени ответа."""
+        with self._lock:
+            if self.is_overload(status_code) or latency > self.latency_target:
+                self.rate = max(self.rate * self.decrease, self.min_rate)
+            else:
+                self.rate = min(
+                    self.rate + self.increase / self.rate, self.max_rate
+                )
@@ -0,0 +1,167 @@
+import argparse
+import asyncio
+import json
+import socket
+import statistics
+import threading
+import time
+
+import homework
+from transports import make_async_transport
+
+ACCOUNTS = 500
+LATENCY = 0.05
+MAX_REQUESTS = 1000
+TRANSPORTS = ('httpx', 'httpx-h2c')
+PATH = '/api/user_api/homework_statuses/'
+
+
+class StandIn:
+    """
+    Локальный стенд API домашек на hypercorn (HTTP/1.1 и HTTP/2 без TLS).
+
+    Отвечает пустым списком работ с задержкой latency и считает
+    TCP-соединения клиентов. Как и у nginx, соединение закрывается
+    после max_requests запросов. Нужен необязательный пакет hypercorn.
+    """
+
+    def __init__(self, latency=LATENCY, max_requests=MAX_REQUESTS):
+        self.latency = latency
+        self.max_requests = max_requests
+        self.connections = set()
+        self.requests = 0
+        self.port = None
+        self._loop = None
+        self._stopped = None
+        self._ready = threading.Event()
+        self._thread = None
+
+    async def app(self, scope, receive, send):
+        """ASGI-приложение стенда."""
+        if scope['type'] != 'http':
+            return
+        self.connections.add(tuple(scope['client']))
+        self.requests += 1
+        authorized = any(
+            name == b'authorization' and value.startswith(b'OAuth ')
+            for name, value in scope['headers']
+        )
+        await asyncio.sleep(self.latency)
+        body = json.dumps(
+            {'homeworks': [], 'current_date': int(time.time())}
+        ).encode()
+        await send({
+            'type': 'http.response.start',
+            'status': 200 if authorized else 401,
+            'headers': [(b'content-type', b'application/json')],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    def reset(self):
+        """Сброс счётчиков между прогонами."""
+        self.connections = set()
+        self.requests = 0
+
+    async def _serve(self):
+        from hypercorn.asyncio import serve
+        from hypercorn.config import Config
+
+        config = Config()
+        config.bind = [f'127.0.0.1:{self.port}']
+        config.loglevel = 'WARNING'
+        config.backlog = 4096
+        config.keep_alive_max_requests = self.max_requests
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        self._loop.call_soon(self._ready.set)
+        await serve(self.app, config, shutdown_trigger=self._stopped.wait)
+
+    def start(self):
+        """Запуск стенда в отдельном потоке со своим циклом событий."""
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            self.port = probe.getsockname()[1]
+        self._thread = threading.Thread(
+            target=asyncio.run, args=(self._serve(),), daemon=True
+        )
+        self._thread.start()
+        self._ready.wait()
+        time.sleep(0.2)
+        return self
+
+    def stop(self):
+        """Остановка стенда."""
+        self._loop.call_soon_threadsafe(self._stopped.set)
+        self._thread.join(5)
+
+    @property
+    def url(self):
+        """Адрес эндпоинта стенда."""
+        return f'http://127.0.0.1:{self.port}{PATH}'
+
+
+def percentile(values, fraction):
+    """Перцентиль отсортированного списка без интерполяции."""
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+
+async def poll_all(transport, url, accounts):
+    """Одновременный опрос accounts аккаунтов; задержки каждого запроса."""
+    client = make_async_transport(transport)
+
+    async def poll(number):
+        headers = {'Authorization': f'OAuth token-{number}'}
+        started = time.perf_counter()
+        response = await client.get(url, headers, {'from_date': 0}, 30)
+        homework.parse_api_response(response, headers)
+        return time.perf_counter() - started
+
+    try:
+        return await asyncio.gather(*map(poll, range(accounts)))
+    finally:
+        await client.close()
+
+
+def run_benchmark(standin, transport, accounts):
+    """Один прогон: время, задержки и число соединений на стенде."""
+    standin.reset()
+    started = time.perf_counter()
+    latencies = sorted(asyncio.run(poll_all(transport, standin.url, accounts)))
+    wall = time.perf_counter() - started
+    return {
+        'transport': transport,
+        'accounts': accounts,
+        'connections': len(standin.connections),
+        'wall_seconds': round(wall, 3),
+        'polls_per_second': round(accounts / wall, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 1),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 1),
+    }
+
+
+def main(argv=None):
+    """Сравнение HTTP/1.1 и мультиплексированного HTTP/2 на стенде."""
+    parser = argparse.ArgumentParser(
+        description='Бенчмарк опроса многих аккаунтов по HTTP/1.1 и HTTP/2 '
+                    'на локальном стенде (нужны httpx[http2] и hypercorn).'
+    )
+    parser.add_argument('--accounts', type=int, default=ACCOUNTS)
+    parser.add_argument('--latency', type=float, default=LATENCY)
+    parser.add_argument(
+        '--transports', default=','.join(TRANSPORTS),
+        help='асинхронные транспорты через запятую'
+    )
+    args = parser.parse_args(argv)
+    standin = StandIn(args.latency).start()
+    try:
+        for transport in args.transports.split(','):
+            print(json.dumps(
+                run_benchmark(standin, transport, args.accounts)
+            ))
+    finally:
+        standin.stop()
+
+
+if __name__ == '__main__':
+    main()
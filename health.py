@@ -0,0 +1,228 @@
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+HEALTH_HOST = '127.0.0.1'
+STALL_TIMEOUT = 120
+WATCHDOG_INTERVAL = 5
+POLL = 'poll'
+SEND = 'send'
+
+logger = logging.getLogger('homework.health')
+
+
+class Health:
+    """
+    Пульс процесса: отметки последних успешных действий и текущие работы.
+
+    mark() отмечает успешный опрос или отправку, busy() — работу, которая
+    идёт прямо сейчас; зависшая работа видна по stalled(). Датчики
+    gauge() вычисляются при каждом отчёте.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.started = clock()
+        self.ready = False
+        self._marks = {}
+        self._busy = {}
+        self._gauges = {}
+        self._lock = threading.Lock()
+
+    def mark(self, name):
+        """Отметка успешного действия name."""
+        with self._lock:
+            self._marks[name] = self.clock()
+
+    def since(self, name):
+        """Секунды с последней отметки name или None, если её не было."""
+        with self._lock:
+            marked = self._marks.get(name)
+        return None if marked is None else self.clock() - marked
+
+    @contextmanager
+    def busy(self, name):
+        """Учёт работы name на время блока with."""
+        token = object()
+        with self._lock:
+            self._busy[name] = (self.clock(), token)
+        try:
+            yield
+        finally:
+            with self._lock:
+                # Работу могли уже списать как зависшую и запустить заново.
+                if self._busy.get(name, (None, None))[1] is token:
+                    del self._busy[name]
+
+    def release(self, name):
+        """Снятие отметки о работе name, например после её перезапуска."""
+        with self._lock:
+            self._busy.pop(name, None)
+
+    def stalled(self, timeout):
+        """Работы, идущие дольше timeout секунд."""
+        now = self.clock()
+        with self._lock:
+            return [
+                name for name, (started, _) in self._busy.items()
+                if now - started > timeout
+            ]
+
+    def gauge(self, name, func):
+        """Регистрация датчика, значение которого попадёт в отчёт."""
+        self._gauges[name] = func
+
+    def is_healthy(self, timeout, max_silence=None):
+        """
+        Процесс жив: нет зависших работ и опрос был не дольше max_silence
+        секунд назад (или процесс запущен позже).
+        """
+        if self.stalled(timeout):
+            return False
+        if max_silence is None:
+            return True
+        silence = self.since(POLL)
+        if silence is None:
+            silence = self.clock() - self.started
+        return silence <= max_silence
+
+    def report(self, timeout=STALL_TIMEOUT):
+        """Состояние процесса для эндпоинта /health."""
+        now = self.clock()
+        with self._lock:
+            busy = {
+                name: round(now - started, 3)
+                for name, (started, _) in self._busy.items()
+            }
+        report = {
+            'ready': self.ready,
+            'uptime': round(now - self.started, 3),
+            'since_last_poll': self.since(POLL),
+            'since_last_send': self.since(SEND),
+            'busy': busy,
+            'stalled': self.stalled(timeout),
+        }
+        for name, func in self._gauges.items():
+            report[name] = func()
+        return report
+
+
+class HealthBot:
+    """Обёртка бота, отмечающая в Health успешные отправки."""
+
+    def __init__(self, bot, health):
+        self.bot = bot
+        self.health = health
+
+    def send_message(self, *args, **kwargs):
+        """Отправка сообщения с отметкой об успехе."""
+        result = self.bot.send_message(*args, **kwargs)
+        self.health.mark(SEND)
+        return result
+
+    def __getattr__(self, name):
+        return getattr(self.bot, name)
+
+
+class HealthHandler(BaseHTTPRequestHandler):
+    """GET /health — живость процесса, GET /ready — готовность к работе."""
+
+    def do_GET(self):
+        server = self.server
+        report = server.health.report(server.stall_timeout)
+        if self.path == '/health':
+            ok = server.health.is_healthy(
+                server.stall_timeout, server.max_silence
+            )
+        elif self.path == '/ready':
+            ok = server.health.ready
+        else:
+            self.send_error(404)
+            return
+        body = json.dumps(report, ensure_ascii=False).encode()
+        self.send_response(200 if ok else 503)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+class HealthServer(ThreadingHTTPServer):
+    """HTTP-сервер проверок здоровья в фоновом потоке."""
+
+    daemon_threads = True
+
+    def __init__(self, health, port, host=HEALTH_HOST,
+                 stall_timeout=STALL_TIMEOUT, max_silence=None):
+        super().__init__((host, port), HealthHandler)
+        self.health = health
+        self.stall_timeout = stall_timeout
+        self.max_silence = max_silence
+        self._thread = None
+
+    @property
+    def port(self):
+        """Порт, на котором слушает сервер (для port=0 — выбранный ОС)."""
+        return self.server_address[1]
+
+    def start(self):
+        """Запуск сервера в потоке-демоне."""
+        self._thread = threading.Thread(
+            target=self.serve_forever, name='health', daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Остановка сервера и закрытие сокета."""
+        self.shutdown()
+        self.server_close()
+
+
+class Watchdog:
+    """
+    Сторож: раз в interval секунд ищет работы, зависшие дольше timeout,
+    и вызывает для каждой on_stall(name).
+    """
+
+    def __init__(self, health, on_stall, timeout=STALL_TIMEOUT,
+                 interval=WATCHDOG_INTERVAL):
+        self.health = health
+        self.on_stall = on_stall
+        self.timeout = timeout
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def check(self):
+        """Одна проверка; возвращает имена зависших работ."""
+        stalled = self.health.stalled(self.timeout)
+        for name in stalled:
+            logger.error(f'Работа {name} зависла дольше {self.timeout} с')
+            self.on_stall(name)
+        return stalled
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.check()
+            except Exception as error:
+                logger.error(f'Сбой сторожа: {error}')
+
+    def start(self):
+        """Запуск сторожа в потоке-демоне."""
+        self._thread = threading.Thread(
+            target=self._run, name='watchdog', daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Остановка сторожа."""
+        self._stopped.set()
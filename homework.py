@@ -1,8 +1,10 @@
+import argparse
 import json
 import logging
 import os
 import sys
 import time
+from contextlib import contextmanager
 
 import requests
 import telebot
@@ -10,12 +12,31 @@ from dotenv import load_dotenv
 from telebot import TeleBot
 
 import exceptions
+from backfill import iter_backfill, resuming
+from bodycache import BodyCache
+from eventlog import EventLog, TransitionRecorder
+from jsonstream import iter_elements
+from profiler import add_profile_arguments, profiling
+from recording import Recorder
+from rendering import FORMATS, render_status
+from shutdown import (
+    SHUTDOWN_DEADLINE, GracefulShutdown, add_shutdown_arguments
+)
+from singleflight import SingleFlight
+from snapshots import SnapshotCache
+from state import StateStore, account_key
+from transports import DEFAULT_TRANSPORT, make_transport
+from warmup import WarmUp
 
 load_dotenv()
 
 log_file_path = os.path.join(os.getcwd(), 'main.log')
+state_file_path = (
+    os.getenv('STATE_PATH') or os.path.join(os.getcwd(), 'state.json')
+)
+shutdown_deadline = SHUTDOWN_DEADLINE
 
-logger = logging.getLogger(__name__)
+logger = logging.getLogger('homework')
 logger.setLevel(logging.DEBUG)
 
 log_file_handler = logging.FileHandler(
@@ -33,13 +54,25 @@ logger.addHandler(stream_handler)
 PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+STREAM_RESPONSES = os.getenv('STREAM_RESPONSES') == '1'
+EVENT_LOG_PATH = os.getenv('EVENT_LOG_PATH')
+RECORD_PATH = os.getenv('RECORD_PATH')
+MESSAGE_FORMAT = os.getenv('MESSAGE_FORMAT') or None
+HTTP_TRANSPORT = os.getenv('HTTP_TRANSPORT') or DEFAULT_TRANSPORT
 
 
 RETRY_PERIOD = 600
+REQUEST_TIMEOUT = 30
+STREAM_CHUNK_SIZE = 16 * 1024
+TIMESTAMP_KEY = 'timestamp'
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
 
 
+api_requests = SingleFlight()
+transport = make_transport(HTTP_TRANSPORT)
+response_bodies = BodyCache()
+
 HOMEWORK_VERDICTS = {
     'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
     'reviewing': 'Работа взята на проверку ревьюером.',
@@ -67,6 +100,11 @@ class Phrases:
     PROGRAMM_FAILURE = 'Сбой в работе программы'
     SEND_MESSAGE_ERROR = 'Ошибка отправки сообщения'
     SEND_MESSAGE_SUCCESS = 'Сообщение успешно отправлено'
+    BACKFILL_ERROR = 'Ошибка загрузки истории статусов'
+    STATUS_REPORT_EMPTY = 'Домашних работ пока нет.'
+    TOKEN_PARKED = 'Опрос аккаунта остановлен: токен не принят API'
+    STATUS_QUARANTINED = 'Работа отложена до обновления бота'
+    UNKNOWN_MESSAGE_FORMAT = 'Неизвестный MESSAGE_FORMAT'
 
 
 def check_tokens():
@@ -85,10 +123,22 @@ def check_tokens():
         raise exceptions.TokenMissError(', '.join(missing_tokens))
 
 
-def send_message(bot, message):
-    """Отправка сообщения в чат телеги."""
+def check_message_format():
+    """Проверка MESSAGE_FORMAT: пусто или одна из разметок rendering."""
+    if MESSAGE_FORMAT is None or MESSAGE_FORMAT in FORMATS:
+        return
+    message = (
+        f'{Phrases.UNKNOWN_MESSAGE_FORMAT} {MESSAGE_FORMAT}, '
+        f'доступны: {", ".join(FORMATS)}'
+    )
+    logger.critical(message)
+    raise exceptions.MessageFormatError(message)
+
+
+def send_to_chat(bot, chat_id, message, parse_mode=None):
+    """Отправка сообщения в указанный чат телеги."""
     try:
-        bot.send_message(chat_id=TELEGRAM_CHAT_ID, text=message)
+        bot.send_message(chat_id=chat_id, text=message, parse_mode=parse_mode)
     except telebot.apihelper.ApiException as error:
         message = f'{Phrases.SEND_MESSAGE_ERROR}: {error}'
         logger.error(message)
@@ -97,33 +147,77 @@ def send_message(bot, message):
     return message
 
 
-def check_repeat_message(bot, message, last_message):
-    """Проверка на повтор сообщения."""
-    if last_message != message:
-        send_message(bot, message)
-        return message
-    return last_message
+def send_message(bot, message):
+    """Отправка сообщения в чат телеги."""
+    return send_to_chat(bot, TELEGRAM_CHAT_ID, message)
 
 
-def get_api_answer(timestamp):
-    """Делаем запрос к API и возвращаем ответ в формате Python."""
+@contextmanager
+def api_errors():
+    """Перевод ошибок запроса и разбора JSON в исключения бота."""
     try:
-        response = requests.get(
-            ENDPOINT, headers=HEADERS, params={'from_date': timestamp}
-        )
-        if response.status_code != 200:
-            raise exceptions.RequestError(
-                f'{Phrases.STATUS_RESPONSE} {response.status_code}'
-            )
-        return response.json()
+        yield
     except json.JSONDecodeError as error:
         raise exceptions.JsonDecodeError(
             f'{Phrases.CAN_NOT_DECODE_JSON} "{error}"'
         )
     except requests.RequestException as error:
+        raise exceptions.RequestError(f'{Phrases.STATUS_RESPONSE} "{error}"')
+
+
+def parse_api_response(response, headers):
+    """Проверка кода ответа транспорта и разбор его тела."""
+    if response.status_code != 200:
         raise exceptions.RequestError(
-            f'{Phrases.STATUS_RESPONSE} {response.status_code} "{error}"'
+            f'{Phrases.STATUS_RESPONSE} {response.status_code}',
+            response.status_code
+        )
+    content = getattr(response, 'content', None)
+    if not isinstance(content, bytes):
+        return response.json()
+    return response_bodies.parse(
+        headers.get('Authorization'), content, response.json
+    )
+
+
+def request_homework_statuses(headers, timestamp):
+    """Запрос к API от имени аккаунта из заголовков."""
+    with api_errors():
+        response = transport.get(
+            ENDPOINT, headers, {'from_date': timestamp}, REQUEST_TIMEOUT
         )
+        return parse_api_response(response, headers)
+
+
+async def arequest_homework_statuses(client, headers, timestamp):
+    """Запрос к API через асинхронный транспорт client."""
+    with api_errors():
+        response = await client.get(
+            ENDPOINT, headers, {'from_date': timestamp}, REQUEST_TIMEOUT
+        )
+        return parse_api_response(response, headers)
+
+
+def get_api_answer(timestamp):
+    """Делаем запрос к API и возвращаем ответ в формате Python."""
+    return api_requests.do(
+        (PRACTICUM_TOKEN, timestamp),
+        request_homework_statuses, HEADERS, timestamp
+    )
+
+
+def get_account_answer(token, timestamp):
+    """
+    Запрос к API от имени аккаунта с указанным токеном.
+
+    Конкурентные запросы с одинаковыми (token, from_date) делят один
+    HTTP-запрос и один разобранный ответ, поэтому ответ нельзя изменять.
+    """
+    return api_requests.do(
+        (token, timestamp),
+        request_homework_statuses,
+        {'Authorization': f'OAuth {token}'}, timestamp
+    )
 
 
 def check_response(response):
@@ -156,40 +250,281 @@ def parse_status(homework):
         raise KeyError(f'"{status_name_key}" {Phrases.FOREIGN_KEY}.')
     verdict = HOMEWORK_VERDICTS.get(status)
     if not verdict:
-        raise ValueError(f'{Phrases.UNKNOWN_HW_STATUS}: {status}')
+        raise exceptions.UnknownStatusError(
+            f'{Phrases.UNKNOWN_HW_STATUS}: {status}'
+        )
     return f'Изменился статус проверки работы "{homework_name}". {verdict}'
 
 
-def main():
-    """Основная логика работы бота."""
-    check_tokens()
+def stream_account_homeworks(token, timestamp):
+    """
+    Потоковый разбор ответа API с выдачей домашних работ по одной.
 
-    bot = TeleBot(token=TELEGRAM_TOKEN)
-    timestamp = int(time.time())
-    last_message = None
+    Тело читается кусками, поэтому в памяти держится только текущая
+    работа; проверка остального ответа выполняется после чтения тела.
+    """
+    try:
+        response = requests.get(
+            ENDPOINT, headers={'Authorization': f'OAuth {token}'},
+            params={'from_date': timestamp}, stream=True,
+            timeout=REQUEST_TIMEOUT
+        )
+        with response:
+            if response.status_code != 200:
+                raise exceptions.RequestError(
+                    f'{Phrases.STATUS_RESPONSE} {response.status_code}',
+                    response.status_code
+                )
+            rest = yield from iter_elements(
+                response.iter_content(chunk_size=STREAM_CHUNK_SIZE)
+            )
+    except json.JSONDecodeError as error:
+        raise exceptions.JsonDecodeError(
+            f'{Phrases.CAN_NOT_DECODE_JSON} "{error}"'
+        )
+    except requests.RequestException as error:
+        raise exceptions.RequestError(f'{Phrases.STATUS_RESPONSE} "{error}"')
+    check_response(rest)
+    return rest.get('current_date')
+
+
+def iter_account_homeworks(token, timestamp):
+    """Выдача домашних работ из ответа API по одной."""
+    if STREAM_RESPONSES:
+        return (yield from stream_account_homeworks(token, timestamp))
+    response = get_account_answer(token, timestamp)
+    check_response(response)
+    yield from response.get('homeworks')
+    return response.get('current_date')
+
+
+def save_timestamp(state, token, timestamp):
+    """Запоминание timestamp опроса аккаунта до следующего flush()."""
+    state.set(account_key(token), TIMESTAMP_KEY, timestamp)
 
-    while True:
+
+def onboard_account(token, state, snapshots):
+    """
+    Загрузка истории статусов аккаунта в кэш снимков.
+
+    Возвращает timestamp, с которого продолжать опрос: после перезапуска
+    это сохранённый timestamp, чтобы не пропустить изменения за простой.
+    Продолженная после сбоя загрузка не отмечает снимок полным.
+    """
+    saved = state.get(account_key(token), TIMESTAMP_KEY)
+    resumed = resuming(token, state)
+    backfill = iter_backfill(token, state, iter_account_homeworks)
+    try:
+        while True:
+            snapshots.record(token, next(backfill))
+    except StopIteration as stop:
+        current_date = stop.value
+    except Exception as error:
+        logger.error(f'{Phrases.BACKFILL_ERROR}: {error}')
+        return saved or int(time.time())
+    if current_date is None:
+        return saved or int(time.time())
+    if not resumed:
+        # Работы из контрольной точки не попали в снимок этого процесса:
+        # неполный снимок заставит первый /status сходить в API.
+        snapshots.complete(token, current_date)
+    return current_date
+
+
+def open_transition_recorder():
+    """Журнал переходов статусов, если задан EVENT_LOG_PATH."""
+    if not EVENT_LOG_PATH:
+        return None
+    return TransitionRecorder(EventLog(EVENT_LOG_PATH))
+
+
+def record_transitions(recorder, token, response):
+    """Запись переходов статусов из проверенного ответа API в журнал."""
+    if recorder is None:
+        return
+    account = account_key(token)
+    for homework in response.get('homeworks'):
+        recorder.observe(account, homework, response.get('current_date'))
+    recorder.log.flush()
+
+
+def get_status_report(snapshots, token):
+    """Текущие статусы домашних работ из кэша снимков."""
+    def load_full_history():
+        response = get_account_answer(token, 0)
+        check_response(response)
+        return response
+
+    statuses = snapshots.statuses(token, load_full_history)
+    if not statuses:
+        return Phrases.STATUS_REPORT_EMPTY
+    return '\n'.join(
+        f'"{name}". {HOMEWORK_VERDICTS.get(status, status)}'
+        for name, status in statuses.items()
+    )
+
+
+class PollSession:
+    """Состояние опроса API для одного аккаунта между циклами."""
+
+    def __init__(self, bot, token, timestamp, snapshots, transitions=None,
+                 chat_id=None, parse_mode=None):
+        """Сессия опроса; без chat_id сообщения идут в TELEGRAM_CHAT_ID."""
+        self.bot = bot
+        self.token = token
+        self.timestamp = timestamp
+        self.snapshots = snapshots
+        self.transitions = transitions
+        self.chat_id = chat_id
+        self.parse_mode = parse_mode
+        self.last_message = None
+        self.last_error = None
+        self.failures = 0
+        self.parked = False
+        self.quarantined = set()
+
+    def notify(self, message, parse_mode=None):
+        """Отправка сообщения в чат аккаунта или в TELEGRAM_CHAT_ID."""
+        if self.chat_id is None and parse_mode is None:
+            return send_message(self.bot, message)
+        return send_to_chat(
+            self.bot, self.chat_id or TELEGRAM_CHAT_ID, message, parse_mode
+        )
+
+    def notify_status(self, homework, message):
+        """Уведомление о новом статусе простым текстом или с разметкой."""
+        if self.parse_mode is None:
+            self.notify(message)
+            return
+        for part in render_status(
+            homework.get('homework_name'),
+            HOMEWORK_VERDICTS[homework.get('status')],
+            homework.get('reviewer_comment'),
+            self.parse_mode,
+        ):
+            self.notify(part, self.parse_mode)
+
+    def alert(self, message):
+        """Сообщение об ошибке без повтора одинаковых подряд."""
+        logger.error(message)
+        if message != self.last_error:
+            self.notify(message)
+            self.last_error = message
+
+    def quarantine(self, homework, error):
+        """
+        Откладывание работы с недокументированным статусом.
+
+        Об одной и той же паре (работа, статус) сообщается один раз,
+        опрос аккаунта продолжается.
+        """
+        key = (homework.get('id', homework.get('homework_name')),
+               homework.get('status'))
+        if key not in self.quarantined:
+            self.quarantined.add(key)
+            self.alert(f'{Phrases.STATUS_QUARANTINED}: {error}')
+        return exceptions.QUARANTINE
+
+    def process(self, homework):
+        """Уведомление о последней работе ответа, если статус изменился."""
         try:
-            response = get_api_answer(timestamp)
+            message = parse_status(homework)
+        except exceptions.QuarantineError as error:
+            return self.quarantine(homework, error)
+        if message != self.last_message:
+            self.notify_status(homework, message)
+            self.last_message = message
+        return None
+
+    def fail(self, error):
+        """Учёт сбоя опроса; возвращает его класс из exceptions.classify."""
+        kind = exceptions.classify(error)
+        self.failures += 1
+        if kind == exceptions.PERMANENT:
+            self.parked = True
+            logger.critical(f'{Phrases.TOKEN_PARKED}: {error}')
+            self.notify(f'{Phrases.TOKEN_PARKED}: {error}')
+        elif isinstance(error, exceptions.CurrentDateError):
+            logger.error(f'{Phrases.KEY_ERROR}: {error}')
+        else:
+            self.alert(f'{Phrases.PROGRAMM_FAILURE}: {error}')
+        return kind
+
+    def poll(self, fetch):
+        """
+        Один цикл опроса API с отправкой изменившегося статуса.
+
+        Возвращает None или класс сбоя (exceptions.TRANSIENT и т. д.),
+        по которому планировщик выбирает время следующего опроса.
+        Аккаунт с отозванным токеном паркуется и больше не запрашивается.
+        """
+        if self.parked:
+            return exceptions.PERMANENT
+        try:
+            response = fetch(self.timestamp)
             check_response(response)
+            self.snapshots.update(self.token, response)
+            record_transitions(self.transitions, self.token, response)
             homeworks = response.get('homeworks')
+            kind = None
             if homeworks:
-                message = parse_status(homeworks[-1])
-                last_message = check_repeat_message(
-                    bot, message, last_message
-                )
+                kind = self.process(homeworks[-1])
             else:
                 logger.debug(Phrases.NO_NEW_HOMEWORKS)
-            timestamp = response.get('current_date', timestamp)
-        except exceptions.CurrentDateError as error:
-            logger.error(f'{Phrases.KEY_ERROR}: {error}')
+            self.timestamp = response.get('current_date', self.timestamp)
         except Exception as error:
-            message = f'{Phrases.PROGRAMM_FAILURE}: {error}'
-            logger.error(message)
-            send_message(bot, message)
-        finally:
+            return self.fail(error)
+        self.failures = 0
+        self.last_error = None
+        return kind
+
+
+def api_fetcher():
+    """Функция запроса к API; при заданном RECORD_PATH ответы пишутся."""
+    if not RECORD_PATH:
+        return get_api_answer
+    return Recorder(RECORD_PATH).wrap(get_api_answer)
+
+
+def main():
+    """Основная логика работы бота."""
+    check_tokens()
+    check_message_format()
+
+    bot = TeleBot(token=TELEGRAM_TOKEN)
+    warm_up = WarmUp(bot, transport, ENDPOINT).start()
+    warm_up.telegram()
+    snapshots = SnapshotCache()
+    state = StateStore(state_file_path)
+    timestamp = onboard_account(PRACTICUM_TOKEN, state, snapshots)
+    session = PollSession(
+        bot, PRACTICUM_TOKEN, timestamp, snapshots,
+        open_transition_recorder(), parse_mode=MESSAGE_FORMAT
+    )
+    fetch = api_fetcher()
+    shutdown = GracefulShutdown(shutdown_deadline).install()
+
+    try:
+        while True:
+            with shutdown.busy():
+                session.poll(fetch)
+            save_timestamp(state, PRACTICUM_TOKEN, session.timestamp)
+            if shutdown.requested:
+                break
             time.sleep(RETRY_PERIOD)
+    finally:
+        shutdown.restore()
+        state.flush()
+        warm_up.stop()
 
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(
+        description='Бот-ассистент статусов домашних работ.'
+    )
+    add_profile_arguments(parser)
+    add_shutdown_arguments(parser)
+    args = parser.parse_args()
+    shutdown_deadline = args.shutdown_deadline
+    with profiling(args.profile, args.profile_interval):
+        main()
@@ -0,0 +1,105 @@
+import codecs
+import json
+
+STREAM_KEY = 'homeworks'
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+
+class _Buffer:
+    """Окно декодированного текста поверх потока байтов."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Чтение следующего куска; False, если поток закончился."""
+        if self.eof:
+            return False
+        self.text = self.text[self.pos:]
+        self.pos = 0
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self.eof = True
+            self.text += self._utf8.decode(b'', final=True)
+        else:
+            self.text += self._utf8.decode(chunk)
+        return True
+
+    def peek(self):
+        """Первый непробельный символ без его потребления."""
+        while True:
+            while self.pos < len(self.text):
+                if self.text[self.pos] not in _WHITESPACE:
+                    return self.text[self.pos]
+                self.pos += 1
+            if not self.fill():
+                raise json.JSONDecodeError(
+                    'Неожиданный конец ответа', self.text, self.pos
+                )
+
+    def expect(self, char):
+        """Потребление обязательного символа-разделителя."""
+        if self.peek() != char:
+            raise json.JSONDecodeError(
+                f'Ожидался символ {char!r}', self.text, self.pos
+            )
+        self.pos += 1
+
+    def value(self):
+        """Разбор одного JSON-значения, дочитывая поток при нехватке."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            # Число в конце буфера может продолжиться в следующем куске.
+            if end == len(self.text) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_elements(chunks, key=STREAM_KEY):
+    """
+    Выдача элементов списка key из потока JSON-объекта по одному.
+
+    В памяти держится только текущий элемент. Генератор возвращает
+    остальной ответ, где список key заменён пустым списком; ответ,
+    не являющийся объектом, возвращается как есть.
+    """
+    buffer = _Buffer(chunks)
+    if buffer.peek() != '{':
+        return buffer.value()
+    buffer.expect('{')
+    rest = {}
+    if buffer.peek() == '}':
+        return rest
+    while True:
+        name = buffer.value()
+        buffer.expect(':')
+        if name == key and buffer.peek() == '[':
+            buffer.expect('[')
+            rest[name] = []
+            if buffer.peek() == ']':
+                buffer.expect(']')
+            else:
+                while True:
+                    yield buffer.value()
+                    if buffer.peek() == ']':
+                        buffer.expect(']')
+                        break
+                    buffer.expect(',')
+        else:
+            rest[name] = buffer.value()
+        if buffer.peek() == '}':
+            return rest
+        buffer.expect(',')
@@ -0,0 +1,461 @@
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import resource
+import statistics
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from telebot import TeleBot, apihelper
+
+import homework
+from accounts import Account, AccountRegistry, save_accounts
+from h2bench import LATENCY, PATH, percentile
+from runner import RELOAD, Runner, run_async
+from state import StateStore
+from transports import (
+    ASYNC_TRANSPORTS, DEFAULT_TRANSPORT, TRANSPORTS, make_transport
+)
+
+SYNC = 'sync'
+ASYNC = 'async'
+TRANSPORT_MODES = {SYNC: TRANSPORTS, ASYNC: ASYNC_TRANSPORTS}
+ACCOUNTS = (100, 500)
+TRANSPORT_SWEEP = (f'{SYNC}:{DEFAULT_TRANSPORT}', f'{ASYNC}:httpx')
+PROCESSES = (1,)
+CONCURRENCY = (1, 8, 32)
+PERIOD = 2.0
+ROUNDS = 3
+CHANGE_RATE = 0.1
+LOAD_BOT_TOKEN = '1:load-test'
+STATUSES = tuple(homework.HOMEWORK_VERDICTS)
+
+
+class SyntheticAccounts:
+    """
+    Домашки синтетических аккаунтов для стенда Практикума.
+
+    У каждого аккаунта одна работа; при каждом запросе её статус
+    меняется с вероятностью change_rate. Первый запрос (from_date=0)
+    всегда возвращает работу, как загрузка истории.
+    """
+
+    def __init__(self, change_rate=CHANGE_RATE, seed=0):
+        self.change_rate = change_rate
+        self.seed = seed
+        self._statuses = {}
+        self._lock = threading.Lock()
+
+    def answer(self, token, from_date):
+        """Ответ API домашек для аккаунта token."""
+        with self._lock:
+            if token not in self._statuses:
+                self._statuses[token] = (
+                    random.Random(f'{self.seed}:{token}'), 0
+                )
+            rng, status = self._statuses[token]
+            changed = rng.random() < self.change_rate
+            if changed:
+                status = (status + 1) % len(STATUSES)
+                self._statuses[token] = (rng, status)
+        homeworks = []
+        if changed or not from_date:
+            homeworks.append({
+                'id': 1,
+                'homework_name': f'{token}__hw.zip',
+                'status': STATUSES[status],
+            })
+        return {'homeworks': homeworks, 'current_date': int(time.time())}
+
+
+class StandInServer(ThreadingHTTPServer):
+    """HTTP-сервер стенда с очередью под много одновременных клиентов."""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Общая часть обработчиков: HTTP/1.1 keep-alive и ответ JSON."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def reply(self, status, payload):
+        """Ответ JSON с Content-Length для keep-alive."""
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Стенд не пишет журнал запросов."""
+
+
+class PracticumHandler(StandInHandler):
+    """Стенд API домашек Практикума."""
+
+    def do_GET(self):
+        server = self.server
+        url = urlsplit(self.path)
+        authorization = self.headers.get('Authorization', '')
+        if url.path != PATH or not authorization.startswith('OAuth '):
+            self.reply(401, {'code': 'not_authenticated'})
+            return
+        time.sleep(server.latency)
+        from_date = int(parse_qs(url.query).get('from_date', ['0'])[0])
+        server.count('practicum_requests')
+        self.reply(200, server.accounts.answer(
+            authorization[len('OAuth '):], from_date
+        ))
+
+
+class TelegramHandler(StandInHandler):
+    """Стенд Bot API Telegram: getMe и sendMessage."""
+
+    def handle_method(self):
+        """Ответ метода бота из пути /bot<токен>/<метод>."""
+        url = urlsplit(self.path)
+        method = url.path.rsplit('/', 1)[-1]
+        length = int(self.headers.get('Content-Length') or 0)
+        params = parse_qs(url.query)
+        params.update(parse_qs(self.rfile.read(length).decode()))
+        if method == 'getMe':
+            self.reply(200, {'ok': True, 'result': {
+                'id': 1, 'is_bot': True, 'first_name': 'load'
+            }})
+            return
+        self.server.count('telegram_messages')
+        chat_id = params.get('chat_id', ['0'])[0]
+        self.reply(200, {'ok': True, 'result': {
+            'message_id': 1,
+            'date': int(time.time()),
+            'chat': {'id': int(chat_id), 'type': 'private'},
+            'text': params.get('text', [''])[0],
+        }})
+
+    do_GET = handle_method
+    do_POST = handle_method
+
+
+class StandIns:
+    """
+    Стенды Практикума и Telegram на локальных портах.
+
+    Серверы работают в потоках текущего процесса; нагрузочный прогон
+    поднимает их в отдельном процессе, чтобы они не делили GIL
+    с опрашивающими процессами.
+    """
+
+    def __init__(self, change_rate=CHANGE_RATE, latency=LATENCY, seed=0):
+        self.accounts = SyntheticAccounts(change_rate, seed)
+        self.latency = latency
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._servers = []
+
+    def count(self, name):
+        """Учёт запроса стенда."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+    def stats(self):
+        """Счётчики запросов с обнулением."""
+        with self._lock:
+            counters, self.counters = self.counters, {}
+        return counters
+
+    def _serve(self, handler):
+        server = StandInServer(('127.0.0.1', 0), handler)
+        server.accounts = self.accounts
+        server.latency = self.latency
+        server.count = self.count
+        threading.Thread(
+            target=server.serve_forever, name=handler.__name__, daemon=True
+        ).start()
+        self._servers.append(server)
+        return f'http://127.0.0.1:{server.server_address[1]}'
+
+    def start(self):
+        """Запуск обоих серверов; адреса — в practicum_url и telegram_url."""
+        self.practicum_url = self._serve(PracticumHandler) + PATH
+        self.telegram_url = self._serve(TelegramHandler)
+        return self
+
+    def stop(self):
+        """Остановка серверов."""
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+
+
+def serve_stand_ins(connection, change_rate, latency, seed):
+    """Стенды в дочернем процессе под управлением через connection."""
+    stand_ins = StandIns(change_rate, latency, seed).start()
+    connection.send((stand_ins.practicum_url, stand_ins.telegram_url))
+    try:
+        while connection.recv() == 'stats':
+            connection.send(stand_ins.stats())
+    finally:
+        stand_ins.stop()
+
+
+def synthetic_accounts(count):
+    """Аккаунты load-<n> с чатами по номеру."""
+    return [
+        Account(f'load-{number}', str(1000 + number))
+        for number in range(count)
+    ]
+
+
+def run_shard(accounts, transport, concurrency, rounds, period,
+              practicum_url, telegram_url):
+    """
+    Прогон части аккаунтов в текущем процессе так, как опрашивает бот.
+
+    transport вида sync:requests опрашивает через Runner.serve()
+    в concurrency потоках опроса, вида async:httpx-http2 — через
+    run_async() не больше чем concurrency опросами сразу. Первые опросы
+    аккаунтов разнесены по period, как в работе; первый период (загрузка
+    истории) не измеряется, затем идут rounds периодов. Возвращает
+    задержки опросов, отставание планировщика, время, CPU и пиковый RSS.
+    """
+    mode, name = transport.split(':', 1)
+    homework.ENDPOINT = practicum_url
+    apihelper.API_URL = telegram_url + '/bot{0}/{1}'
+    if mode == SYNC:
+        homework.transport = make_transport(name)
+    latencies = []
+    lags = []
+    measured = {}
+    with tempfile.TemporaryDirectory() as directory:
+        registry_path = os.path.join(directory, 'accounts.csv')
+        save_accounts(registry_path, accounts)
+        bot_runner = Runner(
+            AccountRegistry(registry_path),
+            TeleBot(token=LOAD_BOT_TOKEN),
+            StateStore(os.path.join(directory, 'state.json')),
+            period=period,
+            concurrency=concurrency,
+        )
+
+        def record(token, started):
+            # Учитываются опросы, закончившиеся между двумя таймерами.
+            measuring = 'started' in measured and 'wall' not in measured
+            if measuring and token != RELOAD:
+                latencies.append(time.perf_counter() - started)
+                lags.append(bot_runner.scheduler.lag)
+
+        def timed_poll(token, poll=bot_runner.poll):
+            started = time.perf_counter()
+            try:
+                return poll(token)
+            finally:
+                record(token, started)
+
+        async def timed_apoll(token, client, apoll=bot_runner.apoll):
+            started = time.perf_counter()
+            try:
+                return await apoll(token, client)
+            finally:
+                record(token, started)
+
+        def start_measuring():
+            measured['usage'] = resource.getrusage(resource.RUSAGE_SELF)
+            measured['started'] = time.perf_counter()
+
+        def stop_measuring():
+            # Время и CPU снимаются здесь: после stop() бот ещё дожидается
+            # начатых опросов и сбрасывает состояние, это не нагрузка.
+            measured['wall'] = time.perf_counter() - measured['started']
+            measured['finished'] = resource.getrusage(resource.RUSAGE_SELF)
+            bot_runner.scheduler.stop()
+
+        bot_runner.poll = timed_poll
+        bot_runner.apoll = timed_apoll
+        timers = [
+            threading.Timer(period, start_measuring),
+            threading.Timer(period * (rounds + 1), stop_measuring),
+        ]
+        for timer in timers:
+            timer.start()
+        try:
+            if mode == SYNC:
+                bot_runner.serve()
+            else:
+                asyncio.run(run_async(bot_runner, name))
+        finally:
+            for timer in timers:
+                timer.cancel()
+    if mode == SYNC:
+        homework.transport.close()
+    usage = measured['usage']
+    finished = measured['finished']
+    return {
+        'latencies': latencies,
+        'lags': lags,
+        'wall': measured['wall'],
+        'cpu': (
+            finished.ru_utime - usage.ru_utime
+            + finished.ru_stime - usage.ru_stime
+        ),
+        'rss_kb': finished.ru_maxrss,
+    }
+
+
+def run_shard_args(args):
+    """run_shard для Pool.map."""
+    return run_shard(*args)
+
+
+def summarize(shards, config, stand_in_stats):
+    """Сводка прогона по частям: пропускная способность, задержки, ресурсы."""
+    latencies = sorted(
+        itertools.chain.from_iterable(shard['latencies'] for shard in shards)
+    )
+    wall = max(shard['wall'] for shard in shards)
+    cpu = sum(shard['cpu'] for shard in shards)
+    return {
+        **config,
+        'polls': len(latencies),
+        'wall_seconds': round(wall, 3),
+        'polls_per_second': round(len(latencies) / wall, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 1),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 1),
+        'max_lag_ms': round(
+            max(max(shard['lags'], default=0) for shard in shards) * 1000, 1
+        ),
+        'cpu_seconds': round(cpu, 3),
+        'cpu_ms_per_poll': round(cpu / len(latencies) * 1000, 3),
+        'max_rss_mb': round(max(s['rss_kb'] for s in shards) / 1024, 1),
+        'total_rss_mb': round(sum(s['rss_kb'] for s in shards) / 1024, 1),
+        **stand_in_stats,
+    }
+
+
+def run_config(urls, accounts, processes, transport, concurrency, rounds,
+               period):
+    """Один прогон: аккаунты делятся между processes свежими процессами."""
+    synthetic = synthetic_accounts(accounts)
+    shards = [
+        (
+            synthetic[number::processes], transport, concurrency, rounds,
+            period, *urls
+        )
+        for number in range(processes)
+    ]
+    with multiprocessing.Pool(processes) as pool:
+        return pool.map(run_shard_args, shards)
+
+
+def parse_counts(value):
+    """Список целых через запятую для перебора."""
+    return [int(part) for part in value.split(',')]
+
+
+def parse_transports(value):
+    """Список режим:транспорт через запятую, например sync:requests."""
+    transports = value.split(',')
+    for transport in transports:
+        mode, _, name = transport.partition(':')
+        if name not in TRANSPORT_MODES.get(mode, ()):
+            raise argparse.ArgumentTypeError(
+                f'Неизвестный транспорт {transport}'
+            )
+    return transports
+
+
+def main(argv=None):
+    """
+    Перебор аккаунтов, процессов, транспортов и конкурентности
+    с отчётом JSON Lines.
+    """
+    parser = argparse.ArgumentParser(
+        description='Нагрузочный прогон бота на синтетических аккаунтах '
+                    'против локальных стендов Практикума и Telegram.'
+    )
+    parser.add_argument(
+        '--accounts', type=parse_counts,
+        default=list(ACCOUNTS), help='числа аккаунтов через запятую'
+    )
+    parser.add_argument(
+        '--processes', type=parse_counts,
+        default=list(PROCESSES), help='числа процессов через запятую'
+    )
+    parser.add_argument(
+        '--transports', type=parse_transports, default=list(TRANSPORT_SWEEP),
+        help='sync:<транспорт> опрашивает Runner.serve(), async:<транспорт> '
+             '— run_async(); несколько через запятую'
+    )
+    parser.add_argument(
+        '--concurrency', type=parse_counts, default=list(CONCURRENCY),
+        help='числа потоков опроса (sync) или одновременных опросов '
+             '(async) через запятую'
+    )
+    parser.add_argument(
+        '--period', type=float, default=PERIOD,
+        help='период опроса каждого аккаунта в секундах'
+    )
+    parser.add_argument('--rounds', type=int, default=ROUNDS)
+    parser.add_argument(
+        '--change-rate', type=float, default=CHANGE_RATE,
+        help='вероятность смены статуса работы за один опрос'
+    )
+    parser.add_argument(
+        '--latency', type=float, default=LATENCY,
+        help='задержка ответа стенда Практикума в секундах'
+    )
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--log-level', default='ERROR')
+    args = parser.parse_args(argv)
+    homework.logger.setLevel(args.log_level)
+    connection, child_connection = multiprocessing.Pipe()
+    stand_ins = multiprocessing.Process(
+        target=serve_stand_ins,
+        args=(child_connection, args.change_rate, args.latency, args.seed),
+        daemon=True,
+    )
+    stand_ins.start()
+    urls = connection.recv()
+    try:
+        for accounts, processes, transport, concurrency in (
+            itertools.product(
+                args.accounts, args.processes, args.transports,
+                args.concurrency
+            )
+        ):
+            config = {
+                'accounts': accounts,
+                'processes': processes,
+                'transport': transport,
+                'concurrency': concurrency,
+                'period': args.period,
+                'rounds': args.rounds,
+                'target_polls_per_second': round(accounts / args.period, 1),
+            }
+            connection.send('stats')
+            connection.recv()
+            shards = run_config(
+                urls, accounts, processes, transport, concurrency,
+                args.rounds, args.period
+            )
+            connection.send('stats')
+            print(json.dumps(
+                summarize(shards, config, connection.recv())
+            ), flush=True)
+    finally:
+        connection.send('stop')
+        stand_ins.join(5)
+
+
+if __name__ == '__main__':
+    main()
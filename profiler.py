@@ -0,0 +1,152 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+SAMPLE_INTERVAL = 0.01
+FLUSH_EVERY = 60
+SPEEDSCOPE_SCHEMA = 'https://www.speedscope.app/file-format-schema.json'
+SPEEDSCOPE_SUFFIX = '.json'
+
+
+def frame_label(code):
+    """Подпись кадра стека: модуль и функция."""
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f'{module}.{code.co_name}'
+
+
+class SamplingProfiler:
+    """
+    Семплирующий профилировщик работающего процесса.
+
+    Раз в interval секунд снимает стеки всех потоков, кроме своего,
+    и копит число попаданий каждого стека. Раз в flush_every секунд
+    и при остановке пишет их в path: collapsed stacks для flamegraph.pl
+    или, при расширении .json, файл speedscope.
+    """
+
+    def __init__(self, path, interval=SAMPLE_INTERVAL,
+                 flush_every=FLUSH_EVERY, clock=time.monotonic):
+        self.path = path
+        self.interval = interval
+        self.flush_every = flush_every
+        self.clock = clock
+        self.samples = Counter()
+        self.started = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def sample(self):
+        """Один снимок стеков всех чужих потоков."""
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        stacks = []
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame.f_code))
+                frame = frame.f_back
+            stack.append(names.get(ident, str(ident)))
+            stacks.append(tuple(reversed(stack)))
+        with self._lock:
+            self.samples.update(stacks)
+
+    def collapsed(self):
+        """Стеки в формате collapsed: «поток;f1;f2 число»."""
+        with self._lock:
+            samples = sorted(self.samples.items())
+        return ''.join(
+            f'{";".join(stack)} {count}\n' for stack, count in samples
+        )
+
+    def speedscope(self):
+        """Стеки в формате speedscope (sampled, веса в секундах)."""
+        with self._lock:
+            samples = sorted(self.samples.items())
+        frames = {}
+        stacks = []
+        weights = []
+        for stack, count in samples:
+            stacks.append([frames.setdefault(name, len(frames))
+                           for name in stack])
+            weights.append(count * self.interval)
+        return {
+            '$schema': SPEEDSCOPE_SCHEMA,
+            'shared': {'frames': [{'name': name} for name in frames]},
+            'profiles': [{
+                'type': 'sampled',
+                'name': 'homework',
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': sum(weights),
+                'samples': stacks,
+                'weights': weights,
+            }],
+            'name': 'homework',
+            'exporter': 'homework.profiler',
+        }
+
+    def write(self):
+        """Атомарная запись накопленных стеков в path."""
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            if self.path.endswith(SPEEDSCOPE_SUFFIX):
+                json.dump(self.speedscope(), file)
+            else:
+                file.write(self.collapsed())
+        os.replace(tmp_path, self.path)
+
+    def _run(self):
+        flushed = self.clock()
+        while not self._stopped.wait(self.interval):
+            self.sample()
+            if self.clock() - flushed >= self.flush_every:
+                self.write()
+                flushed = self.clock()
+
+    def start(self):
+        """Запуск семплирования в потоке-демоне."""
+        self.started = self.clock()
+        self._thread = threading.Thread(
+            target=self._run, name='profiler', daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Остановка семплирования и запись итогового файла."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.write()
+
+
+@contextmanager
+def profiling(path, interval=SAMPLE_INTERVAL, flush_every=FLUSH_EVERY):
+    """Профилирование блока with; без path ничего не делает."""
+    if not path:
+        yield None
+        return
+    profiler = SamplingProfiler(path, interval, flush_every).start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+
+
+def add_profile_arguments(parser):
+    """Флаги --profile и --profile-interval для точек входа."""
+    parser.add_argument(
+        '--profile', metavar='PATH', default=None,
+        help='писать стеки в PATH: collapsed или speedscope для .json'
+    )
+    parser.add_argument(
+        '--profile-interval', type=float, default=SAMPLE_INTERVAL,
+        help='период семплирования в секундах'
+    )
@@ -0,0 +1,102 @@
+import builtins
+import gzip
+import json
+import threading
+import time
+
+import exceptions
+
+
+class Recorder:
+    """Запись ответов API в сжатый файл JSON-строк."""
+
+    def __init__(self, path, clock=time):
+        self.path = path
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._file = gzip.open(path, 'at', encoding='utf-8')
+
+    def write(self, record):
+        """Дописывание записи с немедленным сбросом на диск."""
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def wrap(self, fetch):
+        """Обёртка функции запроса, записывающая ответы и ошибки."""
+        def recorded_fetch(timestamp):
+            record = {'at': self._clock.time(), 'from_date': timestamp}
+            try:
+                record['response'] = fetch(timestamp)
+            except Exception as error:
+                record['error'] = type(error).__name__
+                record['message'] = str(error)
+                status_code = getattr(error, 'status_code', None)
+                if status_code is not None:
+                    record['status_code'] = status_code
+                raise
+            finally:
+                self.write(record)
+            return record['response']
+
+        return recorded_fetch
+
+    def close(self):
+        """Закрытие файла записи."""
+        with self._lock:
+            self._file.close()
+
+
+def read_records(path):
+    """Выдача записей из файла по одной."""
+    with gzip.open(path, 'rt', encoding='utf-8') as file:
+        try:
+            for line in file:
+                yield json.loads(line)
+        except (EOFError, json.JSONDecodeError):
+            # Запись прервана вместе с процессом: хвост файла не дописан.
+            return
+
+
+def replayed_error(record):
+    """
+    Исключение из записи ошибки; неизвестные классы — RequestError.
+
+    Код ответа возвращается в status_code, чтобы записанный 401
+    классифицировался так же, как при живом опросе.
+    """
+    name = record['error']
+    error = getattr(exceptions, name, None) or getattr(builtins, name, None)
+    if not (isinstance(error, type) and issubclass(error, Exception)):
+        error = exceptions.RequestError
+    status_code = record.get('status_code')
+    if status_code is not None and issubclass(error, exceptions.RequestError):
+        return error(record['message'], status_code)
+    return error(record['message'])
+
+
+class Replayer:
+    """Воспроизведение записанных ответов API по порядку."""
+
+    def __init__(self, path):
+        self._records = read_records(path)
+        self._next = next(self._records, None)
+        self.replayed = 0
+
+    def has_next(self):
+        """Остались ли невоспроизведённые ответы."""
+        return self._next is not None
+
+    def get_api_answer(self, timestamp):
+        """Следующий записанный ответ вместо запроса к API."""
+        record = self._next
+        if record is None:
+            raise exceptions.ReplayFinishedError(
+                'Записанные ответы закончились'
+            )
+        self._next = next(self._records, None)
+        self.replayed += 1
+        if 'error' in record:
+            raise replayed_error(record)
+        return record['response']
@@ -0,0 +1,97 @@
+import html
+import re
+from functools import lru_cache
+
+MARKDOWN_V2 = 'MarkdownV2'
+HTML = 'HTML'
+MESSAGE_LIMIT = 4096
+ESCAPE_CACHE_SIZE = 4096
+ELLIPSIS = '…'
+
+_MARKDOWN_V2_SPECIAL = re.compile(r'([_*\[\]()~`>#+\-=|{}.!\\])')
+_WORDS = re.compile(r'\S+\s*|\s+')
+
+
+@lru_cache(maxsize=ESCAPE_CACHE_SIZE)
+def escape_markdown_v2(text):
+    """Экранирование спецсимволов MarkdownV2."""
+    return _MARKDOWN_V2_SPECIAL.sub(r'\\\1', text)
+
+
+@lru_cache(maxsize=ESCAPE_CACHE_SIZE)
+def escape_html(text):
+    """Экранирование текста для parse_mode HTML."""
+    return html.escape(text, quote=False)
+
+
+FORMATS = {
+    MARKDOWN_V2: {
+        'escape': escape_markdown_v2,
+        'bold': '*{}*',
+        'italic': '_{}_',
+        'ellipsis': escape_markdown_v2(ELLIPSIS),
+    },
+    HTML: {
+        'escape': escape_html,
+        'bold': '<b>{}</b>',
+        'italic': '<i>{}</i>',
+        'ellipsis': escape_html(ELLIPSIS),
+    },
+}
+
+
+def split_escaped(text, escape, size):
+    """
+    Деление текста на экранированные куски не длиннее size.
+
+    Экранируются целые слова (или символы слишком длинного слова),
+    поэтому escape-последовательность никогда не разрезается.
+    """
+    parts = []
+    current = []
+    length = 0
+    for word in _WORDS.findall(text):
+        escaped = escape(word)
+        pieces = [escaped] if len(escaped) <= size else map(escape, word)
+        for piece in pieces:
+            if length + len(piece) > size:
+                parts.append(''.join(current))
+                current = []
+                length = 0
+            current.append(piece)
+            length += len(piece)
+    if current:
+        parts.append(''.join(current))
+    return parts
+
+
+def render_status(homework_name, verdict, comment, parse_mode,
+                  limit=MESSAGE_LIMIT, max_parts=None):
+    """
+    Сообщения об изменении статуса в разметке parse_mode.
+
+    Название работы выделяется жирным, комментарий ревьюера — курсивом.
+    Длинный комментарий делится на несколько сообщений не длиннее limit,
+    каждое с собственной парой тегов; при max_parts лишнее обрезается.
+    """
+    style = FORMATS[parse_mode]
+    escape = style['escape']
+    header = (
+        escape('Изменился статус проверки работы ')
+        + style['bold'].format(escape(homework_name))
+        + escape(f'. {verdict}')
+    )
+    if not comment:
+        return [header]
+    wrapper = len(style['italic'].format(''))
+    size = limit - wrapper - len(style['ellipsis'])
+    parts = split_escaped(comment, escape, size)
+    if max_parts is not None and len(parts) > max_parts:
+        parts = parts[:max_parts]
+        parts[-1] += style['ellipsis']
+    messages = [style['italic'].format(part) for part in parts]
+    if len(header) + 2 + len(messages[0]) <= limit:
+        messages[0] = f'{header}\n\n{messages[0]}'
+    else:
+        messages.insert(0, header)
+    return messages
@@ -0,0 +1,72 @@
+import argparse
+import time
+
+import homework
+from clock import SimulatedClock
+from recording import Replayer
+from scheduler import PollScheduler
+from snapshots import SnapshotCache
+
+REPLAY_TOKEN = 'replay'
+
+
+class ReplayBot:
+    """Бот, который запоминает сообщения вместо отправки в Telegram."""
+
+    def __init__(self, clock):
+        self._clock = clock
+        self.messages = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        """Сохранение сообщения с виртуальным временем отправки."""
+        self.messages.append((self._clock.time(), chat_id, text))
+
+
+def run_replay(path, retry_period=homework.RETRY_PERIOD, bot=None):
+    """
+    Прогон планировщика опросов по записанным ответам.
+
+    Планировщик работает на виртуальных часах, поэтому неделя
+    записанных опросов воспроизводится за секунды.
+    """
+    replayer = Replayer(path)
+    clock = SimulatedClock()
+    scheduler = PollScheduler(clock, retry_period)
+    bot = bot or ReplayBot(clock)
+    session = homework.PollSession(
+        bot, REPLAY_TOKEN, 0, SnapshotCache(clock=clock.time)
+    )
+
+    def poll(account):
+        session.poll(replayer.get_api_answer)
+        if not replayer.has_next():
+            scheduler.stop()
+
+    started = time.perf_counter()
+    if replayer.has_next():
+        scheduler.add(REPLAY_TOKEN)
+        scheduler.run(poll)
+    return {
+        'polls': replayer.replayed,
+        'messages': len(getattr(bot, 'messages', ())),
+        'virtual_seconds': clock.time(),
+        'wall_seconds': time.perf_counter() - started,
+    }
+
+
+def main(argv=None):
+    """Воспроизведение записи ответов API без сети."""
+    parser = argparse.ArgumentParser(
+        description='Прогон бота по записанным ответам API.'
+    )
+    parser.add_argument('path', help='файл записи (RECORD_PATH)')
+    parser.add_argument(
+        '--retry-period', type=float, default=homework.RETRY_PERIOD
+    )
+    args = parser.parse_args(argv)
+    for name, value in run_replay(args.path, args.retry_period).items():
+        print(f'{name}: {value}')
+
+
+if __name__ == '__main__':
+    main()
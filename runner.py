@@ -0,0 +1,598 @@
+import argparse
+import asyncio
+import functools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from telebot import TeleBot
+
+import exceptions
+import homework
+from accounts import AccountDiff, AccountRegistry
+from broadcast import broadcast
+from clock import RealClock
+from governor import RateGovernor
+from health import (
+    POLL, STALL_TIMEOUT, Health, HealthBot, HealthServer, Watchdog
+)
+from profiler import add_profile_arguments, profiling
+from scheduler import SERVICE_CLASS, PollScheduler, status_class
+from shutdown import (
+    SHUTDOWN_DEADLINE, SHUTDOWN_SIGNALS, GracefulShutdown,
+    add_shutdown_arguments,
+)
+from snapshots import SnapshotCache
+from state import StateStore, account_key
+from tiered import SpillStore, TieredCache
+from transports import (
+    ASYNC_TRANSPORTS, POOLED_TRANSPORT, make_async_transport, make_transport
+)
+from warmup import WarmUp, warm_async
+
+RELOAD = 'registry-reload'
+RELOAD_PERIOD = 30
+MAX_RESTARTS = 3
+RETRY_BACKOFF = 30
+DRAIN_STEP = 0.1
+EXIT_STALLED = 75
+
+logger = logging.getLogger('homework.runner')
+
+
+class Runner:
+    """Опрос аккаунтов из реестра с перечитыванием его на лету."""
+
+    def __init__(self, registry, bot, state, clock=None,
+                 period=homework.RETRY_PERIOD, reload_period=RELOAD_PERIOD,
+                 fetch=homework.get_account_answer, transitions=None,
+                 max_rate=None, governor=None, max_hot=None, spill=None,
+                 warm_up=None, concurrency=None):
+        self.registry = registry
+        self.health = Health()
+        self.bot = HealthBot(bot, self.health)
+        self.state = state
+        self.clock = clock or RealClock()
+        self.reload_period = reload_period
+        self.fetch = fetch
+        self.transitions = transitions
+        self.governor = governor
+        self.warm_up = warm_up
+        self.concurrency = concurrency
+        if max_hot is not None and spill is None:
+            spill = SpillStore()
+        self.spill = spill
+        self.snapshots = SnapshotCache(
+            clock=self.clock.time, max_hot=max_hot, spill=spill
+        )
+        self.scheduler = PollScheduler(
+            self.clock, period, max_rate, limiter=governor,
+            classify=self.classify
+        )
+        self.sessions = TieredCache(
+            max_hot, spill, self.dump_session, self.load_session, 'session'
+        )
+        self.restarts = 0
+        self.in_flight = 0
+        self._generation = 0
+        self._polling = {}
+        self._slot = threading.local()
+        self._lock = threading.Lock()
+        self.worker = None
+        self.workers = []
+        self._finished = threading.Event()
+        self.health.gauge('scheduler_lag', lambda: self.scheduler.lag)
+        self.health.gauge('scheduled', lambda: len(self.scheduler))
+        self.health.gauge('deferred', lambda: self.scheduler.deferred())
+
+    def classify(self, token):
+        """Класс опроса аккаунта по последним статусам из кэша снимков."""
+        if token == RELOAD:
+            return SERVICE_CLASS
+        snapshot = self.snapshots.peek(token)
+        return status_class(snapshot.statuses.values() if snapshot else ())
+
+    @staticmethod
+    def dump_session(session):
+        """Состояние сессии опроса для вытеснения на диск."""
+        return {
+            'timestamp': session.timestamp,
+            'last_message': session.last_message,
+            'last_error': session.last_error,
+            'failures': session.failures,
+            'quarantined': sorted(session.quarantined, key=str),
+        }
+
+    def load_session(self, token, data):
+        """Сессия опроса, поднятая с диска; чат берётся из реестра."""
+        session = self.new_session(token, self.registry.accounts[token])
+        session.timestamp = data['timestamp']
+        session.last_message = data['last_message']
+        session.last_error = data['last_error']
+        session.failures = data['failures']
+        session.quarantined = {tuple(key) for key in data['quarantined']}
+        return session
+
+    def new_session(self, token, account):
+        """Сессия опроса аккаунта без состояния."""
+        return homework.PollSession(
+            self.bot, token, None, self.snapshots,
+            self.transitions, chat_id=account.chat_id,
+            parse_mode=homework.MESSAGE_FORMAT
+        )
+
+    def fetch_measured(self, token, timestamp):
+        """Запрос к API с передачей кода и времени ответа регулятору."""
+        if self.governor is None:
+            response = self.fetch(token, timestamp)
+            self.health.mark(POLL)
+            return response
+        started = time.monotonic()
+        try:
+            response = self.fetch(token, timestamp)
+        except exceptions.RequestError as error:
+            self.governor.record(
+                error.status_code, time.monotonic() - started
+            )
+            raise
+        self.governor.record(200, time.monotonic() - started)
+        self.health.mark(POLL)
+        return response
+
+    async def afetch(self, client, token, timestamp):
+        """Асинхронный запрос к API с учётом в регуляторе и Health."""
+        started = time.monotonic()
+        try:
+            response = await homework.arequest_homework_statuses(
+                client, {'Authorization': f'OAuth {token}'}, timestamp
+            )
+        except exceptions.RequestError as error:
+            if self.governor is not None:
+                self.governor.record(
+                    error.status_code, time.monotonic() - started
+                )
+            raise
+        if self.governor is not None:
+            self.governor.record(200, time.monotonic() - started)
+        self.health.mark(POLL)
+        return response
+
+    def add_account(self, account):
+        """
+        Создание сессии опроса аккаунта и постановка в расписание.
+
+        Первый опрос сдвинут по хешу токена, чтобы аккаунты
+        не опрашивались все в одну секунду.
+        """
+        self.sessions[account.token] = self.new_session(
+            account.token, account
+        )
+        self.scheduler.add_staggered(account.token)
+
+    def remove_account(self, token):
+        """Снятие аккаунта с опроса и удаление его состояния."""
+        self.scheduler.remove(token)
+        self.sessions.discard(token)
+        self.snapshots.forget(token)
+
+    def sync(self, force=False):
+        """
+        Применение изменений реестра без потери состояния опроса.
+
+        Если файл реестра не читается (записан наполовину, база занята),
+        опрос продолжается по прежнему набору аккаунтов, а файл будет
+        перечитан при следующей перезагрузке.
+        """
+        try:
+            diff = self.registry.refresh(force)
+        except exceptions.RegistryError as error:
+            logger.error(error)
+            return AccountDiff([], [], [])
+        for account in diff.removed:
+            self.remove_account(account.token)
+        for account in diff.added:
+            self.add_account(account)
+        for account in diff.changed:
+            self.sessions[account.token].chat_id = account.chat_id
+        if diff:
+            logger.info(
+                f'Реестр аккаунтов: +{len(diff.added)} '
+                f'-{len(diff.removed)} ~{len(diff.changed)}'
+            )
+        return diff
+
+    def broadcast(self, message, **kwargs):
+        """Сообщение во все чаты опрашиваемых аккаунтов сразу."""
+        return broadcast(
+            self.bot,
+            [account.chat_id for account in self.registry.active()],
+            message, **kwargs
+        )
+
+    def park(self, token):
+        """
+        Снятие аккаунта с отозванным токеном с опроса.
+
+        Аккаунт выключается в файле реестра, поэтому не вернётся
+        в опрос после перезапуска, пока его не включат через reenable().
+        """
+        self.scheduler.remove(token)
+        try:
+            self.registry.disable(token)
+        except KeyError:
+            pass
+        except exceptions.RegistryError as error:
+            logger.error(error)
+        self.sync(force=True)
+        logger.warning(f'Аккаунт {account_key(token)} снят с опроса')
+
+    def reenable(self, token, new_token=None):
+        """
+        Возврат запаркованного аккаунта, при new_token — с новым токеном.
+
+        Безопасно вызывать из любого потока: аккаунт встанет в опрос
+        при ближайшем перечитывании реестра.
+        """
+        account = self.registry.enable(token, new_token)
+        logger.info(f'Аккаунт {account_key(account.token)} включён')
+        return account
+
+    def after_poll(self, token, session, kind):
+        """
+        Задержка до следующего опроса по классу сбоя.
+
+        Временный сбой повторяется через RETRY_BACKOFF секунд с
+        удвоением, но не реже обычного периода; отозванный токен
+        снимается с опроса.
+        """
+        if kind == exceptions.TRANSIENT:
+            return min(
+                RETRY_BACKOFF * 2 ** (session.failures - 1),
+                self.scheduler.period
+            )
+        if kind == exceptions.PERMANENT:
+            self.park(token)
+        return None
+
+    def reload(self):
+        """Перечитывание реестра и сброс состояния на диск."""
+        self.sync()
+        self.state.flush()
+        return self.reload_period
+
+    @contextmanager
+    def polling(self, token):
+        """
+        Учёт опроса в полёте; его timestamp запоминается в state.
+
+        Сессия закреплена в памяти на время опроса: иначе в асинхронном
+        режиме её вытеснил бы опрос другого аккаунта, и следующий опрос
+        поднял бы с диска устаревшую копию.
+        """
+        with self.sessions.pinned(token) as session:
+            with self._lock:
+                self.in_flight += 1
+            try:
+                yield session
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+                if session.timestamp is not None:
+                    homework.save_timestamp(
+                        self.state, token, session.timestamp
+                    )
+
+    def poll(self, token):
+        """Опрос одного аккаунта или перечитывание реестра."""
+        if token == RELOAD:
+            return self.reload()
+        slot = getattr(self._slot, 'name', POLL)
+        with self.polling(token) as session, self.health.busy(slot):
+            if session.timestamp is None:
+                session.timestamp = homework.onboard_account(
+                    token, self.state, self.snapshots
+                )
+            kind = session.poll(functools.partial(self.fetch_measured, token))
+        return self.after_poll(token, session, kind)
+
+    async def apoll(self, token, client):
+        """
+        Асинхронный опрос аккаунта через транспорт client.
+
+        Запрос идёт в цикле событий, поэтому опросы одной пачки делят
+        соединения HTTP/2; разбор ответа и отправка в Telegram
+        выполняются в потоке, чтобы не блокировать цикл.
+        """
+        if token == RELOAD:
+            return self.reload()
+        with self.polling(token) as session:
+            if session.timestamp is None:
+                session.timestamp = await asyncio.to_thread(
+                    homework.onboard_account, token, self.state,
+                    self.snapshots
+                )
+            try:
+                response = await self.afetch(
+                    client, token, session.timestamp
+                )
+            except Exception as error:
+                failure = error
+            else:
+                failure = None
+
+            def fetch(timestamp):
+                if failure is not None:
+                    raise failure
+                return response
+
+            kind = await asyncio.to_thread(session.poll, fetch)
+        return self.after_poll(token, session, kind)
+
+    async def arun(self, client, until=None):
+        """Асинхронный опрос аккаунтов по расписанию через client."""
+        self.sync(force=True)
+        self.scheduler.add(RELOAD, self.reload_period)
+        self.health.ready = True
+        await self.scheduler.arun(
+            functools.partial(self.apoll, client=client), until,
+            self.concurrency
+        )
+
+    def run(self, until=None):
+        """Опрос аккаунтов по расписанию до остановки планировщика."""
+        self.sync(force=True)
+        self.scheduler.add(RELOAD, self.reload_period)
+        self.health.ready = True
+        self.scheduler.run(self.poll, until)
+
+    def _work(self, generation, slot):
+        def poll(token):
+            # Поток, вместо которого сторож запустил новый, выходит
+            # при первой возможности, не трогая очередь.
+            if generation != self._generation:
+                raise exceptions.WorkerReplacedError
+            self._polling[slot] = token
+            return self.poll(token)
+
+        # Зависание видно сторожу по отметке busy() своего потока.
+        self._slot.name = slot
+        if self.warm_up is not None:
+            # Сообщения отправляет этот поток, а у telebot сессия на поток.
+            self.warm_up.telegram()
+        try:
+            # Несколько потоков берут по одному опросу, чтобы наступившие
+            # аккаунты не копились в пачке одного из них.
+            batch = 1 if len(self.workers) > 1 else None
+            self.scheduler.run(poll, batch=batch)
+        except exceptions.WorkerReplacedError:
+            logger.info(f'Поток опроса {generation} заменён')
+        else:
+            self._finished.set()
+
+    def start_worker(self):
+        """
+        Запуск concurrency потоков опроса (по умолчанию одного);
+        прежние потоки перестают опрашивать. Возвращает первый поток.
+        """
+        self._generation += 1
+        count = self.concurrency or 1
+        self.workers = [
+            threading.Thread(
+                target=self._work,
+                args=(
+                    self._generation,
+                    POLL if count == 1 else f'{POLL}-{number}'
+                ),
+                name=(
+                    f'poll-{self._generation}' if count == 1
+                    else f'poll-{self._generation}-{number}'
+                ),
+                daemon=True
+            )
+            for number in range(1, count + 1)
+        ]
+        self.worker = self.workers[0]
+        for worker in self.workers:
+            worker.start()
+        return self.worker
+
+    def restart_stalled(self, name):
+        """
+        Реакция сторожа на зависший опрос: новый поток опроса, а после
+        MAX_RESTARTS перезапусков — выход процесса, чтобы платформа
+        подняла его заново.
+        """
+        self.restarts += 1
+        if self.restarts > MAX_RESTARTS:
+            logger.critical(
+                f'Опрос зависал {self.restarts} раз, выход'
+            )
+            try:
+                self.state.flush()
+            finally:
+                os._exit(EXIT_STALLED)
+        self.health.release(name)
+        logger.warning(f'Перезапуск потока опроса ({self.restarts})')
+        # Вся пачка старых потоков возвращается в очередь, а зависший
+        # аккаунт — на следующий период, чтобы не зависнуть снова сразу.
+        self.scheduler.requeue_in_flight()
+        stuck = self._polling.pop(name, None)
+        if stuck is not None:
+            self.scheduler.add(stuck, self.scheduler.period)
+        self.start_worker()
+
+    def drain(self, deadline=SHUTDOWN_DEADLINE):
+        """
+        Остановка опроса: новые опросы не начинаются, потоки опроса
+        получают до deadline секунд на начатые опросы, затем состояние
+        сбрасывается на диск.
+        """
+        self.scheduler.stop()
+        finish = time.monotonic() + deadline
+        for worker in self.workers:
+            worker.join(max(finish - time.monotonic(), 0.0))
+        if any(worker.is_alive() for worker in self.workers):
+            logger.warning(f'Поток опроса не завершился за {deadline} с')
+        self.state.flush()
+        logger.info('Опрос остановлен, состояние сохранено')
+
+    def serve(self, health_port=None, stall_timeout=STALL_TIMEOUT,
+              deadline=SHUTDOWN_DEADLINE):
+        """
+        Опрос в отдельном потоке под присмотром сторожа и, если задан
+        health_port, с HTTP-эндпоинтами /health и /ready.
+
+        SIGTERM и SIGINT останавливают опрос через drain().
+        """
+        self.sync(force=True)
+        self.scheduler.add(RELOAD, self.reload_period)
+        server = None
+        if health_port is not None:
+            server = HealthServer(
+                self.health, health_port, stall_timeout=stall_timeout,
+                max_silence=3 * self.scheduler.period
+            ).start()
+        watchdog = Watchdog(
+            self.health, self.restart_stalled, stall_timeout
+        ).start()
+        self.health.ready = True
+        shutdown = GracefulShutdown(
+            deadline, on_request=self.scheduler.stop, interrupt_idle=False
+        ).install()
+        self.start_worker()
+        try:
+            while not (self._finished.is_set() or shutdown.requested):
+                self._finished.wait(DRAIN_STEP)
+        finally:
+            shutdown.restore()
+            self.health.ready = False
+            self.drain(deadline)
+            watchdog.stop()
+            if server is not None:
+                server.stop()
+
+
+def main(argv=None):
+    """Запуск бота для всех аккаунтов из файла реестра."""
+    parser = argparse.ArgumentParser(
+        description='Опрос статусов домашних работ нескольких аккаунтов.'
+    )
+    parser.add_argument('accounts', help='реестр аккаунтов CSV/JSONL/SQLite')
+    parser.add_argument(
+        '--max-rate', type=float, default=None,
+        help='не больше стольких опросов API в секунду'
+    )
+    parser.add_argument(
+        '--adaptive-rate', type=float, default=None,
+        help='начальный общий бюджет запросов в секунду с подстройкой AIMD'
+    )
+    parser.add_argument(
+        '--health-port', type=int, default=None,
+        help='порт локального HTTP-эндпоинта /health и /ready'
+    )
+    parser.add_argument(
+        '--stall-timeout', type=float, default=STALL_TIMEOUT,
+        help='через сколько секунд опрос считается зависшим'
+    )
+    parser.add_argument(
+        '--max-hot-accounts', type=int, default=None,
+        help='держать в памяти состояние не больше стольких аккаунтов'
+    )
+    parser.add_argument(
+        '--spill-path', default=None,
+        help='файл SQLite для вытесненного состояния (по умолчанию временный)'
+    )
+    parser.add_argument(
+        '--transport', choices=sorted(ASYNC_TRANSPORTS), default=None,
+        help='асинхронный опрос через транспорт, например httpx-http2'
+    )
+    parser.add_argument(
+        '--concurrency', type=int, default=None,
+        help='число потоков опроса или, с --transport, одновременных '
+             'асинхронных опросов'
+    )
+    add_profile_arguments(parser)
+    add_shutdown_arguments(parser)
+    args = parser.parse_args(argv)
+    if not homework.TELEGRAM_TOKEN:
+        logger.critical(homework.Phrases.MISS_TELEGRAM_TOKEN)
+        raise exceptions.TokenMissError(homework.Phrases.MISS_TELEGRAM_TOKEN)
+    homework.check_message_format()
+    bot = TeleBot(token=homework.TELEGRAM_TOKEN)
+    if not os.getenv('HTTP_TRANSPORT'):
+        # homework.py опрашивает через requests.get, а боту многих
+        # аккаунтов нужен пул соединений, общий с прогревом.
+        homework.transport = make_transport(POOLED_TRANSPORT)
+    warm_up = WarmUp(bot, homework.transport, homework.ENDPOINT).start()
+    bot_runner = Runner(
+        AccountRegistry(args.accounts),
+        bot,
+        StateStore(homework.state_file_path),
+        transitions=homework.open_transition_recorder(),
+        max_rate=args.max_rate,
+        governor=(
+            RateGovernor(args.adaptive_rate, max_rate=args.max_rate or 50.0)
+            if args.adaptive_rate else None
+        ),
+        max_hot=args.max_hot_accounts,
+        spill=SpillStore(args.spill_path) if args.spill_path else None,
+        warm_up=warm_up,
+        concurrency=args.concurrency,
+    )
+    try:
+        with profiling(args.profile, args.profile_interval):
+            if args.transport is None:
+                bot_runner.serve(
+                    args.health_port, args.stall_timeout,
+                    args.shutdown_deadline
+                )
+            else:
+                asyncio.run(run_async(
+                    bot_runner, args.transport, args.shutdown_deadline
+                ))
+    finally:
+        warm_up.stop()
+
+
+async def run_async(bot_runner, transport, deadline=SHUTDOWN_DEADLINE):
+    """
+    Асинхронный опрос с закрытием соединений транспорта.
+
+    По SIGTERM и SIGINT новые опросы не начинаются, начатые получают
+    до deadline секунд, затем состояние сбрасывается на диск.
+    """
+    client = make_async_transport(transport)
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for signum in SHUTDOWN_SIGNALS:
+        loop.add_signal_handler(signum, stop.set)
+    warming = asyncio.ensure_future(warm_async(client, homework.ENDPOINT))
+    if bot_runner.warm_up is not None:
+        # Отправка идёт из потоков asyncio.to_thread: прогреваем один из них.
+        await asyncio.to_thread(bot_runner.warm_up.telegram)
+    polling = asyncio.ensure_future(bot_runner.arun(client))
+    stopping = asyncio.ensure_future(stop.wait())
+    try:
+        await asyncio.wait(
+            (polling, stopping), return_when=asyncio.FIRST_COMPLETED
+        )
+        if not polling.done():
+            bot_runner.scheduler.stop()
+            finish = loop.time() + deadline
+            while bot_runner.in_flight and loop.time() < finish:
+                await asyncio.sleep(DRAIN_STEP)
+            polling.cancel()
+            await asyncio.gather(polling, return_exceptions=True)
+    finally:
+        stopping.cancel()
+        warming.cancel()
+        for signum in SHUTDOWN_SIGNALS:
+            loop.remove_signal_handler(signum)
+        bot_runner.state.flush()
+        await client.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,311 @@
+import asyncio
+import hashlib
+import heapq
+import itertools
+import threading
+from contextlib import nullcontext
+
+from governor import RateLimiter
+from homework import RETRY_PERIOD
+
+SERVICE_CLASS = 'service'
+REVIEWING_CLASS = 'reviewing'
+DEFAULT_CLASS = 'default'
+IDLE_CLASS = 'idle'
+RESERVE_HORIZON = 1.0
+CLASS_WEIGHTS = {
+    SERVICE_CLASS: 100,
+    REVIEWING_CLASS: 6,
+    DEFAULT_CLASS: 3,
+    IDLE_CLASS: 1,
+}
+
+
+def stagger_offset(key, period):
+    """
+    Детерминированный сдвиг первого опроса внутри периода.
+
+    Сдвиг зависит только от ключа, поэтому после перезапуска
+    аккаунты распределяются по периоду так же, как раньше.
+    """
+    digest = hashlib.sha256(str(key).encode()).digest()
+    return int.from_bytes(digest[:8], 'big') / 2 ** 64 * period
+
+
+def status_class(statuses):
+    """
+    Класс опроса аккаунта по последним статусам его работ.
+
+    Работа на проверке скоро сменит статус, а аккаунт, где всё
+    принято, скорее всего не изменится.
+    """
+    statuses = set(statuses)
+    if 'reviewing' in statuses:
+        return REVIEWING_CLASS
+    if statuses == {'approved'}:
+        return IDLE_CLASS
+    return DEFAULT_CLASS
+
+
+class PollScheduler:
+    """
+    Расписание опросов аккаунтов по времени следующего запроса.
+
+    Наступившие опросы ждут разрешения limiter в очередях готовых,
+    по одной на класс classify(account). Очереди обслуживаются
+    взвешенным циклическим обходом: при нехватке бюджета каждый класс
+    получает долю опросов по своему весу и ни один не голодает.
+
+    lag — наибольшее опоздание начала опроса в текущей пачке против
+    срока по расписанию; оно растёт, пока поток опрашивает пачку.
+
+    Выбранные, но ещё не перепланированные опросы считаются в полёте;
+    очередь защищена блокировкой, так что зависший поток run() может
+    доработать, пока расписание обслуживает сменивший его поток.
+    """
+
+    def __init__(self, clock, period=RETRY_PERIOD, max_rate=None,
+                 limiter=None, classify=None, weights=None):
+        self.clock = clock
+        self.period = period
+        if limiter is None and max_rate:
+            limiter = RateLimiter(max_rate)
+        self.limiter = limiter
+        self.classify = classify or (lambda account: DEFAULT_CLASS)
+        self.weights = dict(CLASS_WEIGHTS, **(weights or {}))
+        self.lag = 0.0
+        self._batch_lag = 0.0
+        self._queue = []
+        self._ready = {}
+        self._credit = {}
+        self._entries = {}
+        self._in_flight = {}
+        self._counter = itertools.count()
+        self._stopped = False
+        self._wakeup = threading.Event()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, account):
+        return account in self._entries
+
+    def add(self, account, delay=0.0):
+        """Постановка опроса аккаунта через delay секунд."""
+        with self._lock:
+            entry = next(self._counter)
+            self._entries[account] = entry
+            heapq.heappush(
+                self._queue, (self.clock.time() + delay, entry, account)
+            )
+
+    def add_staggered(self, account):
+        """Постановка первого опроса аккаунта со сдвигом по его ключу."""
+        self.add(account, stagger_offset(account, self.period))
+
+    def remove(self, account):
+        """Снятие аккаунта с расписания."""
+        with self._lock:
+            self._entries.pop(account, None)
+            self._in_flight.pop(account, None)
+
+    def requeue_in_flight(self, delay=0.0):
+        """
+        Возврат в очередь всех опросов в полёте через delay секунд.
+
+        Нужен, когда поток run() завис: аккаунты его пачки уже сняты
+        с очереди, и без этого их больше никто не опросил бы. Когда
+        старый поток очнётся, его перепланирование будет пропущено.
+        """
+        with self._lock:
+            accounts = [
+                account for account, entry in self._in_flight.items()
+                if self._is_current(account, entry)
+            ]
+            self._in_flight.clear()
+            for account in accounts:
+                self.add(account, delay)
+        return accounts
+
+    def _is_current(self, account, entry):
+        return self._entries.get(account) == entry
+
+    def next_due(self):
+        """Время ближайшего опроса или None, если расписание пусто."""
+        with self._lock:
+            queue = self._queue
+            while queue and not self._is_current(queue[0][2], queue[0][1]):
+                heapq.heappop(queue)
+            return queue[0][0] if queue else None
+
+    def deferred(self):
+        """Количество наступивших опросов по классам, ждущих бюджета."""
+        with self._lock:
+            return {
+                name: len(queue)
+                for name, queue in self._ready.items() if queue
+            }
+
+    def _promote(self, now):
+        while True:
+            due_at = self.next_due()
+            if due_at is None or due_at > now:
+                return
+            _, entry, account = heapq.heappop(self._queue)
+            heapq.heappush(
+                self._ready.setdefault(self.classify(account), []),
+                (due_at, entry, account)
+            )
+
+    def _active_classes(self):
+        active = []
+        for name, queue in self._ready.items():
+            while queue and not self._is_current(queue[0][2], queue[0][1]):
+                heapq.heappop(queue)
+            if queue:
+                active.append(name)
+            else:
+                self._credit.pop(name, None)
+        return active
+
+    def _next_class(self, active):
+        # Плавный взвешенный циклический обход, как в nginx.
+        total = 0
+        for name in active:
+            weight = self.weights.get(name, 1)
+            self._credit[name] = self._credit.get(name, 0) + weight
+            total += weight
+        chosen = max(active, key=self._credit.get)
+        self._credit[chosen] -= total
+        return chosen
+
+    def _pop_due(self, horizon=0.0, limit=None):
+        # Без horizon limiter выдаёт одно разрешение на пачку; с ним
+        # бронируются разрешения на horizon секунд вперёд, и у каждого
+        # опроса пачки своё время начала. limit ограничивает пачку, чтобы
+        # наступившие опросы достались и другим потокам run().
+        with self._lock:
+            now = self.clock.time()
+            self._promote(now)
+            due = []
+            while len(due) != limit and (active := self._active_classes()):
+                start = now
+                if self.limiter is not None:
+                    delay = self.limiter.delay(now)
+                    if delay > horizon or due and not horizon:
+                        break
+                    start += self.limiter.reserve(now)
+                queue = self._ready[self._next_class(active)]
+                due_at, entry, account = heapq.heappop(queue)
+                due.append((account, entry, start, due_at))
+                self._in_flight[account] = entry
+            self._batch_lag = 0.0
+            return due
+
+    def _started(self, due_at):
+        # Опоздание считается в момент начала опроса, а не выдачи пачки.
+        with self._lock:
+            self._batch_lag = max(
+                self._batch_lag, self.clock.time() - due_at
+            )
+            self.lag = self._batch_lag
+
+    def _reschedule(self, account, entry, delay):
+        # Аккаунт, снятый или переназначенный во время опроса, не трогаем.
+        with self._lock:
+            if self._in_flight.get(account) == entry:
+                del self._in_flight[account]
+            if self._is_current(account, entry):
+                self.add(account, self.period if delay is None else delay)
+
+    def stop(self):
+        """Остановка run() после текущего опроса, в том числе посреди пачки."""
+        self._stopped = True
+        self._wakeup.set()
+
+    def _wait(self, until):
+        if self._stopped:
+            return None
+        with self._lock:
+            now = self.clock.time()
+            self._promote(now)
+            if self._active_classes():
+                start = now
+                if self.limiter is not None:
+                    start += self.limiter.delay(now)
+            else:
+                start = self.next_due()
+                if start is None:
+                    return None
+        if until is not None and start > until:
+            return None
+        return max(start - now, 0.0)
+
+    def run(self, poll, until=None, batch=None):
+        """
+        Опрос аккаунтов по расписанию до stop() или момента until.
+
+        После опроса аккаунт снова ставится в очередь через period
+        или через число секунд, которое вернул poll. batch ограничивает
+        число опросов, выбираемых за раз: несколько потоков run()
+        с batch=1 опрашивают наступившие аккаунты параллельно.
+        """
+        self._stopped = False
+        self._wakeup.clear()
+        while (delay := self._wait(until)) is not None:
+            self.clock.wait(self._wakeup, delay)
+            due = self._pop_due(limit=batch)
+            try:
+                while due and not self._stopped:
+                    account, entry, _, due_at = due.pop(0)
+                    self._started(due_at)
+                    delay = None
+                    try:
+                        delay = poll(account)
+                    finally:
+                        self._reschedule(account, entry, delay)
+            finally:
+                # Остаток пачки после исключения poll или stop() не теряется.
+                for account, entry, _, _ in due:
+                    self._reschedule(account, entry, 0.0)
+
+    async def arun(self, poll, until=None, concurrency=None):
+        """
+        Асинхронный run() для корутины poll и часов с asleep().
+
+        Аккаунты, подошедшие одновременно, опрашиваются конкурентно,
+        но не больше concurrency опросов сразу; при limiter пачка
+        набирается из разрешений на RESERVE_HORIZON секунд вперёд,
+        и каждый опрос начинается в своё время. Первое исключение
+        опроса пробрасывается после перепланирования всей пачки.
+        """
+        slots = (
+            asyncio.Semaphore(concurrency) if concurrency else nullcontext()
+        )
+
+        async def reserved(account, start, due_at):
+            await self.clock.asleep(max(start - self.clock.time(), 0.0))
+            async with slots:
+                self._started(due_at)
+                return await poll(account)
+
+        self._stopped = False
+        while (delay := self._wait(until)) is not None:
+            await self.clock.asleep(delay)
+            due = self._pop_due(RESERVE_HORIZON)
+            results = await asyncio.gather(
+                *(
+                    reserved(account, start, due_at)
+                    for account, _, start, due_at in due
+                ),
+                return_exceptions=True
+            )
+            errors = []
+            for (account, entry, _, _), result in zip(due, results):
+                if isinstance(result, BaseException):
+                    errors.append(result)
+                    result = None
+                self._reschedule(account, entry, result)
+            if errors:
+                raise errors[0]
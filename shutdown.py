@@ -0,0 +1,99 @@
+import logging
+import signal
+from contextlib import contextmanager
+
+SHUTDOWN_DEADLINE = 20
+SHUTDOWN_SIGNALS = (signal.SIGTERM, signal.SIGINT)
+
+logger = logging.getLogger('homework.shutdown')
+
+
+class ShutdownDeadlineError(SystemExit):
+    pass
+
+
+def add_shutdown_arguments(parser):
+    """Флаг --shutdown-deadline для точек входа."""
+    parser.add_argument(
+        '--shutdown-deadline', type=float, default=SHUTDOWN_DEADLINE,
+        help='сколько секунд ждать начатые опросы при остановке'
+    )
+
+
+class GracefulShutdown:
+    """
+    Остановка по SIGTERM/SIGINT в безопасной точке.
+
+    Сигнал только поднимает флаг requested и вызывает on_request().
+    Если в этот момент идёт работа (блок busy()), ей даётся deadline
+    секунд, после чего она прерывается ShutdownDeadlineError; если
+    процесс простаивает и interrupt_idle, сразу поднимается SystemExit.
+    Обработчики ставятся только из главного потока.
+    """
+
+    def __init__(self, deadline=SHUTDOWN_DEADLINE, on_request=None,
+                 interrupt_idle=True, signals=SHUTDOWN_SIGNALS):
+        self.deadline = deadline
+        self.on_request = on_request
+        self.interrupt_idle = interrupt_idle
+        self.signals = signals
+        self.requested = False
+        self._busy = 0
+        self._armed = False
+        self._previous = {}
+
+    def install(self):
+        """Установка обработчиков сигналов с запоминанием прежних."""
+        for signum in self.signals:
+            self._previous[signum] = signal.signal(signum, self.handle)
+        return self
+
+    def restore(self):
+        """Возврат прежних обработчиков сигналов."""
+        self._disarm()
+        for signum, handler in self._previous.items():
+            signal.signal(signum, handler)
+        self._previous = {}
+
+    def handle(self, signum, frame):
+        """Обработчик сигнала остановки."""
+        if self.requested:
+            return
+        self.requested = True
+        logger.info(f'Получен сигнал {signum}, остановка')
+        if self.on_request is not None:
+            self.on_request()
+        if self._busy:
+            self._arm()
+        elif self.interrupt_idle:
+            raise SystemExit(0)
+
+    def _arm(self):
+        self._previous[signal.SIGALRM] = signal.signal(
+            signal.SIGALRM, self._expire
+        )
+        signal.setitimer(signal.ITIMER_REAL, self.deadline)
+        self._armed = True
+
+    def _disarm(self):
+        if not self._armed:
+            return
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, self._previous.pop(signal.SIGALRM))
+        self._armed = False
+
+    def _expire(self, signum, frame):
+        raise ShutdownDeadlineError(
+            f'Работа не завершилась за {self.deadline} с'
+        )
+
+    @contextmanager
+    def busy(self):
+        """Работа, которую сигнал не прерывает до истечения deadline."""
+        self._busy += 1
+        try:
+            yield
+        finally:
+            self._busy -= 1
+            if not self._busy:
+                self._disarm()
@@ -0,0 +1,51 @@
+import threading
+
+
+class _Call:
+    """Выполняемый вызов, результат которого ждут остальные."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Объединение конкурентных вызовов с одинаковым ключом в один."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func, *args, **kwargs):
+        """
+        Вызов func один раз на ключ среди конкурентных вызывающих.
+
+        Все, кто пришёл во время выполнения, получают тот же результат
+        или то же исключение.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = func(*args, **kwargs)
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self):
+        """Количество выполняемых сейчас вызовов."""
+        with self._lock:
+            return len(self._calls)
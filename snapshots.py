@@ -0,0 +1,140 @@
+import threading
+import time
+
+from singleflight import SingleFlight
+from tiered import TieredCache
+
+SNAPSHOT_TTL = 600
+
+
+class Snapshot:
+    """Снимок последних статусов домашних работ одного аккаунта."""
+
+    __slots__ = ('statuses', 'current_date', 'fetched_at', 'full')
+
+    def __init__(self, current_date, fetched_at, full=False):
+        self.statuses = {}
+        self.current_date = current_date
+        self.fetched_at = fetched_at
+        self.full = full
+
+    def age(self, now):
+        """Возраст снимка в секундах."""
+        return now - self.fetched_at
+
+    def dump(self):
+        """Снимок в виде словаря для вытеснения на диск."""
+        return {
+            'statuses': self.statuses,
+            'current_date': self.current_date,
+            'fetched_at': self.fetched_at,
+            'full': self.full,
+        }
+
+    @classmethod
+    def load(cls, account, data):
+        """Снимок из словаря, записанного dump()."""
+        snapshot = cls(data['current_date'], data['fetched_at'], data['full'])
+        snapshot.statuses = data['statuses']
+        return snapshot
+
+
+class SnapshotCache:
+    """
+    Кэш статусов домашних работ по аккаунтам с TTL.
+
+    При max_hot в памяти держатся снимки только недавно опрошенных
+    аккаунтов, остальные вытесняются в spill.
+    """
+
+    def __init__(self, ttl=SNAPSHOT_TTL, clock=time.monotonic, max_hot=None,
+                 spill=None):
+        self.ttl = ttl
+        self._clock = clock
+        self._snapshots = TieredCache(
+            max_hot, spill, Snapshot.dump, Snapshot.load, 'snapshot'
+        )
+        self._loads = SingleFlight()
+        self._lock = threading.Lock()
+
+    def update(self, account, response, full=False):
+        """Обновление снимка аккаунта по проверенному ответу API."""
+        now = self._clock()
+        with self._lock:
+            snapshot = self._snapshots.get(account)
+            if snapshot is None or full:
+                snapshot = Snapshot(response['current_date'], now, full)
+                self._snapshots[account] = snapshot
+            snapshot.current_date = response['current_date']
+            snapshot.fetched_at = now
+            for homework in response['homeworks']:
+                self._record(snapshot, homework)
+        return snapshot
+
+    def record(self, account, homework):
+        """Добавление в снимок одной домашней работы."""
+        with self._lock:
+            snapshot = self._snapshots.get(account)
+            if snapshot is None:
+                snapshot = Snapshot(None, self._clock())
+                self._snapshots[account] = snapshot
+            self._record(snapshot, homework)
+
+    def complete(self, account, current_date):
+        """Отметка снимка полным после загрузки всей истории."""
+        with self._lock:
+            snapshot = self._snapshots.get(account)
+            if snapshot is None:
+                snapshot = self._snapshots[account] = Snapshot(None, 0)
+            snapshot.current_date = current_date
+            snapshot.fetched_at = self._clock()
+            snapshot.full = True
+
+    @staticmethod
+    def _record(snapshot, homework):
+        name = homework.get('homework_name')
+        if name:
+            snapshot.statuses[name] = homework.get('status')
+
+    def peek(self, account):
+        """Снимок аккаунта без проверки свежести."""
+        with self._lock:
+            return self._snapshots.get(account)
+
+    def is_fresh(self, snapshot):
+        """Проверка, что снимок полный и не старше TTL."""
+        return (
+            snapshot is not None
+            and snapshot.full
+            and snapshot.age(self._clock()) < self.ttl
+        )
+
+    def get(self, account, loader):
+        """
+        Свежий снимок аккаунта; при устаревании загружается через loader.
+
+        Конкурентные запросы одного аккаунта ждут единственную загрузку.
+        """
+        snapshot = self.peek(account)
+        if self.is_fresh(snapshot):
+            return snapshot
+        return self._loads.do(account, self._load, account, loader)
+
+    def statuses(self, account, loader):
+        """
+        Копия статусов свежего снимка аккаунта.
+
+        Поток опроса меняет снимок под блокировкой, поэтому читать
+        его словарь статусов снаружи можно только через копию.
+        """
+        snapshot = self.get(account, loader)
+        with self._lock:
+            return dict(snapshot.statuses)
+
+    def _load(self, account, loader):
+        return self.update(account, loader(), full=True)
+
+    def forget(self, account):
+        """Удаление снимка аккаунта из кэша."""
+        with self._lock:
+            self._snapshots.discard(account)
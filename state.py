@@ -0,0 +1,57 @@
+import hashlib
+import json
+import os
+import threading
+
+
+def account_key(token):
+    """Ключ аккаунта в локальном состоянии без хранения самого токена."""
+    return hashlib.sha256(token.encode()).hexdigest()[:16]
+
+
+class StateStore:
+    """Локальное состояние аккаунтов в JSON-файле."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._data = self._read()
+
+    def _read(self):
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+
+    def get(self, account, key, default=None):
+        """Значение состояния аккаунта."""
+        with self._lock:
+            return self._data.get(account, {}).get(key, default)
+
+    def set(self, account, key, value):
+        """Изменение состояния аккаунта до следующего flush()."""
+        with self._lock:
+            self._data.setdefault(account, {})[key] = value
+            self._dirty = True
+
+    def discard(self, account, key=None):
+        """Удаление ключа или всего состояния аккаунта."""
+        with self._lock:
+            if key is None:
+                self._dirty |= self._data.pop(account, None) is not None
+                return
+            values = self._data.get(account, {})
+            self._dirty |= values.pop(key, None) is not None
+
+    def flush(self):
+        """Атомарная запись изменённого состояния на диск."""
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp_path = f'{self.path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(self._data, file, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
@@ -1,6 +1,7 @@
 import os
 import sys
 
+import pytest
 import pytest_timeout
 
 root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -53,3 +54,41 @@ pytest_timeout.write = write_timeout_reasons
 os.environ['PRACTICUM_TOKEN'] = 'sometoken'
 os.environ['TELEGRAM_TOKEN'] = '1234:abcdefg'
 os.environ['TELEGRAM_CHAT_ID'] = '12345'
+
+
+@pytest.fixture(autouse=True)
+def isolated_state(tmp_path, monkeypatch):
+    """Файл состояния бота во временном каталоге теста."""
+    import homework
+
+    monkeypatch.setattr(
+        homework, 'state_file_path', str(tmp_path / 'state.json')
+    )
+
+
+class IdleWarmUp:
+    """Прогрев без сети и без подмены socket.getaddrinfo."""
+
+    def __init__(self, *args, **kwargs):
+        self.started = False
+        self.stopped = False
+
+    def start(self):
+        self.started = True
+        return self
+
+    def telegram(self):
+        pass
+
+    def stop(self):
+        self.stopped = True
+
+
+@pytest.fixture(autouse=True)
+def idle_warm_up(monkeypatch):
+    """Точки входа в тестах не ходят в DNS и Telegram при прогреве."""
+    import homework
+    import runner
+
+    monkeypatch.setattr(homework, 'WarmUp', IdleWarmUp)
+    monkeypatch.setattr(runner, 'WarmUp', IdleWarmUp)
@@ -0,0 +1,96 @@
+import os
+
+import pytest
+
+import accounts
+import exceptions
+
+ACCOUNTS = [
+    accounts.Account('token-1', '101'),
+    accounts.Account('token-2', '102', enabled=False),
+]
+
+
+class TestAccountFiles:
+    @pytest.mark.parametrize('name', ['a.csv', 'a.jsonl', 'a.sqlite'])
+    def test_save_and_load(self, tmp_path, name):
+        path = str(tmp_path / name)
+        accounts.save_accounts(path, ACCOUNTS)
+        assert list(accounts.load_accounts(path).values()) == ACCOUNTS, (
+            'Реестр должен читаться в том же виде, в каком записан.'
+        )
+
+    def test_missing_file_is_empty(self, tmp_path):
+        assert accounts.load_accounts(str(tmp_path / 'none.csv')) == {}
+
+    @pytest.mark.parametrize('name, content', [
+        ('accounts.csv', 'token,chat_id\nt2'),
+        ('accounts.jsonl', '{"token": "t1", "chat_id": 1}\n{"tok'),
+        ('accounts.sqlite', 'not a database'),
+    ])
+    def test_broken_file_raises_registry_error(self, tmp_path, name, content):
+        path = str(tmp_path / name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        with pytest.raises(exceptions.RegistryError):
+            accounts.load_accounts(path)
+
+    def test_convert_cli(self, tmp_path):
+        source = str(tmp_path / 'a.csv')
+        target = str(tmp_path / 'a.db')
+        accounts.save_accounts(source, ACCOUNTS)
+        accounts.main([source, target])
+        assert accounts.load_accounts(target) == accounts.load_accounts(
+            source
+        )
+
+    @pytest.mark.parametrize('name', ['a.csv', 'a.sqlite'])
+    def test_update_account_keeps_order(self, tmp_path, name):
+        path = str(tmp_path / name)
+        accounts.save_accounts(path, ACCOUNTS)
+        accounts.update_account(path, 'token-1', token='token-3')
+        assert list(accounts.load_accounts(path)) == ['token-3', 'token-2']
+        with pytest.raises(KeyError):
+            accounts.update_account(path, 'token-1', enabled=False)
+
+
+class TestAccountRegistry:
+    def test_refresh_diff(self, tmp_path):
+        path = str(tmp_path / 'a.csv')
+        accounts.save_accounts(path, ACCOUNTS)
+        registry = accounts.AccountRegistry(path)
+        diff = registry.refresh()
+        assert diff.added == [ACCOUNTS[0]]
+        assert not registry.refresh(), (
+            'Без изменений файла реестр не должен перечитываться.'
+        )
+
+        accounts.save_accounts(path, [
+            accounts.Account('token-1', '201'),
+            accounts.Account('token-2', '102'),
+        ])
+        os.utime(path, ns=(1, 1))
+        diff = registry.refresh()
+        assert diff.added == [accounts.Account('token-2', '102')]
+        assert diff.changed == [accounts.Account('token-1', '201')]
+        assert diff.removed == []
+
+        accounts.save_accounts(path, [])
+        os.utime(path, ns=(2, 2))
+        diff = registry.refresh()
+        assert {account.token for account in diff.removed} == {
+            'token-1', 'token-2'
+        }
+
+    def test_disable_and_enable_with_new_token(self, tmp_path):
+        path = str(tmp_path / 'a.jsonl')
+        accounts.save_accounts(path, ACCOUNTS)
+        registry = accounts.AccountRegistry(path)
+        registry.refresh()
+        registry.disable('token-1')
+        assert [a.token for a in registry.refresh(force=True).removed] == [
+            'token-1'
+        ]
+        registry.enable('token-1', new_token='token-9')
+        diff = registry.refresh(force=True)
+        assert diff.added == [accounts.Account('token-9', '101')]
@@ -0,0 +1,66 @@
+import pytest
+
+import eventlog
+
+np = pytest.importorskip('numpy')
+analytics = pytest.importorskip('analytics')
+
+HOUR = 60 * 60
+MONDAY = 1617580800  # 2021-04-05
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    path = str(tmp_path / 'events.bin')
+    with eventlog.EventLog(path) as log:
+        for number, hours in enumerate((1, 2, 3, 4)):
+            start = MONDAY + number * HOUR
+            log.append(
+                'acc', number, None, 'reviewing', start, 'Спринт 1', start
+            )
+            log.append(
+                'acc', number, 'reviewing', 'approved', start,
+                'Спринт 1', start + hours * HOUR
+            )
+        log.append('acc', 9, None, 'reviewing', MONDAY, 'Спринт 2', MONDAY)
+        log.append(
+            'acc', 9, 'reviewing', 'rejected', MONDAY, 'Спринт 2',
+            MONDAY + 8 * 24 * HOUR
+        )
+    return path
+
+
+class TestAnalytics:
+    def test_review_durations(self, log_path):
+        strings = eventlog.StringTable(f'{log_path}.strings').strings
+        durations = analytics.review_durations(
+            analytics.load_columns(log_path), strings
+        )
+        assert sorted(durations['duration'].tolist()) == [
+            HOUR, 2 * HOUR, 3 * HOUR, 4 * HOUR, 8 * 24 * HOUR
+        ], 'Длительность проверки считается от reviewing до вердикта.'
+
+    def test_group_percentiles_match_numpy(self):
+        keys = np.array([1, 0, 1, 0, 1, 1])
+        values = np.array([5, 3, 1, 7, 2, 9])
+        groups, counts, table = analytics.group_percentiles(
+            keys, values, (50, 90)
+        )
+        assert groups.tolist() == [0, 1]
+        assert counts.tolist() == [2, 4]
+        for group, row in zip(groups, table):
+            expected = np.percentile(values[keys == group], (50, 90))
+            assert np.allclose(row, expected)
+
+    def test_report_by_lesson(self, log_path):
+        report = analytics.build_report(log_path, 'lesson', (50,))
+        assert report == [
+            ('Спринт 1', 4, [2.5 * HOUR]),
+            ('Спринт 2', 1, [8 * 24 * HOUR]),
+        ]
+
+    def test_report_by_week(self, log_path):
+        report = analytics.build_report(log_path, 'week', (50,))
+        assert [row[:2] for row in report] == [
+            ('2021-04-05', 4), ('2021-04-12', 1)
+        ], 'Недели должны начинаться с понедельника.'
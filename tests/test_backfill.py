@@ -0,0 +1,91 @@
+import pytest
+
+import backfill
+import homework
+from snapshots import SnapshotCache
+from state import StateStore, account_key
+
+HOMEWORKS = [
+    {'id': number, 'homework_name': f'hw{number}.zip', 'status': 'approved'}
+    for number in range(10)
+]
+
+
+def fetch(token, from_date):
+    yield from HOMEWORKS
+    return 1000198000
+
+
+@pytest.fixture
+def state(tmp_path):
+    return StateStore(tmp_path / 'state.json')
+
+
+class TestBackfill:
+    def test_yields_full_history(self, state):
+        result = []
+        generator = backfill.iter_backfill('token', state, fetch)
+        with pytest.raises(StopIteration) as stop:
+            while True:
+                result.append(next(generator))
+        assert result == HOMEWORKS
+        assert stop.value.value == 1000198000, (
+            'Генератор должен возвращать current_date ответа API.'
+        )
+        assert state.get(account_key('token'), 'backfill')['complete']
+
+    def test_interrupted_backfill_resumes(self, state, tmp_path):
+        generator = backfill.iter_backfill(
+            'token', state, fetch, checkpoint_every=3
+        )
+        first = [next(generator) for _ in range(4)]
+        generator.close()
+
+        resumed = StateStore(tmp_path / 'state.json')
+        rest = list(backfill.iter_backfill('token', resumed, fetch))
+        assert first[:3] + rest == HOMEWORKS, (
+            'Прерванная загрузка должна продолжаться с контрольной точки.'
+        )
+
+    def test_completed_backfill_not_repeated(self, state):
+        list(backfill.iter_backfill('token', state, fetch))
+        assert list(backfill.iter_backfill('token', state, fetch)) == []
+
+    def test_homeworks_without_id(self, state):
+        homeworks = [
+            {'homework_name': f'hw{number}.zip', 'status': 'approved'}
+            for number in range(3)
+        ]
+
+        def fetch_without_id(token, from_date):
+            yield from homeworks
+            return 1000198000
+
+        result = list(
+            backfill.iter_backfill('token', state, fetch_without_id)
+        )
+        assert result == homeworks, (
+            'Работы без id различаются по homework_name.'
+        )
+
+
+class TestOnboarding:
+    def test_resumed_backfill_not_full(self, state, monkeypatch):
+        monkeypatch.setattr(homework, 'iter_account_homeworks', fetch)
+        state.set(account_key('token'), backfill.CHECKPOINT_KEY, {
+            'from_date': 0, 'seen': [0, 1]
+        })
+        snapshots = SnapshotCache()
+        homework.onboard_account('token', state, snapshots)
+        snapshot = snapshots.peek('token')
+        assert 'hw0.zip' not in snapshot.statuses
+        assert not snapshot.full, (
+            'Снимок без работ из контрольной точки не должен быть полным.'
+        )
+
+    def test_fresh_backfill_full(self, state, monkeypatch):
+        monkeypatch.setattr(homework, 'iter_account_homeworks', fetch)
+        snapshots = SnapshotCache()
+        homework.onboard_account('token', state, snapshots)
+        snapshot = snapshots.peek('token')
+        assert snapshot.full and len(snapshot.statuses) == len(HOMEWORKS)
@@ -0,0 +1,107 @@
+import json
+
+import pytest
+
+import homework
+from bodycache import BodyCache, find_current_date
+
+
+def body(homeworks, current_date):
+    return json.dumps(
+        {'homeworks': homeworks, 'current_date': current_date},
+        ensure_ascii=False,
+    ).encode()
+
+
+class TestFindCurrentDate:
+    def test_value_and_position(self):
+        raw = b'{"homeworks": [], "current_date": 1700000000}'
+        start, end, value = find_current_date(raw)
+        assert value == 1700000000
+        assert raw[start:end] == b'1700000000'
+
+    def test_escaped_key_in_comment_ignored(self):
+        raw = body([{'reviewer_comment': '"current_date": 5}'}], 7)
+        assert find_current_date(raw)[2] == 7
+        raw = json.dumps({
+            'current_date': 7,
+            'homeworks': [{'reviewer_comment': '"current_date": 5}'}],
+        }).encode()
+        assert find_current_date(raw)[2] == 7
+
+    @pytest.mark.parametrize('raw', [
+        b'{"homeworks": []}', b'{"homeworks": [], "current_date": 1.5}',
+    ])
+    def test_missing_or_not_int(self, raw):
+        assert find_current_date(raw) is None
+
+
+class TestBodyCache:
+    def test_empty_homeworks_without_decode(self):
+        cache = BodyCache()
+        response = cache.parse('a', b'{"homeworks":[],"current_date":5}', None)
+        assert response == {'homeworks': [], 'current_date': 5}
+        assert cache.decodes == 0
+
+    def test_same_body_with_new_date_not_decoded(
+        self, data_with_new_hw_status
+    ):
+        cache = BodyCache()
+        homeworks = data_with_new_hw_status['homeworks']
+        first = body(homeworks, 100)
+        first_response = cache.parse('a', first, lambda: json.loads(first))
+        second = cache.parse('a', body(homeworks, 200), pytest.fail)
+        assert second == {'homeworks': homeworks, 'current_date': 200}
+        assert second['homeworks'] is first_response['homeworks']
+        assert (cache.decodes, cache.hits) == (1, 1)
+
+    def test_changed_body_decoded(self, data_with_new_hw_status):
+        cache = BodyCache()
+        homeworks = data_with_new_hw_status['homeworks']
+        first = body(homeworks, 100)
+        cache.parse('a', first, lambda: json.loads(first))
+        changed = body(homeworks + [{'id': 99}], 100)
+        response = cache.parse('a', changed, lambda: json.loads(changed))
+        assert response['homeworks'][-1] == {'id': 99}
+        other = cache.parse('b', first, lambda: json.loads(first))
+        assert other['current_date'] == 100
+        assert cache.decodes == 3, 'Кэш ведётся отдельно по аккаунтам.'
+
+    def test_size_bounded(self):
+        cache = BodyCache(size=2)
+        for key in 'abc':
+            raw = body([{'id': 1}], 1)
+            cache.parse(key, raw, lambda: json.loads(raw))
+        assert len(cache._last) == 2
+
+
+class MockBodyResponse:
+    status_code = 200
+
+    def __init__(self, content):
+        self.content = content
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class TestRequestFastPath:
+    def test_request_uses_raw_body(self, monkeypatch):
+        monkeypatch.setattr(homework, 'response_bodies', BodyCache())
+        monkeypatch.setattr(
+            homework.requests, 'get',
+            lambda *args, **kwargs: MockBodyResponse(
+                b'{"homeworks": [], "current_date": 42}'
+            )
+        )
+        response = homework.request_homework_statuses({}, 0)
+        assert response == {'homeworks': [], 'current_date': 42}
+        assert homework.response_bodies.hits == 1
+
+    def test_broken_body_still_raises(self, monkeypatch):
+        monkeypatch.setattr(
+            homework.requests, 'get',
+            lambda *args, **kwargs: MockBodyResponse(b'{"current_date": 4}x')
+        )
+        with pytest.raises(homework.exceptions.JsonDecodeError):
+            homework.request_homework_statuses({}, 0)
@@ -0,0 +1,80 @@
+import threading
+
+import requests
+import telebot
+
+import broadcast
+
+
+class RecordingBot:
+    def __init__(self, failing=(), limited=()):
+        self.sent = []
+        self.failing = set(failing)
+        self.limited = set(limited)
+        self._lock = threading.Lock()
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        if chat_id in self.failing:
+            raise telebot.apihelper.ApiTelegramException(
+                'sendMessage', None,
+                {'error_code': 403, 'description': 'bot was blocked'}
+            )
+        with self._lock:
+            if chat_id in self.limited:
+                self.limited.discard(chat_id)
+                raise telebot.apihelper.ApiTelegramException(
+                    'sendMessage', None,
+                    {'error_code': 429, 'description': 'Too Many Requests',
+                     'parameters': {'retry_after': 3}}
+                )
+            self.sent.append(chat_id)
+
+
+class TestBroadcast:
+    def test_deduplicated_fan_out_with_failures(self):
+        bot = RecordingBot(failing={'3'})
+        progress = []
+        result = broadcast.broadcast(
+            bot, [1, 2, '2', 3, 4, 1], 'Практикум недоступен',
+            rate=1000, progress=lambda result: progress.append(result.done),
+        )
+        assert sorted(bot.sent) == ['1', '2', '4'], (
+            'Каждый чат должен получить сообщение ровно один раз.'
+        )
+        assert result.total == 4
+        assert result.sent == 3
+        assert list(result.failed) == ['3']
+        assert sorted(progress) == [1, 2, 3, 4]
+
+    def test_network_error_recorded_as_failure(self):
+        class FlakyBot(RecordingBot):
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                if chat_id == '2':
+                    raise requests.ConnectionError('connection reset')
+                super().send_message(chat_id=chat_id, text=text, **kwargs)
+
+        bot = FlakyBot()
+        result = broadcast.broadcast(bot, ['1', '2', '3'], 'text', rate=1000)
+        assert sorted(bot.sent) == ['1', '3'], (
+            'Сетевая ошибка одного чата не должна прерывать рассылку.'
+        )
+        assert list(result.failed) == ['2']
+
+    def test_retry_after_respected(self):
+        bot = RecordingBot(limited={'1'})
+        pauses = []
+        result = broadcast.broadcast(
+            bot, ['1'], 'text', rate=1000, sleep=pauses.append
+        )
+        assert result.sent == 1
+        assert 3 in pauses, 'Ответ 429 должен выдерживать retry_after.'
+
+    def test_rate_limit_spacing(self):
+        pauses = []
+        broadcast.broadcast(
+            RecordingBot(), range(10), 'text', workers=1, rate=10,
+            sleep=pauses.append
+        )
+        assert sum(pauses) > 0.5, (
+            'Рассылка не должна превышать заданный темп сообщений.'
+        )
@@ -0,0 +1,38 @@
+import asyncio
+import threading
+
+import clock
+
+
+class TestClock:
+    def test_simulated_sleep_advances_time(self):
+        simulated = clock.SimulatedClock(start=100)
+        simulated.sleep(600)
+        simulated.sleep(-5)
+        assert simulated.time() == 700, (
+            'Виртуальный sleep должен только сдвигать время.'
+        )
+
+    def test_simulated_wait(self):
+        simulated = clock.SimulatedClock()
+        event = threading.Event()
+        simulated.wait(event, 600)
+        event.set()
+        simulated.wait(event, 600)
+        assert simulated.time() == 600, (
+            'Установленное событие прерывает ожидание.'
+        )
+
+    def test_simulated_asleep(self):
+        simulated = clock.SimulatedClock()
+        asyncio.run(simulated.asleep(3600))
+        assert simulated.time() == 3600
+
+    def test_asyncio_clock_uses_loop_time(self):
+        async def check():
+            loop_clock = clock.AsyncioClock()
+            before = loop_clock.time()
+            await loop_clock.asleep(0.01)
+            return loop_clock.time() - before
+
+        assert asyncio.run(check()) >= 0.01
@@ -0,0 +1,86 @@
+import pytest
+
+import eventlog
+import exceptions
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    return str(tmp_path / 'events.bin')
+
+
+class TestEventLog:
+    def test_replay_restores_events(self, log_path):
+        with eventlog.EventLog(log_path) as log:
+            log.append('acc', 1, None, 'reviewing', 100)
+            log.append('acc', 1, 'reviewing', 'approved', 200)
+        assert list(eventlog.replay(log_path)) == [
+            eventlog.Event('acc', '1', None, 'reviewing', 100, None, 100),
+            eventlog.Event(
+                'acc', '1', 'reviewing', 'approved', 200, None, 200
+            ),
+        ], 'Журнал должен воспроизводить записанные переходы по порядку.'
+
+    def test_records_fixed_width_and_strings_interned(self, log_path):
+        with eventlog.EventLog(log_path) as log:
+            for current_date in range(50):
+                log.append(
+                    'acc', 1, 'reviewing', 'approved', current_date, 'lesson'
+                )
+        with open(f'{log_path}.strings', encoding='utf-8') as file:
+            assert len(file.readlines()) == 5
+        records = list(eventlog.iter_records(log_path))
+        assert len(records) == 50
+
+    def test_reopen_appends(self, log_path):
+        with eventlog.EventLog(log_path) as log:
+            log.append('acc', 1, None, 'reviewing', 100)
+        with eventlog.EventLog(log_path) as log:
+            log.append('acc', 2, None, 'reviewing', 101)
+        assert len(list(eventlog.replay(log_path))) == 2
+
+    def test_torn_record_skipped(self, log_path):
+        with eventlog.EventLog(log_path) as log:
+            log.append('acc', 1, None, 'reviewing', 100)
+        with open(log_path, 'ab') as file:
+            file.write(b'\x01\x02\x03')
+        assert len(list(eventlog.replay(log_path))) == 1
+
+    def test_other_version_rejected(self, log_path):
+        with open(log_path, 'wb') as file:
+            file.write(eventlog.HEADER.pack(
+                eventlog.MAGIC, eventlog.VERSION + 1, eventlog.RECORD.size
+            ))
+        with pytest.raises(exceptions.EventLogError):
+            list(eventlog.replay(log_path))
+        with pytest.raises(exceptions.EventLogError):
+            eventlog.EventLog(log_path)
+
+    def test_date_updated_parsed(self):
+        assert eventlog.parse_date('2021-04-11T10:31:09Z') == 1618137069
+        assert eventlog.parse_date(None) is None
+
+    def test_foreign_file_rejected(self, log_path):
+        with open(log_path, 'wb') as file:
+            file.write(b'NOTALOG!')
+        with pytest.raises(exceptions.EventLogError):
+            eventlog.EventLog(log_path)
+
+
+class TestTransitionRecorder:
+    def test_only_changes_recorded_and_restored(self, log_path):
+        homework = {'id': 7, 'homework_name': 'hw.zip', 'status': 'reviewing'}
+        with eventlog.EventLog(log_path) as log:
+            recorder = eventlog.TransitionRecorder(log)
+            assert recorder.observe('acc', homework, 100)
+            assert not recorder.observe('acc', homework, 101), (
+                'Повторный статус не должен записываться как переход.'
+            )
+        with eventlog.EventLog(log_path) as log:
+            recorder = eventlog.TransitionRecorder(log)
+            assert not recorder.observe('acc', homework, 102), (
+                'Состояние дедупликации должно восстанавливаться из журнала.'
+            )
+            assert recorder.observe(
+                'acc', dict(homework, status='approved'), 103
+            )
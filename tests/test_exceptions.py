@@ -0,0 +1,92 @@
+import pytest
+
+import exceptions
+import homework
+import runner
+from snapshots import SnapshotCache
+from tests.test_runner import FakeBot
+
+
+class TestClassify:
+    @pytest.mark.parametrize('error, kind', [
+        (exceptions.RequestError('timeout'), exceptions.TRANSIENT),
+        (exceptions.RequestError('', 503), exceptions.TRANSIENT),
+        (exceptions.RequestError('', 429), exceptions.TRANSIENT),
+        (exceptions.RequestError('', 401), exceptions.PERMANENT),
+        (exceptions.RequestError('', 403), exceptions.PERMANENT),
+        (exceptions.RequestError('', 404), exceptions.UNKNOWN),
+        (exceptions.JsonDecodeError('truncated'), exceptions.TRANSIENT),
+        (exceptions.CurrentDateKeyError(''), exceptions.TRANSIENT),
+        (exceptions.UnknownStatusError(''), exceptions.QUARANTINE),
+        (KeyError('homework_name'), exceptions.UNKNOWN),
+    ])
+    def test_classify(self, error, kind):
+        assert exceptions.classify(error) == kind
+
+    def test_unknown_status_is_value_error(self):
+        with pytest.raises(ValueError):
+            homework.parse_status({'homework_name': 'hw', 'status': 'new'})
+
+
+def make_session():
+    return homework.PollSession(
+        FakeBot(), 'token', 0, SnapshotCache(), chat_id='1'
+    )
+
+
+def failing(status_code):
+    def fetch(timestamp):
+        raise exceptions.RequestError('', status_code)
+    return fetch
+
+
+class TestPollSessionFailures:
+    def test_revoked_token_parked_and_alerted_once(self):
+        session = make_session()
+        assert session.poll(failing(401)) == exceptions.PERMANENT
+        assert session.poll(pytest.fail) == exceptions.PERMANENT, (
+            'Запаркованный аккаунт не должен запрашивать API.'
+        )
+        assert len(session.bot.sent) == 1
+
+    def test_same_transient_error_alerted_once(self):
+        session = make_session()
+        for _ in range(3):
+            assert session.poll(failing(502)) == exceptions.TRANSIENT
+        assert session.failures == 3
+        assert len(session.bot.sent) == 1
+        session.poll(lambda timestamp: {'homeworks': [], 'current_date': 1})
+        assert session.failures == 0
+
+    def test_unknown_status_quarantined(self):
+        session = make_session()
+        response = {
+            'homeworks': [{'id': 1, 'homework_name': 'hw', 'status': 'new'}],
+            'current_date': 5,
+        }
+        for _ in range(2):
+            assert session.poll(lambda timestamp: response) == (
+                exceptions.QUARANTINE
+            )
+        assert session.timestamp == 5, (
+            'Опрос продолжается после работы с неизвестным статусом.'
+        )
+        assert len(session.bot.sent) == 1
+
+
+class TestRunnerRetryClasses:
+    def test_transient_backoff(self):
+        bot_runner = runner.Runner(None, FakeBot(), None, period=600)
+        session = make_session()
+        session.failures = 1
+        assert bot_runner.after_poll('t', session, exceptions.TRANSIENT) == (
+            runner.RETRY_BACKOFF
+        )
+        session.failures = 3
+        assert bot_runner.after_poll('t', session, exceptions.TRANSIENT) == (
+            4 * runner.RETRY_BACKOFF
+        )
+        session.failures = 10
+        assert bot_runner.after_poll(
+            't', session, exceptions.TRANSIENT
+        ) == 600
@@ -0,0 +1,47 @@
+import pytest
+
+import governor
+
+
+class TestRateLimiter:
+    def test_permits_spaced_by_rate(self):
+        limiter = governor.RateLimiter(rate=4)
+        assert limiter.delay(0) == 0
+        limiter.take(0)
+        assert limiter.delay(0) == pytest.approx(0.25)
+        assert limiter.delay(0.25) == 0
+
+    def test_reserve_queues_concurrent_callers(self):
+        limiter = governor.RateLimiter(rate=2)
+        assert [limiter.reserve(0) for _ in range(3)] == [0, 0.5, 1.0]
+
+
+class TestRateGovernor:
+    @pytest.mark.parametrize('status_code', [429, 500, 503])
+    def test_overload_halves_rate(self, status_code):
+        rate_governor = governor.RateGovernor(rate=8)
+        rate_governor.record(status_code, 0.1)
+        assert rate_governor.rate == 4, (
+            '429 и 5xx должны уменьшать бюджет мультипликативно.'
+        )
+
+    def test_slow_response_decreases_rate(self):
+        rate_governor = governor.RateGovernor(rate=8, latency_target=1)
+        rate_governor.record(200, 5)
+        assert rate_governor.rate == 4
+
+    def test_success_increases_additively_within_bounds(self):
+        rate_governor = governor.RateGovernor(
+            rate=1, max_rate=2, increase=0.5
+        )
+        rate_governor.record(200, 0.1)
+        assert rate_governor.rate == 1.5
+        for _ in range(10):
+            rate_governor.record(200, 0.1)
+        assert rate_governor.rate == 2
+
+    def test_rate_not_below_minimum(self):
+        rate_governor = governor.RateGovernor(rate=1, min_rate=0.5)
+        for _ in range(5):
+            rate_governor.record(429, 0.1)
+        assert rate_governor.rate == 0.5
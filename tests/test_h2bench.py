@@ -0,0 +1,19 @@
+import pytest
+
+import h2bench
+
+
+class TestStandIn:
+    def test_http2_multiplexes_accounts(self):
+        pytest.importorskip('hypercorn')
+        pytest.importorskip('h2')
+        standin = h2bench.StandIn(latency=0.01).start()
+        try:
+            http1 = h2bench.run_benchmark(standin, 'httpx', 20)
+            http2 = h2bench.run_benchmark(standin, 'httpx-h2c', 20)
+        finally:
+            standin.stop()
+        assert http1['connections'] == 20
+        assert http2['connections'] == 1, (
+            'Опросы по HTTP/2 должны идти потоками одного соединения.'
+        )
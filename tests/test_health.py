@@ -0,0 +1,237 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+import accounts
+import health
+import homework
+import runner
+from clock import SimulatedClock
+from state import StateStore
+from tests.test_runner import FakeBot
+
+
+def get(server, path):
+    url = f'http://127.0.0.1:{server.port}{path}'
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as error:
+        return error.code, None
+
+
+class TestHealth:
+    def test_marks_and_stalled_work(self):
+        fake = SimulatedClock()
+        state = health.Health(clock=fake.time)
+        state.gauge('scheduled', lambda: 7)
+        state.mark(health.POLL)
+        fake.now = 10
+        with state.busy(health.POLL):
+            fake.now = 50
+            assert state.stalled(30) == [health.POLL]
+            assert not state.is_healthy(30)
+        assert state.stalled(30) == []
+        report = state.report(30)
+        assert report['since_last_poll'] == 50
+        assert report['since_last_send'] is None
+        assert report['scheduled'] == 7
+
+    def test_released_work_not_cleared_by_old_owner(self):
+        fake = SimulatedClock()
+        state = health.Health(clock=fake.time)
+        with state.busy(health.POLL):
+            state.release(health.POLL)
+            with state.busy(health.POLL):
+                pass
+            fake.now = 100
+            assert state.stalled(30) == []
+
+    def test_silence_makes_unhealthy(self):
+        fake = SimulatedClock()
+        state = health.Health(clock=fake.time)
+        fake.now = 100
+        assert state.is_healthy(30, max_silence=200)
+        fake.now = 300
+        assert not state.is_healthy(30, max_silence=200), (
+            'Процесс без успешных опросов дольше max_silence болен.'
+        )
+
+    def test_bot_marks_send(self):
+        state = health.Health()
+        bot = health.HealthBot(FakeBot(), state)
+        bot.send_message(chat_id='1', text='hi')
+        assert state.since(health.SEND) is not None
+        assert bot.sent == [('1', 'hi')]
+
+
+class TestHealthServer:
+    def test_endpoints(self):
+        state = health.Health()
+        server = health.HealthServer(state, 0).start()
+        try:
+            assert get(server, '/ready')[0] == 503
+            state.ready = True
+            status, report = get(server, '/ready')
+            assert status == 200
+            assert report['ready'] is True
+            assert get(server, '/health')[0] == 200
+            assert get(server, '/missing')[0] == 404
+        finally:
+            server.stop()
+
+
+class TestWatchdog:
+    def test_restarts_stuck_poll_worker(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(
+            homework, 'get_account_answer',
+            lambda token, timestamp: {'homeworks': [], 'current_date': 1}
+        )
+        path = str(tmp_path / 'accounts.jsonl')
+        accounts.save_accounts(path, [accounts.Account('token-1', '101')])
+        release = threading.Event()
+        polled = threading.Event()
+        calls = []
+
+        def fetch(token, timestamp):
+            calls.append(threading.current_thread().name)
+            if len(calls) == 1:
+                release.wait(1)
+            else:
+                polled.set()
+            return {'homeworks': [], 'current_date': 1}
+
+        bot_runner = runner.Runner(
+            accounts.AccountRegistry(path), FakeBot(),
+            StateStore(str(tmp_path / 'state.json')), fetch=fetch,
+            period=0.01, reload_period=60,
+        )
+        bot_runner.sync(force=True)
+        workers = [bot_runner.start_worker()]
+        watchdog = health.Watchdog(
+            bot_runner.health, bot_runner.restart_stalled, timeout=0.05
+        )
+        while not watchdog.health.stalled(0.05):
+            pass
+        assert watchdog.check() == [health.POLL]
+        workers.append(bot_runner.worker)
+        release.set()
+        assert polled.wait(1), 'Новый поток должен продолжить опрос.'
+        bot_runner.scheduler.stop()
+        for worker in workers:
+            worker.join(1)
+        assert bot_runner.restarts == 1
+        assert calls[0] == 'poll-1'
+        assert set(calls[1:]) == {'poll-2'}, (
+            'Заменённый поток не должен продолжать опрос.'
+        )
+
+    def test_stall_reported_per_worker(self, tmp_path, monkeypatch):
+        path = str(tmp_path / 'accounts.jsonl')
+        accounts.save_accounts(path, [
+            accounts.Account(token, '101') for token in ('t0', 't1')
+        ])
+        release = threading.Event()
+        calls = []
+
+        def fetch(token, timestamp):
+            calls.append(threading.current_thread().name)
+            if len(calls) == 1:
+                release.wait(1)
+            return {'homeworks': [], 'current_date': 1}
+
+        monkeypatch.setattr(homework, 'get_account_answer', fetch)
+        bot_runner = runner.Runner(
+            accounts.AccountRegistry(path), FakeBot(),
+            StateStore(str(tmp_path / 'state.json')), fetch=fetch,
+            period=60, reload_period=60, concurrency=2,
+        )
+        bot_runner.sync(force=True)
+        for token in ('t0', 't1'):
+            bot_runner.scheduler.add(token, 0)
+        bot_runner.start_worker()
+        workers = list(bot_runner.workers)
+        while len(calls) < 2 or not bot_runner.health.stalled(0.05):
+            pass
+        slot = f'{health.POLL}-{calls[0].rsplit("-", 1)[1]}'
+        assert bot_runner.health.stalled(0.05) == [slot], (
+            'Зависание видно по отметке своего потока опроса.'
+        )
+        release.set()
+        bot_runner.scheduler.stop()
+        for worker in workers:
+            worker.join(1)
+        assert len(bot_runner.scheduler) == 2
+
+    def test_restart_requeues_whole_batch(self, tmp_path, monkeypatch):
+        path = str(tmp_path / 'accounts.jsonl')
+        tokens = ['t0', 't1', 't2']
+        accounts.save_accounts(
+            path, [accounts.Account(token, '101') for token in tokens]
+        )
+        release = threading.Event()
+        calls = []
+
+        def fetch(token, timestamp):
+            calls.append((threading.current_thread().name, token))
+            if len(calls) == 1:
+                release.wait(1)
+            return {'homeworks': [], 'current_date': 1}
+
+        monkeypatch.setattr(homework, 'get_account_answer', fetch)
+        bot_runner = runner.Runner(
+            accounts.AccountRegistry(path), FakeBot(),
+            StateStore(str(tmp_path / 'state.json')), fetch=fetch,
+            period=60, reload_period=60,
+        )
+        bot_runner.sync(force=True)
+        for token in tokens:
+            bot_runner.scheduler.add(token, 0)
+        workers = [bot_runner.start_worker()]
+        while not bot_runner.health.stalled(0.05):
+            pass
+        bot_runner.restart_stalled(health.POLL)
+        workers.append(bot_runner.worker)
+        stuck = calls[0][1]
+        rest = set(tokens) - {stuck}
+        while {token for name, token in calls if name == 'poll-2'} != rest:
+            pass
+        release.set()
+        bot_runner.scheduler.stop()
+        for worker in workers:
+            worker.join(1)
+        assert len(bot_runner.scheduler) == len(tokens), (
+            'Каждый аккаунт пачки зависшего потока снова в расписании.'
+        )
+
+    def test_state_flushed_before_exit(self, tmp_path, monkeypatch):
+        path = str(tmp_path / 'accounts.jsonl')
+        accounts.save_accounts(path, [])
+        bot_runner = runner.Runner(
+            accounts.AccountRegistry(path), FakeBot(),
+            StateStore(str(tmp_path / 'state.json')),
+        )
+        flushed = []
+        monkeypatch.setattr(
+            bot_runner.state, 'flush', lambda: flushed.append(True)
+        )
+
+        def fake_exit(code):
+            flushed.append(code)
+            raise SystemExit(code)
+
+        monkeypatch.setattr(runner.os, '_exit', fake_exit)
+        bot_runner.restarts = runner.MAX_RESTARTS
+        with pytest.raises(SystemExit):
+            bot_runner.restart_stalled(health.POLL)
+        assert flushed == [True, runner.EXIT_STALLED], (
+            'Состояние сбрасывается на диск до выхода процесса.'
+        )
+
+
+@pytest.fixture(autouse=True)
+def no_exit(monkeypatch):
+    monkeypatch.setattr(runner.os, '_exit', pytest.fail)
@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+import jsonstream
+
+
+def chunked(data, size):
+    raw = json.dumps(data, ensure_ascii=False).encode()
+    return [raw[index:index + size] for index in range(0, len(raw), size)]
+
+
+def consume(chunks):
+    elements = []
+    generator = jsonstream.iter_elements(chunks)
+    while True:
+        try:
+            elements.append(next(generator))
+        except StopIteration as stop:
+            return elements, stop.value
+
+
+class TestIterElements:
+    @pytest.mark.parametrize('size', [1, 2, 7, 4096])
+    def test_elements_and_rest(self, size, data_with_new_hw_status):
+        data = dict(data_with_new_hw_status)
+        data['homeworks'] = data['homeworks'] * 3
+        elements, rest = consume(chunked(data, size))
+        assert elements == data['homeworks'], (
+            'Элементы списка `homeworks` должны выдаваться по одному '
+            'при любом размере кусков.'
+        )
+        assert rest == {
+            'homeworks': [], 'current_date': data['current_date']
+        }
+
+    def test_empty_homeworks(self):
+        data = {'current_date': 1234567890, 'homeworks': []}
+        assert consume(chunked(data, 3)) == ([], data)
+
+    def test_not_list_homeworks_returned_as_is(self):
+        data = {'homeworks': {'status': 'approved'}, 'current_date': 1}
+        assert consume(chunked(data, 5)) == ([], data)
+
+    def test_not_dict_response_returned_as_is(self):
+        data = [{'homeworks': []}]
+        assert consume(chunked(data, 4)) == ([], data)
+
+    def test_truncated_body_raises(self):
+        raw = b'{"homeworks": [{"id": 1}, {"id": '
+        with pytest.raises(json.JSONDecodeError):
+            consume([raw[:10], raw[10:]])
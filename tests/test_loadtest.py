@@ -0,0 +1,61 @@
+import pytest
+from telebot import apihelper
+
+import homework
+import loadtest
+
+
+class TestSyntheticAccounts:
+    def test_first_answer_has_homework(self):
+        accounts = loadtest.SyntheticAccounts(change_rate=0)
+        first = accounts.answer('load-1', 0)
+        assert [hw['status'] for hw in first['homeworks']] == [
+            loadtest.STATUSES[0]
+        ], 'Загрузка истории возвращает работу аккаунта.'
+        assert accounts.answer('load-1', 1)['homeworks'] == []
+
+    def test_change_rate(self):
+        accounts = loadtest.SyntheticAccounts(change_rate=1)
+        statuses = [
+            accounts.answer('load-1', 1)['homeworks'][0]['status']
+            for _ in range(3)
+        ]
+        assert statuses == list(loadtest.STATUSES[1:] + loadtest.STATUSES[:1])
+
+
+class TestRunShard:
+    @pytest.mark.parametrize('transport, concurrency', [
+        ('sync:requests', 1), ('sync:requests', 3), ('async:httpx', 2),
+    ])
+    def test_polls_through_stand_ins(self, monkeypatch, transport,
+                                     concurrency):
+        monkeypatch.setattr(homework, 'ENDPOINT', homework.ENDPOINT)
+        monkeypatch.setattr(homework, 'transport', homework.transport)
+        monkeypatch.setattr(apihelper, 'API_URL', apihelper.API_URL)
+        stand_ins = loadtest.StandIns(change_rate=1, latency=0).start()
+        try:
+            shard = loadtest.run_shard(
+                loadtest.synthetic_accounts(3), transport, concurrency, 2,
+                0.1, stand_ins.practicum_url, stand_ins.telegram_url
+            )
+        finally:
+            stand_ins.stop()
+        polls = len(shard['latencies'])
+        assert 3 <= polls <= 9, 'Измеряются около двух кругов опроса.'
+        assert shard['wall'] == pytest.approx(0.2, abs=0.05), (
+            'Время замеряется до остановки, без ожидания в serve().'
+        )
+        stats = stand_ins.stats()
+        assert stats['practicum_requests'] > polls, (
+            'Загрузка истории и первый круг опроса не измеряются.'
+        )
+        assert stats['telegram_messages'] >= polls, (
+            'Каждая смена статуса отправляется в Telegram.'
+        )
+        report = loadtest.summarize([shard], {'accounts': 3}, stats)
+        assert report['polls'] == polls
+        assert report['max_rss_mb'] > 0
+
+    def test_unknown_transport_rejected(self):
+        with pytest.raises(SystemExit):
+            loadtest.main(['--transports', 'sync:aiohttp'])
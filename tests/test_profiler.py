@@ -0,0 +1,63 @@
+import json
+import threading
+import time
+
+import profiler
+
+
+def busy_stage(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+class TestSamplingProfiler:
+    def test_samples_named_stages(self, tmp_path):
+        stop = threading.Event()
+        worker = threading.Thread(
+            target=busy_stage, args=(stop,), name='poll'
+        )
+        worker.start()
+        path = str(tmp_path / 'profile.txt')
+        with profiler.profiling(path, interval=0.001) as sampler:
+            time.sleep(0.05)
+        stop.set()
+        worker.join()
+        assert sampler.samples
+        lines = open(path, encoding='utf-8').read().splitlines()
+        stacks = [line.rsplit(' ', 1) for line in lines]
+        assert any(
+            stack.startswith('poll;') and 'test_profiler.busy_stage' in stack
+            for stack, _ in stacks
+        ), 'В стеке должны быть поток и функция этапа.'
+        assert all(count.isdigit() for _, count in stacks)
+
+    def test_speedscope_output(self, tmp_path):
+        path = str(tmp_path / 'profile.json')
+        sampler = profiler.SamplingProfiler(path, interval=0.5)
+        sampler.samples.update({('main', 'a', 'b'): 3, ('main', 'a'): 1})
+        sampler.write()
+        data = json.load(open(path, encoding='utf-8'))
+        frames = [frame['name'] for frame in data['shared']['frames']]
+        profile = data['profiles'][0]
+        assert profile['type'] == 'sampled'
+        assert [[frames[i] for i in s] for s in profile['samples']] == [
+            ['main', 'a'], ['main', 'a', 'b']
+        ]
+        assert profile['weights'] == [0.5, 1.5]
+
+    def test_periodic_flush(self, tmp_path):
+        path = tmp_path / 'profile.txt'
+        sampler = profiler.SamplingProfiler(
+            str(path), interval=0.001, flush_every=0.01
+        ).start()
+        try:
+            deadline = time.monotonic() + 1
+            while not path.exists() and time.monotonic() < deadline:
+                time.sleep(0.005)
+            assert path.exists(), 'Файл должен обновляться во время работы.'
+        finally:
+            sampler.stop()
+
+    def test_disabled_without_path(self):
+        with profiler.profiling(None) as sampler:
+            assert sampler is None
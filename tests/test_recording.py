@@ -0,0 +1,85 @@
+import gzip
+
+import pytest
+
+import clock
+import exceptions
+import recording
+import replay
+
+
+@pytest.fixture
+def record_path(tmp_path):
+    return str(tmp_path / 'record.jsonl.gz')
+
+
+def record(path, responses):
+    recorder = recording.Recorder(path, clock=clock.SimulatedClock())
+
+    def fetch(timestamp):
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    recorded_fetch = recorder.wrap(fetch)
+    for _ in range(len(responses)):
+        try:
+            recorded_fetch(0)
+        except Exception:
+            pass
+    recorder.close()
+
+
+class TestRecording:
+    def test_replayer_returns_recorded_answers(
+        self, record_path, data_with_new_hw_status
+    ):
+        record(record_path, [
+            data_with_new_hw_status,
+            exceptions.RequestError('Статус ответа на запрос 500'),
+        ])
+        replayer = recording.Replayer(record_path)
+        assert replayer.get_api_answer(0) == data_with_new_hw_status
+        with pytest.raises(exceptions.RequestError):
+            replayer.get_api_answer(0)
+        assert not replayer.has_next()
+        with pytest.raises(exceptions.ReplayFinishedError):
+            replayer.get_api_answer(0)
+
+    def test_status_code_replayed(self, record_path):
+        record(record_path, [
+            exceptions.RequestError('Статус ответа на запрос 401', 401),
+        ])
+        replayer = recording.Replayer(record_path)
+        with pytest.raises(exceptions.RequestError) as error:
+            replayer.get_api_answer(0)
+        assert error.value.status_code == 401
+        assert exceptions.classify(error.value) == exceptions.PERMANENT, (
+            'Записанный 401 должен считаться постоянным сбоем.'
+        )
+
+    def test_truncated_recording_readable(self, record_path):
+        record(record_path, [{'homeworks': [], 'current_date': 1}])
+        with open(record_path, 'rb') as file:
+            data = file.read()
+        with open(record_path, 'wb') as file:
+            file.write(data[:-4])
+        assert list(recording.read_records(record_path)) == [
+            {'at': 0.0, 'from_date': 0,
+             'response': {'homeworks': [], 'current_date': 1}}
+        ]
+
+    def test_run_replay_in_virtual_time(
+        self, record_path, data_with_new_hw_status
+    ):
+        empty = {'homeworks': [], 'current_date': 1000198000}
+        record(record_path, [empty] * 500 + [data_with_new_hw_status])
+        with gzip.open(record_path, 'rt') as file:
+            assert len(file.readlines()) == 501
+        stats = replay.run_replay(record_path)
+        assert stats['polls'] == 501
+        assert stats['messages'] == 1, (
+            'Воспроизведение должно отправлять сообщение при смене статуса.'
+        )
+        assert stats['virtual_seconds'] == 500 * 600
@@ -0,0 +1,104 @@
+import re
+
+import pytest
+
+import exceptions
+import homework
+import rendering
+
+
+class TestEscaping:
+    def test_markdown_v2_special_characters(self):
+        assert rendering.escape_markdown_v2('hw_1.zip (v2)!') == (
+            r'hw\_1\.zip \(v2\)\!'
+        )
+
+    def test_html(self):
+        assert rendering.escape_html('a < b & c') == 'a &lt; b &amp; c'
+
+    def test_escape_memoized(self):
+        rendering.escape_markdown_v2.cache_clear()
+        for _ in range(3):
+            rendering.escape_markdown_v2('hw_1.zip')
+        info = rendering.escape_markdown_v2.cache_info()
+        assert (info.hits, info.misses) == (2, 1), (
+            'Экранирование повторяющихся полей должно кэшироваться.'
+        )
+
+
+class TestRenderStatus:
+    def test_bold_name_and_comment(self):
+        messages = rendering.render_status(
+            'hw<1>.zip', 'Ура!', 'a & b', rendering.HTML
+        )
+        assert messages == [
+            'Изменился статус проверки работы <b>hw&lt;1&gt;.zip</b>. Ура!'
+            '\n\n<i>a &amp; b</i>'
+        ]
+
+    @pytest.mark.parametrize('parse_mode', [
+        rendering.MARKDOWN_V2, rendering.HTML
+    ])
+    def test_long_comment_split_within_limit(self, parse_mode):
+        comment = 'Исправьте (см. строку 10) & <тег>! ' * 300
+        messages = rendering.render_status(
+            'hw.zip', 'Есть замечания.', comment, parse_mode, limit=500
+        )
+        assert len(messages) > 1
+        assert all(len(message) <= 500 for message in messages)
+        for message in messages[1:]:
+            if parse_mode == rendering.HTML:
+                assert re.fullmatch(r'<i>[^<>]*</i>', message), (
+                    'Каждая часть должна быть отдельной сущностью.'
+                )
+                assert not re.search(r'&\w*$', message[:-4])
+            else:
+                assert message.startswith('_') and message.endswith('_')
+                assert not re.search(r'(?<!\\)(\\\\)*\\$', message[:-1]), (
+                    'Экранирование не должно разрываться на границе части.'
+                )
+
+    def test_truncated_to_max_parts(self):
+        messages = rendering.render_status(
+            'hw', 'ok', 'слово ' * 1000, rendering.HTML,
+            limit=100, max_parts=2
+        )
+        assert len(messages) == 3
+        assert messages[-1].endswith('…</i>')
+
+
+class TestPollSessionFormatting:
+    def test_rich_status_sent_with_parse_mode(self, data_with_new_hw_status):
+        sent = []
+
+        class Bot:
+            def send_message(self, **kwargs):
+                sent.append(kwargs)
+
+        session = homework.PollSession(
+            Bot(), 'token', 0, homework.SnapshotCache(), chat_id='1',
+            parse_mode=rendering.MARKDOWN_V2
+        )
+        session.poll(lambda timestamp: data_with_new_hw_status)
+        assert sent == [{
+            'chat_id': '1',
+            'parse_mode': rendering.MARKDOWN_V2,
+            'text': (
+                r'Изменился статус проверки работы *hw123\.zip*\. '
+                r'Работа проверена: ревьюеру всё понравилось\. Ура\!'
+                '\n\n_Принято\\!_'
+            ),
+        }]
+
+    @pytest.mark.parametrize('value', [None, rendering.MARKDOWN_V2])
+    def test_known_message_format_accepted(self, monkeypatch, value):
+        monkeypatch.setattr(homework, 'MESSAGE_FORMAT', value)
+        homework.check_message_format()
+
+    def test_unknown_message_format_rejected(self, monkeypatch, caplog):
+        monkeypatch.setattr(homework, 'MESSAGE_FORMAT', 'Markdown')
+        with pytest.raises(exceptions.MessageFormatError):
+            homework.check_message_format()
+        assert [record.levelname for record in caplog.records] == [
+            'CRITICAL'
+        ], 'Неверный MESSAGE_FORMAT должен останавливать бот при старте.'
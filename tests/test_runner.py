@@ -0,0 +1,177 @@
+import asyncio
+
+import pytest
+
+import accounts
+import exceptions
+import homework
+import runner
+import scheduler
+import transports
+from clock import SimulatedClock
+from state import StateStore
+
+
+class FakeBot:
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.sent.append((chat_id, text))
+
+
+@pytest.fixture
+def registry_path(tmp_path):
+    path = str(tmp_path / 'accounts.jsonl')
+    accounts.save_accounts(path, [
+        accounts.Account('token-1', '101'),
+        accounts.Account('token-2', '102'),
+    ])
+    return path
+
+
+@pytest.fixture
+def make_runner(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        homework, 'get_account_answer',
+        lambda token, timestamp: {'homeworks': [], 'current_date': 1}
+    )
+
+    def factory(path, fetch):
+        return runner.Runner(
+            accounts.AccountRegistry(path), FakeBot(),
+            StateStore(str(tmp_path / 'state.json')),
+            clock=SimulatedClock(), fetch=fetch,
+        )
+
+    return factory
+
+
+class TestRunner:
+    def test_accounts_polled_and_notified_in_own_chat(
+        self, registry_path, make_runner, data_with_new_hw_status
+    ):
+        polls = []
+
+        def fetch(token, timestamp):
+            polls.append(token)
+            return data_with_new_hw_status
+
+        bot_runner = make_runner(registry_path, fetch)
+        bot_runner.run(until=1799)
+        assert sorted(polls) == ['token-1'] * 3 + ['token-2'] * 3
+        assert sorted(chat for chat, _ in bot_runner.bot.sent) == [
+            '101', '102'
+        ], 'Одинаковый статус не должен отправляться повторно.'
+
+    def test_hot_reload_keeps_state(
+        self, registry_path, make_runner, data_with_new_hw_status
+    ):
+        bot_runner = make_runner(
+            registry_path, lambda token, timestamp: data_with_new_hw_status
+        )
+        bot_runner.run(until=0)
+        session = bot_runner.sessions['token-1']
+
+        accounts.save_accounts(registry_path, [
+            accounts.Account('token-1', '201'),
+            accounts.Account('token-3', '103'),
+        ])
+        diff = bot_runner.sync(force=True)
+        assert [account.token for account in diff.removed] == ['token-2']
+        assert bot_runner.sessions['token-1'] is session, (
+            'Перечитывание реестра не должно сбрасывать состояние опроса.'
+        )
+        assert session.chat_id == '201'
+        assert 'token-2' not in bot_runner.scheduler
+        assert 'token-3' in bot_runner.scheduler
+
+    def test_broken_registry_keeps_accounts(
+        self, tmp_path, make_runner, caplog
+    ):
+        path = str(tmp_path / 'accounts.csv')
+        accounts.save_accounts(path, [accounts.Account('token-1', '101')])
+        polls = []
+
+        def fetch(token, timestamp):
+            polls.append(token)
+            return {'homeworks': [], 'current_date': 1}
+
+        bot_runner = make_runner(path, fetch)
+        bot_runner.run(until=0)
+        with open(path, 'a', encoding='utf-8') as file:
+            file.write('token-2')
+        bot_runner.run(until=1199)
+        assert list(bot_runner.registry.accounts) == ['token-1'], (
+            'Недописанный реестр не должен сбрасывать набор аккаунтов.'
+        )
+        assert polls.count('token-1') == 2, (
+            'Ошибка чтения реестра не должна останавливать опрос.'
+        )
+        assert any('реестр' in record.message for record in caplog.records)
+
+    def test_class_from_snapshot(self, registry_path, make_runner):
+        bot_runner = make_runner(registry_path, None)
+        snapshots = bot_runner.snapshots
+        assert bot_runner.classify('token-1') == scheduler.DEFAULT_CLASS
+        snapshots.update('token-1', {'homeworks': [
+            {'homework_name': 'a', 'status': 'approved'},
+        ], 'current_date': 1})
+        assert bot_runner.classify('token-1') == scheduler.IDLE_CLASS
+        snapshots.update('token-1', {'homeworks': [
+            {'homework_name': 'b', 'status': 'reviewing'},
+        ], 'current_date': 2})
+        assert bot_runner.classify('token-1') == scheduler.REVIEWING_CLASS
+
+    def test_revoked_token_stops_using_poll_capacity(
+        self, registry_path, make_runner
+    ):
+        polls = []
+
+        def fetch(token, timestamp):
+            polls.append(token)
+            if token == 'token-1':
+                raise exceptions.RequestError('', 401)
+            return {'homeworks': [], 'current_date': timestamp}
+
+        bot_runner = make_runner(registry_path, fetch)
+        bot_runner.run(until=3599)
+        assert polls.count('token-1') == 1
+        assert polls.count('token-2') == 6
+        assert [chat for chat, _ in bot_runner.bot.sent] == ['101']
+        assert not accounts.load_accounts(registry_path)['token-1'].enabled, (
+            'Аккаунт с отозванным токеном выключается в реестре.'
+        )
+        assert 'token-1' not in bot_runner.sessions
+
+        bot_runner.reenable('token-1', new_token='token-5')
+        bot_runner.run(until=7199)
+        assert 'token-5' in polls, (
+            'Включённый аккаунт с новым токеном возвращается в опрос.'
+        )
+        assert polls.count('token-1') == 1
+
+
+class TestAsyncRunner:
+    def test_arun_with_async_transport(
+        self, registry_path, make_runner, data_with_new_hw_status
+    ):
+        client = transports.AsyncStubTransport(
+            lambda url, headers, params: (200, data_with_new_hw_status)
+        )
+        bot_runner = make_runner(registry_path, None)
+        asyncio.run(bot_runner.arun(client, until=1799))
+        assert client.calls == 6
+        assert sorted(chat for chat, _ in bot_runner.bot.sent) == [
+            '101', '102'
+        ]
+
+    def test_arun_failed_request_notifies(self, registry_path, make_runner):
+        client = transports.AsyncStubTransport(
+            lambda url, headers, params: (500, b'')
+        )
+        bot_runner = make_runner(registry_path, None)
+        asyncio.run(bot_runner.arun(client, until=599))
+        assert len(bot_runner.bot.sent) == 2, (
+            'Ошибка запроса должна приходить в чат аккаунта.'
+        )
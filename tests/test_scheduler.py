@@ -0,0 +1,311 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import clock
+import scheduler
+
+HOUR = 60 * 60
+
+
+class TestPollScheduler:
+    def test_accounts_polled_every_period(self):
+        simulated = clock.SimulatedClock()
+        poll_scheduler = scheduler.PollScheduler(simulated, period=600)
+        polls = []
+        poll_scheduler.add('a')
+        poll_scheduler.add('b', delay=300)
+        poll_scheduler.run(
+            lambda account: polls.append((simulated.time(), account)),
+            until=1200,
+        )
+        assert polls == [
+            (0, 'a'), (300, 'b'), (600, 'a'), (900, 'b'), (1200, 'a')
+        ], 'Каждый аккаунт должен опрашиваться раз в period.'
+
+    def test_removed_during_poll_not_rescheduled(self):
+        poll_scheduler = scheduler.PollScheduler(clock.SimulatedClock())
+        polls = []
+
+        def poll(account):
+            polls.append(account)
+            poll_scheduler.remove(account)
+
+        poll_scheduler.add('a')
+        poll_scheduler.run(poll, until=HOUR)
+        assert polls == ['a']
+        assert len(poll_scheduler) == 0
+
+    def test_stop(self):
+        poll_scheduler = scheduler.PollScheduler(clock.SimulatedClock())
+        polls = []
+
+        def poll(account):
+            polls.append(account)
+            if len(polls) == 3:
+                poll_scheduler.stop()
+
+        poll_scheduler.add('a')
+        poll_scheduler.run(poll)
+        assert polls == ['a'] * 3
+
+    def test_stop_mid_batch(self):
+        poll_scheduler = scheduler.PollScheduler(clock.SimulatedClock())
+        for number in range(100):
+            poll_scheduler.add(number)
+        polls = []
+
+        def poll(account):
+            polls.append(account)
+            if len(polls) == 3:
+                poll_scheduler.stop()
+
+        poll_scheduler.run(poll)
+        assert polls == [0, 1, 2], (
+            'После stop() остаток пачки не опрашивается.'
+        )
+        assert len(poll_scheduler) == 100
+        assert poll_scheduler.next_due() == 0
+
+    def test_stop_wakes_real_clock(self):
+        poll_scheduler = scheduler.PollScheduler(clock.RealClock())
+        poll_scheduler.add('a', delay=HOUR)
+        threading.Timer(0.05, poll_scheduler.stop).start()
+        started = time.monotonic()
+        poll_scheduler.run(pytest.fail)
+        assert time.monotonic() - started < 1, (
+            'stop() прерывает ожидание следующего опроса.'
+        )
+
+    def test_lag_measured_at_poll_start(self):
+        simulated = clock.SimulatedClock()
+        poll_scheduler = scheduler.PollScheduler(simulated, period=HOUR)
+        for number in range(100):
+            poll_scheduler.add(number)
+        lags = []
+
+        def poll(account):
+            lags.append(poll_scheduler.lag)
+            simulated.sleep(1)
+
+        poll_scheduler.run(poll, until=HOUR - 1)
+        assert lags[0] == 0
+        assert lags[-1] == 99, (
+            'Опоздание считается по началу опроса, а не по выдаче пачки.'
+        )
+
+    def test_failed_poll_keeps_rest_of_batch(self):
+        poll_scheduler = scheduler.PollScheduler(clock.SimulatedClock())
+        for account in ('a', 'b', 'c'):
+            poll_scheduler.add(account)
+
+        def poll(account):
+            raise RuntimeError(account)
+
+        with pytest.raises(RuntimeError):
+            poll_scheduler.run(poll)
+        assert len(poll_scheduler) == 3, (
+            'Исключение в опросе не должно терять аккаунты из пачки.'
+        )
+        assert poll_scheduler.next_due() == 0
+
+    def test_arun(self):
+        simulated = clock.SimulatedClock()
+        poll_scheduler = scheduler.PollScheduler(simulated, period=600)
+        polls = []
+
+        async def poll(account):
+            polls.append(simulated.time())
+
+        poll_scheduler.add('a')
+        asyncio.run(poll_scheduler.arun(poll, until=1800))
+        assert polls == [0, 600, 1200, 1800]
+
+    def test_arun_limiter_keeps_polls_concurrent(self):
+        real_clock = clock.RealClock()
+        poll_scheduler = scheduler.PollScheduler(
+            real_clock, period=HOUR, max_rate=100
+        )
+        for number in range(20):
+            poll_scheduler.add(number)
+        polls = []
+
+        async def poll(account):
+            polls.append(account)
+            await asyncio.sleep(0.1)
+
+        asyncio.run(poll_scheduler.arun(poll, until=real_clock.time() + 0.5))
+        assert len(polls) == 20, (
+            'Бюджет 100 опросов в секунду не должен упираться в задержку '
+            'ответа.'
+        )
+
+    def test_arun_polls_due_batch_concurrently(self):
+        poll_scheduler = scheduler.PollScheduler(clock.SimulatedClock())
+        in_flight = []
+        overlap = []
+
+        async def poll(account):
+            in_flight.append(account)
+            await asyncio.sleep(0)
+            overlap.append(len(in_flight))
+            in_flight.remove(account)
+            poll_scheduler.stop()
+
+        for account in ('a', 'b', 'c'):
+            poll_scheduler.add(account)
+        asyncio.run(poll_scheduler.arun(poll))
+        assert max(overlap) == 3, (
+            'Аккаунты одной пачки должны опрашиваться одновременно.'
+        )
+        assert len(poll_scheduler) == 3
+
+    def test_arun_concurrency_limit(self):
+        poll_scheduler = scheduler.PollScheduler(clock.SimulatedClock())
+        in_flight = []
+        overlap = []
+
+        async def poll(account):
+            in_flight.append(account)
+            await asyncio.sleep(0)
+            overlap.append(len(in_flight))
+            in_flight.remove(account)
+            poll_scheduler.stop()
+
+        for account in range(5):
+            poll_scheduler.add(account)
+        asyncio.run(poll_scheduler.arun(poll, concurrency=2))
+        assert len(overlap) == 5
+        assert max(overlap) == 2, (
+            'Одновременно идёт не больше concurrency опросов.'
+        )
+
+    def test_threads_share_due_batch(self):
+        poll_scheduler = scheduler.PollScheduler(clock.RealClock())
+        barrier = threading.Barrier(3, timeout=1)
+        threads = set()
+
+        def poll(account):
+            threads.add(threading.current_thread().name)
+            barrier.wait()
+            poll_scheduler.stop()
+
+        for account in range(3):
+            poll_scheduler.add(account)
+        workers = [
+            threading.Thread(
+                target=poll_scheduler.run, args=(poll,),
+                kwargs={'batch': 1}, name=f'worker-{number}'
+            )
+            for number in range(3)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(1)
+        assert len(threads) == 3, (
+            'С batch=1 наступившие опросы разбирают все потоки.'
+        )
+        assert len(poll_scheduler) == 3
+
+    def test_simulated_throughput(self):
+        accounts = 1000
+        simulated = clock.SimulatedClock()
+        poll_scheduler = scheduler.PollScheduler(simulated, period=600)
+        for number in range(accounts):
+            poll_scheduler.add(number, delay=number * 600 / accounts)
+        polls = 0
+
+        def poll(account):
+            nonlocal polls
+            polls += 1
+
+        poll_scheduler.run(poll, until=12 * HOUR - 0.5)
+        assert polls == accounts * 12 * HOUR // 600, (
+            f'За 12 часов виртуального времени каждый из {accounts} '
+            'аккаунтов опрашивается раз в период.'
+        )
+
+
+class TestWarmUp:
+    def test_stagger_offset_deterministic_and_spread(self):
+        offsets = [
+            scheduler.stagger_offset(f'token-{number}', 600)
+            for number in range(6000)
+        ]
+        assert offsets[:10] == [
+            scheduler.stagger_offset(f'token-{number}', 600)
+            for number in range(10)
+        ], 'Сдвиг должен зависеть только от токена.'
+        assert all(0 <= offset < 600 for offset in offsets)
+        per_minute = [0] * 10
+        for offset in offsets:
+            per_minute[int(offset // 60)] += 1
+        assert max(per_minute) < 700, (
+            'Первые опросы должны равномерно распределяться по периоду.'
+        )
+
+    def test_max_rate_spreads_burst(self):
+        simulated = clock.SimulatedClock()
+        poll_scheduler = scheduler.PollScheduler(
+            simulated, period=600, max_rate=10
+        )
+        for number in range(50):
+            poll_scheduler.add(number)
+        polls = []
+        poll_scheduler.run(
+            lambda account: polls.append(simulated.time()), until=10
+        )
+        assert len(polls) == 50
+        gaps = [later - earlier for earlier, later in zip(polls, polls[1:])]
+        assert min(gaps) == pytest.approx(0.1), (
+            'Планировщик не должен превышать max_rate опросов в секунду.'
+        )
+
+
+class TestPriorityClasses:
+    def test_status_class(self):
+        assert scheduler.status_class(['approved', 'reviewing']) == (
+            scheduler.REVIEWING_CLASS
+        )
+        assert scheduler.status_class(['approved']) == scheduler.IDLE_CLASS
+        assert scheduler.status_class(['rejected']) == (
+            scheduler.DEFAULT_CLASS
+        )
+        assert scheduler.status_class([]) == scheduler.DEFAULT_CLASS
+
+    def test_weighted_fair_share_under_budget(self):
+        simulated = clock.SimulatedClock()
+        classes = {}
+        for number in range(300):
+            classes[number] = ('reviewing', 'default', 'idle')[number % 3]
+        poll_scheduler = scheduler.PollScheduler(
+            simulated, period=600, max_rate=1, classify=classes.get,
+            weights={'reviewing': 6, 'default': 3, 'idle': 1},
+        )
+        for account in classes:
+            poll_scheduler.add(account)
+        polls = []
+        poll_scheduler.run(
+            lambda account: polls.append(classes[account]), until=99
+        )
+        shares = {name: polls.count(name) for name in set(polls)}
+        assert shares == {'reviewing': 60, 'default': 30, 'idle': 10}, (
+            'Бюджет должен делиться между классами по весам.'
+        )
+        assert poll_scheduler.deferred() == {
+            'reviewing': 40, 'default': 70, 'idle': 90
+        }
+
+    def test_first_pick_goes_to_heaviest_class(self):
+        classes = {'idle': 'idle', 'reviewing': 'reviewing'}
+        poll_scheduler = scheduler.PollScheduler(
+            clock.SimulatedClock(), max_rate=1, classify=classes.get
+        )
+        poll_scheduler.add('idle')
+        poll_scheduler.add('reviewing')
+        polls = []
+        poll_scheduler.run(polls.append, until=1)
+        assert polls == ['reviewing', 'idle']
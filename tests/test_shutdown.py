@@ -0,0 +1,263 @@
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+import accounts
+import homework
+import runner
+import scheduler
+import shutdown
+import transports
+from state import StateStore, account_key
+from tests.test_runner import FakeBot
+
+
+def terminate():
+    os.kill(os.getpid(), signal.SIGTERM)
+
+
+class TestGracefulShutdown:
+    def test_idle_signal_exits_at_once(self):
+        handler = shutdown.GracefulShutdown().install()
+        try:
+            with pytest.raises(SystemExit):
+                terminate()
+            assert handler.requested
+        finally:
+            handler.restore()
+        assert signal.getsignal(signal.SIGTERM) is signal.SIG_DFL
+
+    def test_busy_work_finishes(self):
+        stopped = []
+        handler = shutdown.GracefulShutdown(
+            on_request=lambda: stopped.append(True)
+        ).install()
+        try:
+            with handler.busy():
+                terminate()
+                done = True
+        finally:
+            handler.restore()
+        assert done and handler.requested and stopped
+
+    def test_busy_work_interrupted_after_deadline(self):
+        handler = shutdown.GracefulShutdown(deadline=0.05).install()
+        try:
+            with pytest.raises(shutdown.ShutdownDeadlineError):
+                with handler.busy():
+                    terminate()
+                    time.sleep(1)
+        finally:
+            handler.restore()
+
+    def test_deadline_argument(self):
+        parser = argparse.ArgumentParser()
+        shutdown.add_shutdown_arguments(parser)
+        args = parser.parse_args(['--shutdown-deadline', '2.5'])
+        assert args.shutdown_deadline == 2.5
+        assert parser.parse_args([]).shutdown_deadline == (
+            shutdown.SHUTDOWN_DEADLINE
+        )
+
+
+@pytest.fixture
+def patched_main(tmp_path, monkeypatch):
+    state_path = str(tmp_path / 'state.json')
+    monkeypatch.setattr(homework, 'state_file_path', state_path)
+    monkeypatch.setattr(homework, 'check_tokens', lambda: None)
+    monkeypatch.setattr(homework, 'TeleBot', lambda token: FakeBot())
+    monkeypatch.setattr(homework, 'PRACTICUM_TOKEN', 'token')
+    monkeypatch.setattr(
+        homework, 'onboard_account', lambda token, state, snapshots: 5
+    )
+    return state_path
+
+
+def run_main():
+    # test_bot подменяет homework.main обёрткой с таймаутом.
+    return inspect.unwrap(homework.main)()
+
+
+def saved_timestamp(state_path):
+    with open(state_path, encoding='utf-8') as file:
+        return json.load(file)[account_key('token')][homework.TIMESTAMP_KEY]
+
+
+class TestMainShutdown:
+    def test_sigterm_while_sleeping_saves_timestamp(
+        self, patched_main, monkeypatch
+    ):
+        monkeypatch.setattr(homework, 'api_fetcher', lambda: (
+            lambda timestamp: {'homeworks': [], 'current_date': 7}
+        ))
+        monkeypatch.setattr(
+            homework.time, 'sleep', lambda seconds: terminate()
+        )
+        with pytest.raises(SystemExit):
+            run_main()
+        assert saved_timestamp(patched_main) == 7
+
+    def test_sigterm_during_poll_finishes_it(self, patched_main, monkeypatch):
+        def fetch(timestamp):
+            terminate()
+            return {'homeworks': [], 'current_date': 8}
+
+        monkeypatch.setattr(homework, 'api_fetcher', lambda: fetch)
+        monkeypatch.setattr(homework.time, 'sleep', pytest.fail)
+        run_main()
+        assert saved_timestamp(patched_main) == 8, (
+            'Начатый опрос должен завершиться и сохранить timestamp.'
+        )
+
+    def test_warm_up_stopped(self, patched_main, monkeypatch):
+        warm_ups = []
+
+        class RecordedWarmUp:
+            def __init__(self, bot, transport, url):
+                self.stopped = False
+                warm_ups.append(self)
+
+            def start(self):
+                return self
+
+            def telegram(self):
+                pass
+
+            def stop(self):
+                self.stopped = True
+
+        def fetch(timestamp):
+            terminate()
+            return {'homeworks': [], 'current_date': 8}
+
+        monkeypatch.setattr(homework, 'WarmUp', RecordedWarmUp)
+        monkeypatch.setattr(homework, 'api_fetcher', lambda: fetch)
+        run_main()
+        assert [warm_up.stopped for warm_up in warm_ups] == [True], (
+            'При остановке кэш имён снимается.'
+        )
+
+    def test_poll_interrupted_after_deadline(
+        self, patched_main, monkeypatch
+    ):
+        def fetch(timestamp):
+            terminate()
+            time.sleep(1)
+
+        monkeypatch.setattr(homework, 'api_fetcher', lambda: fetch)
+        monkeypatch.setattr(homework, 'shutdown_deadline', 0.05)
+        with pytest.raises(shutdown.ShutdownDeadlineError):
+            run_main()
+
+    def test_saved_timestamp_used_after_restart(self, tmp_path):
+        state = StateStore(str(tmp_path / 'state.json'))
+        state.set(account_key('token'), 'backfill', {'complete': True})
+        homework.save_timestamp(state, 'token', 42)
+        assert homework.onboard_account('token', state, None) == 42
+
+
+class TestRunnerDrain:
+    def test_async_runner_drains_on_sigterm(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(
+            homework, 'onboard_account', lambda token, state, snapshots: 1
+        )
+        path = str(tmp_path / 'accounts.jsonl')
+        accounts.save_accounts(path, [accounts.Account('token-1', '101')])
+        state_path = str(tmp_path / 'state.json')
+        bot_runner = runner.Runner(
+            accounts.AccountRegistry(path), FakeBot(), StateStore(state_path),
+            period=0.01, reload_period=60,
+        )
+
+        def answer(url, headers, params):
+            terminate()
+            return 200, {'homeworks': [], 'current_date': 9}
+
+        monkeypatch.setattr(
+            runner, 'make_async_transport',
+            lambda name: transports.AsyncStubTransport(answer)
+        )
+        asyncio.run(runner.run_async(bot_runner, 'stub', deadline=1))
+        assert bot_runner.in_flight == 0
+        with open(state_path, encoding='utf-8') as file:
+            state = json.load(file)
+        assert state[account_key('token-1')][homework.TIMESTAMP_KEY] == 9
+
+    def test_drain_waits_for_worker(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(scheduler, 'stagger_offset', lambda key, p: 0)
+        monkeypatch.setattr(
+            homework, 'onboard_account', lambda token, state, snapshots: 1
+        )
+        started = threading.Event()
+        polls = []
+
+        def fetch(token, timestamp):
+            polls.append(token)
+            started.set()
+            time.sleep(0.1)
+            return {'homeworks': [], 'current_date': 9}
+
+        path = str(tmp_path / 'accounts.jsonl')
+        accounts.save_accounts(path, [
+            accounts.Account(f'token-{number}', str(number))
+            for number in range(3)
+        ])
+        state_path = str(tmp_path / 'state.json')
+        bot_runner = runner.Runner(
+            accounts.AccountRegistry(path), FakeBot(), StateStore(state_path),
+            fetch=fetch,
+        )
+        bot_runner.sync(force=True)
+        bot_runner.start_worker()
+        assert started.wait(1)
+        bot_runner.drain(deadline=1)
+        assert not bot_runner.worker.is_alive(), (
+            'drain() ждёт поток опроса, а не промежуток между опросами.'
+        )
+        assert len(polls) == 1, 'После остановки пачка не опрашивается.'
+        with open(state_path, encoding='utf-8') as file:
+            state = json.load(file)
+        assert state[account_key(polls[0])][homework.TIMESTAMP_KEY] == 9
+
+    def test_drain_joins_all_workers(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(scheduler, 'stagger_offset', lambda key, p: 0)
+        monkeypatch.setattr(
+            homework, 'onboard_account', lambda token, state, snapshots: 1
+        )
+        barrier = threading.Barrier(3, timeout=1)
+        threads = set()
+
+        def fetch(token, timestamp):
+            threads.add(threading.current_thread().name)
+            barrier.wait()
+            time.sleep(0.1)
+            return {'homeworks': [], 'current_date': 9}
+
+        path = str(tmp_path / 'accounts.jsonl')
+        accounts.save_accounts(path, [
+            accounts.Account(f'token-{number}', str(number))
+            for number in range(3)
+        ])
+        bot_runner = runner.Runner(
+            accounts.AccountRegistry(path), FakeBot(),
+            StateStore(str(tmp_path / 'state.json')), fetch=fetch,
+            concurrency=3,
+        )
+        bot_runner.sync(force=True)
+        bot_runner.start_worker()
+        while len(threads) < 3 and bot_runner.workers[0].is_alive():
+            time.sleep(0.01)
+        bot_runner.drain(deadline=1)
+        assert threads == {'poll-1-1', 'poll-1-2', 'poll-1-3'}, (
+            'Аккаунты опрашиваются в concurrency потоках одновременно.'
+        )
+        assert not any(
+            worker.is_alive() for worker in bot_runner.workers
+        ), 'drain() ждёт все потоки опроса.'
@@ -0,0 +1,51 @@
+import threading
+import time
+
+import pytest
+
+import singleflight
+
+
+class TestSingleFlight:
+    def run_concurrently(self, target, count=5):
+        threads = [threading.Thread(target=target) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_concurrent_calls_share_result(self):
+        group = singleflight.SingleFlight()
+        calls = []
+        results = []
+
+        def request():
+            calls.append(1)
+            time.sleep(0.05)
+            return {'homeworks': [], 'current_date': 1}
+
+        self.run_concurrently(
+            lambda: results.append(group.do(('token', 0), request))
+        )
+        assert len(calls) == 1, (
+            'Конкурентные вызовы с одним ключом должны выполняться один раз.'
+        )
+        assert all(result is results[0] for result in results)
+        assert group.in_flight() == 0
+
+    def test_different_keys_not_collapsed(self):
+        group = singleflight.SingleFlight()
+        assert group.do(('token', 0), lambda: 0) == 0
+        assert group.do(('token', 1), lambda: 1) == 1
+
+    def test_error_shared_and_released(self):
+        group = singleflight.SingleFlight()
+
+        def request():
+            raise ValueError('boom')
+
+        with pytest.raises(ValueError):
+            group.do('key', request)
+        assert group.do('key', lambda: 'ok') == 'ok', (
+            'После ошибки ключ должен освобождаться для новых вызовов.'
+        )
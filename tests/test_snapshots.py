@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pytest
+
+import snapshots
+from clock import SimulatedClock
+
+
+@pytest.fixture
+def clock():
+    return SimulatedClock()
+
+
+@pytest.fixture
+def response(random_timestamp):
+    return {
+        'homeworks': [{'homework_name': 'hw1.zip', 'status': 'reviewing'}],
+        'current_date': random_timestamp,
+    }
+
+
+class TestSnapshotCache:
+    def test_update_merges_statuses(self, clock, response):
+        cache = snapshots.SnapshotCache(clock=clock.time)
+        cache.update('token', response, full=True)
+        cache.update('token', {
+            'homeworks': [{'homework_name': 'hw2.zip', 'status': 'approved'}],
+            'current_date': response['current_date'] + 1,
+        })
+        snapshot = cache.peek('token')
+        assert snapshot.statuses == {
+            'hw1.zip': 'reviewing', 'hw2.zip': 'approved'
+        }, 'Снимок должен накапливать статусы из каждого ответа API.'
+        assert snapshot.current_date == response['current_date'] + 1
+
+    def test_fresh_snapshot_served_without_loader(self, clock, response):
+        cache = snapshots.SnapshotCache(ttl=10, clock=clock.time)
+        cache.update('token', response, full=True)
+
+        def loader():
+            raise AssertionError('Свежий снимок не должен запрашиваться.')
+
+        clock.now = 9
+        assert cache.get('token', loader).statuses == {'hw1.zip': 'reviewing'}
+
+    def test_statuses_copied(self, clock, response):
+        cache = snapshots.SnapshotCache(clock=clock.time)
+        cache.update('token', response, full=True)
+        statuses = cache.statuses('token', lambda: response)
+        cache.update('token', {
+            'homeworks': [{'homework_name': 'hw2.zip', 'status': 'approved'}],
+            'current_date': response['current_date'] + 1,
+        })
+        assert statuses == {'hw1.zip': 'reviewing'}, (
+            'Отчёт должен строиться по копии, а не по живому снимку.'
+        )
+
+    def test_stale_snapshot_reloaded(self, clock, response):
+        cache = snapshots.SnapshotCache(ttl=10, clock=clock.time)
+        cache.update('token', response, full=True)
+        clock.now = 10
+        fresh = {'homeworks': [], 'current_date': 1}
+        assert cache.get('token', lambda: fresh).statuses == {}, (
+            'Устаревший снимок должен заменяться полной историей.'
+        )
+
+    def test_concurrent_loads_collapsed(self, response):
+        cache = snapshots.SnapshotCache()
+        calls = []
+        started = threading.Event()
+
+        def loader():
+            calls.append(1)
+            started.set()
+            time.sleep(0.05)
+            return response
+
+        threads = [
+            threading.Thread(target=cache.get, args=('token', loader))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(calls) == 1, (
+            'Конкурентные запросы одного аккаунта должны выполнять '
+            'одну загрузку.'
+        )
+
+    def test_loader_error_propagates(self):
+        cache = snapshots.SnapshotCache()
+
+        def loader():
+            raise RuntimeError('boom')
+
+        with pytest.raises(RuntimeError):
+            cache.get('token', loader)
+        assert cache.peek('token') is None
@@ -0,0 +1,208 @@
+import asyncio
+import json
+
+import accounts
+import runner
+import scheduler
+from clock import SimulatedClock
+from snapshots import SnapshotCache
+from state import StateStore
+from tests.test_runner import FakeBot
+from tiered import SpillStore, TieredCache
+import transports
+
+
+class YieldingTransport(transports.AsyncStubTransport):
+    """Заглушка, отдающая управление циклу, как сетевой запрос."""
+
+    async def get(self, url, headers, params, timeout=None):
+        await asyncio.sleep(0)
+        return await super().get(url, headers, params, timeout)
+
+
+class TestSpillStore:
+    def test_put_take(self, tmp_path):
+        store = SpillStore(str(tmp_path / 'spill.sqlite3'))
+        store.put('a', {'x': [1, 2]})
+        assert len(store) == 1
+        assert store.take('a') == {'x': [1, 2]}
+        assert store.take('a') is None
+        store.close()
+
+    def test_reopen_starts_empty(self, tmp_path):
+        path = str(tmp_path / 'spill.sqlite3')
+        store = SpillStore(path)
+        store.put('a', 1)
+        store.close()
+        assert len(SpillStore(path)) == 0, (
+            'Вытесненное состояние прошлого процесса не должно подниматься.'
+        )
+
+
+class TestTieredCache:
+    def test_cold_entries_faulted_back(self):
+        spill = SpillStore()
+        cache = TieredCache(
+            2, spill, dump=lambda value: value,
+            load=lambda key, data: data,
+        )
+        for key in 'abc':
+            cache[key] = {'key': key}
+        assert cache.hot() == 2
+        assert len(cache) == 3
+        assert len(spill) == 1
+        assert cache['a'] == {'key': 'a'}, 'Холодная запись поднимается.'
+        assert cache.hot() == 2
+        assert 'b' in cache and cache.evictions == 2
+        cache.discard('b')
+        assert 'b' not in cache
+        assert len(spill) == 0
+        spill.close()
+
+    def test_pinned_entry_not_evicted(self):
+        spill = SpillStore()
+        cache = TieredCache(
+            1, spill, dump=lambda value: value,
+            load=lambda key, data: data,
+        )
+        cache['a'] = {'key': 'a'}
+        with cache.pinned('a') as value:
+            cache['b'] = {'key': 'b'}
+            assert cache['a'] is value, (
+                'Закреплённая запись остаётся в памяти.'
+            )
+        assert cache.evictions == 1
+        assert cache.hot() == 1
+        spill.close()
+
+    def test_tokens_not_stored_on_disk(self, tmp_path):
+        path = tmp_path / 'spill.sqlite3'
+        spill = SpillStore(str(path))
+        cache = TieredCache(0, spill, lambda v: v, lambda k, d: d, 'x')
+        cache['secret-token'] = 1
+        spill.close()
+        assert b'secret-token' not in path.read_bytes()
+
+
+class TestSnapshotEviction:
+    def test_snapshot_survives_eviction(self, data_with_new_hw_status):
+        spill = SpillStore()
+        snapshots = SnapshotCache(max_hot=1, spill=spill)
+        snapshots.update('a', data_with_new_hw_status, full=True)
+        snapshots.update('b', {'homeworks': [], 'current_date': 5})
+        restored = snapshots.peek('a')
+        assert restored.full
+        assert restored.statuses == {
+            hw['homework_name']: hw['status']
+            for hw in data_with_new_hw_status['homeworks']
+        }
+        spill.close()
+
+
+class TestRunnerMemoryCap:
+    def test_hot_sessions_bounded_and_dedup_kept(
+        self, tmp_path, monkeypatch, data_with_new_hw_status
+    ):
+        monkeypatch.setattr(
+            runner.homework, 'get_account_answer',
+            lambda token, timestamp: {'homeworks': [], 'current_date': 1}
+        )
+        path = str(tmp_path / 'accounts.jsonl')
+        accounts.save_accounts(path, [
+            accounts.Account(f'token-{number}', str(number))
+            for number in range(5)
+        ])
+        bot_runner = runner.Runner(
+            accounts.AccountRegistry(path), FakeBot(),
+            StateStore(str(tmp_path / 'state.json')),
+            clock=SimulatedClock(),
+            fetch=lambda token, timestamp: data_with_new_hw_status,
+            max_hot=2,
+        )
+        bot_runner.run(until=1799)
+        assert bot_runner.sessions.hot() <= 2
+        assert bot_runner.sessions.evictions > 0
+        assert len(bot_runner.bot.sent) == 5, (
+            'Вытеснение сессии не должно приводить к повторным сообщениям.'
+        )
+        bot_runner.spill.close()
+
+    def test_async_errors_not_repeated(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(
+            runner.homework, 'get_account_answer',
+            lambda token, timestamp: {'homeworks': [], 'current_date': 1}
+        )
+        monkeypatch.setattr(scheduler, 'stagger_offset', lambda key, p: 0)
+        path = str(tmp_path / 'accounts.jsonl')
+        accounts.save_accounts(path, [
+            accounts.Account(f'token-{number}', str(number))
+            for number in range(3)
+        ])
+        client = YieldingTransport(
+            lambda url, headers, params: (500, b'')
+        )
+        bot_runner = runner.Runner(
+            accounts.AccountRegistry(path), FakeBot(),
+            StateStore(str(tmp_path / 'state.json')),
+            clock=SimulatedClock(), max_hot=1,
+        )
+        asyncio.run(bot_runner.arun(client, until=1799))
+        assert sorted(chat for chat, _ in bot_runner.bot.sent) == [
+            '0', '1', '2'
+        ], 'Повторная ошибка не должна приходить в чат заново.'
+        bot_runner.spill.close()
+
+    def test_failure_state_spilled(self, tmp_path):
+        path = str(tmp_path / 'accounts.jsonl')
+        accounts.save_accounts(path, [accounts.Account('token-1', '1')])
+        bot_runner = runner.Runner(
+            accounts.AccountRegistry(path), FakeBot(),
+            StateStore(str(tmp_path / 'state.json')),
+            clock=SimulatedClock(), max_hot=0,
+        )
+        bot_runner.registry.refresh(force=True)
+        session = bot_runner.new_session(
+            'token-1', bot_runner.registry.accounts['token-1']
+        )
+        session.failures = 3
+        session.last_error = 'Сбой'
+        session.quarantined = {('hw', 'rejected')}
+        restored = bot_runner.load_session(
+            'token-1', json.loads(json.dumps(bot_runner.dump_session(session)))
+        )
+        assert (
+            restored.failures, restored.last_error, restored.quarantined
+        ) == (3, 'Сбой', {('hw', 'rejected')}), (
+            'Счётчик ошибок и карантин переживают вытеснение.'
+        )
+        bot_runner.spill.close()
+
+    def test_async_polls_send_fresh_timestamp(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(
+            runner.homework, 'get_account_answer',
+            lambda token, timestamp: {'homeworks': [], 'current_date': 1}
+        )
+        monkeypatch.setattr(scheduler, 'stagger_offset', lambda key, p: 0)
+        path = str(tmp_path / 'accounts.jsonl')
+        accounts.save_accounts(path, [
+            accounts.Account(f'token-{number}', str(number))
+            for number in range(3)
+        ])
+        requests = []
+
+        def handler(url, headers, params):
+            requests.append(params['from_date'])
+            return 200, {
+                'homeworks': [], 'current_date': len(requests)
+            }
+
+        bot_runner = runner.Runner(
+            accounts.AccountRegistry(path), FakeBot(),
+            StateStore(str(tmp_path / 'state.json')),
+            clock=SimulatedClock(), max_hot=1,
+        )
+        asyncio.run(bot_runner.arun(YieldingTransport(handler), until=1199))
+        assert requests[3:] == [1, 2, 3], (
+            'Вытесненная посреди опроса сессия теряет новый timestamp.'
+        )
+        bot_runner.spill.close()
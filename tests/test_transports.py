@@ -0,0 +1,156 @@
+import asyncio
+import threading
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import exceptions
+import homework
+import transports
+
+
+class TestMakeTransport:
+    def test_known_names(self):
+        assert isinstance(
+            transports.make_transport(), transports.RequestsTransport
+        )
+        assert isinstance(
+            transports.make_async_transport('stub'),
+            transports.AsyncStubTransport,
+        )
+
+    def test_unknown_name(self):
+        with pytest.raises(ValueError):
+            transports.make_transport('carrier-pigeon')
+
+
+class CountingHandler(BaseHTTPRequestHandler):
+    """Ответ {} с keep-alive и подсчётом соединений в server.connections."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        self.server.connections += 1
+        super().setup()
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+
+    def do_GET(self):
+        self.do_HEAD()
+        self.wfile.write(b'{}')
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def counting_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), CountingHandler)
+    server.connections = 0
+    threading.Thread(
+        target=partial(server.serve_forever, poll_interval=0.05),
+        daemon=True,
+    ).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestRequestsTransport:
+    def test_pooled_connection_warmed_in_other_thread(self, counting_server):
+        url = f'http://127.0.0.1:{counting_server.server_address[1]}/'
+        transport = transports.make_transport(transports.POOLED_TRANSPORT)
+        warm_up = threading.Thread(target=transport.warm, args=(url, 5))
+        warm_up.start()
+        warm_up.join()
+        response = transport.get(url, {}, {}, 5)
+        transport.close()
+        assert response.json() == {}
+        assert counting_server.connections == 1, (
+            'Опрос должен получить соединение, открытое прогревом.'
+        )
+
+    def test_calls_requests_get(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(
+            transports.requests, 'get',
+            lambda url, **kwargs: calls.append((url, kwargs))
+        )
+        transports.RequestsTransport().get('url', {'a': 'b'}, {'x': 1}, 5)
+        assert calls == [
+            ('url', {'headers': {'a': 'b'}, 'params': {'x': 1}, 'timeout': 5})
+        ]
+
+
+class TestStubTransport:
+    def test_homework_uses_configured_transport(
+        self, monkeypatch, data_with_new_hw_status
+    ):
+        stub = transports.StubTransport(
+            lambda url, headers, params: (200, data_with_new_hw_status)
+        )
+        monkeypatch.setattr(homework, 'transport', stub)
+        assert homework.get_account_answer('token', 0) == (
+            data_with_new_hw_status
+        )
+        assert stub.calls == 1
+
+    def test_error_status(self, monkeypatch):
+        monkeypatch.setattr(homework, 'transport', transports.StubTransport(
+            lambda url, headers, params: (503, b'')
+        ))
+        with pytest.raises(exceptions.RequestError) as error:
+            homework.request_homework_statuses({}, 0)
+        assert error.value.status_code == 503
+
+    def test_async_request(self):
+        stub = transports.AsyncStubTransport(
+            lambda url, headers, params: (
+                200, {'homeworks': [], 'current_date': params['from_date']}
+            )
+        )
+        response = asyncio.run(
+            homework.arequest_homework_statuses(stub, {}, 7)
+        )
+        assert response == {'homeworks': [], 'current_date': 7}
+
+    def test_async_bad_json(self):
+        stub = transports.AsyncStubTransport(
+            lambda url, headers, params: (200, b'{')
+        )
+        with pytest.raises(exceptions.JsonDecodeError):
+            asyncio.run(homework.arequest_homework_statuses(stub, {}, 0))
+
+
+class TestHttpxTransport:
+    def test_errors_wrapped(self):
+        httpx = pytest.importorskip('httpx')
+        transport = transports.HttpxTransport()
+
+        def handler(request):
+            raise httpx.ConnectError('refused', request=request)
+
+        transport._client = httpx.Client(
+            transport=httpx.MockTransport(handler)
+        )
+        with pytest.raises(exceptions.RequestError):
+            transport.get('http://example.test/', {}, {})
+
+    def test_warm_sends_head(self):
+        httpx = pytest.importorskip('httpx')
+        transport = transports.HttpxTransport()
+        methods = []
+
+        def handler(request):
+            methods.append(request.method)
+            return httpx.Response(401)
+
+        transport._client = httpx.Client(
+            transport=httpx.MockTransport(handler)
+        )
+        transport.warm('http://example.test/api/')
+        assert methods == ['HEAD'], 'Прогрев не должен делать GET.'
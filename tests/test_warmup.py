@@ -0,0 +1,151 @@
+import logging
+import socket
+import threading
+
+from telebot import apihelper
+
+import accounts
+import runner
+import warmup
+from clock import SimulatedClock
+from state import StateStore
+from transports import StubTransport
+
+ADDRESSES = [
+    (socket.AF_INET, socket.SOCK_STREAM, 6, '', ('10.0.0.1', 443)),
+    (socket.AF_INET6, socket.SOCK_STREAM, 6, '', ('::1', 443, 0, 0)),
+]
+
+
+class FakeResolver:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, host, port, family=0, type=0, proto=0, flags=0):
+        self.calls.append((host, port, family, type))
+        return ADDRESSES
+
+
+class FakeBot:
+    def __init__(self, error=None):
+        self.error = error
+        self.checked = False
+
+    def get_me(self):
+        self.checked = True
+        if self.error is not None:
+            raise self.error
+
+
+class RejectedToken(Exception):
+    error_code = 401
+
+
+class TestDnsCache:
+    def test_cached_until_ttl(self):
+        resolver = FakeResolver()
+        clock = SimulatedClock()
+        cache = warmup.DnsCache(
+            ttl=10, resolver=resolver, clock=clock.time
+        )
+        cache.resolve('example.com', 443)
+        assert cache.getaddrinfo(
+            'example.com', 443, 0, socket.SOCK_STREAM
+        ) == ADDRESSES
+        assert len(resolver.calls) == 1, 'Повторный запрос берётся из кэша.'
+        clock.now = 11
+        cache.resolve('example.com', 443)
+        assert len(resolver.calls) == 2, 'Просроченная запись обновляется.'
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_family_filter_and_bypass(self):
+        resolver = FakeResolver()
+        cache = warmup.DnsCache(resolver=resolver)
+        assert cache.getaddrinfo(
+            'example.com', 443, socket.AF_INET, socket.SOCK_STREAM
+        ) == ADDRESSES[:1]
+        cache.getaddrinfo('example.com', 53, 0, socket.SOCK_DGRAM)
+        cache.getaddrinfo('example.com', 53, 0, socket.SOCK_DGRAM)
+        assert len(resolver.calls) == 3, 'UDP не кэшируется.'
+
+    def test_install_and_uninstall(self):
+        cache = warmup.DnsCache(resolver=FakeResolver())
+        original = socket.getaddrinfo
+        cache.install()
+        try:
+            assert socket.getaddrinfo('example.com', 443)[0][4][1] == 443
+        finally:
+            cache.uninstall()
+        assert socket.getaddrinfo is original
+
+
+class TestWarmUp:
+    def make_warm_up(self, monkeypatch, bot):
+        monkeypatch.setattr(apihelper, 'session', None)
+        monkeypatch.setattr(socket, 'getaddrinfo', socket.getaddrinfo)
+        resolver = FakeResolver()
+        dns = warmup.DnsCache(resolver=resolver)
+        return warmup.WarmUp(
+            bot, StubTransport(), 'https://practicum.yandex.ru/api/', dns=dns
+        ), resolver
+
+    def test_resolves_both_hosts_and_checks_token(self, monkeypatch):
+        bot = FakeBot()
+        warm_up, resolver = self.make_warm_up(monkeypatch, bot)
+        warm_up.start().wait(1)
+        hosts = {call[0] for call in resolver.calls}
+        assert hosts == {'practicum.yandex.ru', warmup.TELEGRAM_HOST}
+        assert not bot.checked, (
+            'Сессия telebot прогревается в потоке, который отправляет.'
+        )
+        warm_up.telegram()
+        assert bot.checked, 'Токен бота проверяется вызовом get_me.'
+        assert set(warm_up.timings) == {
+            'practicum', 'telegram-dns', 'telegram'
+        }
+        assert apihelper.session is None, (
+            'У каждого потока telebot остаётся своя сессия.'
+        )
+
+    def test_stop_restores_resolver(self, monkeypatch):
+        original = socket.getaddrinfo
+        warm_up, _ = self.make_warm_up(monkeypatch, FakeBot())
+        warm_up.start().wait(1)
+        assert socket.getaddrinfo == warm_up.dns.getaddrinfo
+        warm_up.stop()
+        assert socket.getaddrinfo is original, (
+            'После остановки имена разрешает системный резолвер.'
+        )
+
+    def test_rejected_token_logged(self, monkeypatch, caplog):
+        bot = FakeBot(RejectedToken('Unauthorized'))
+        warm_up, _ = self.make_warm_up(monkeypatch, bot)
+        with caplog.at_level(logging.WARNING):
+            warm_up.start().wait(1)
+            warm_up.telegram()
+        assert [record.levelname for record in caplog.records] == [
+            'CRITICAL'
+        ], 'Отклонённый токен логируется как критическая ошибка.'
+        assert 'telegram' not in warm_up.timings
+
+
+class TestRunnerWarmUp:
+    def test_telegram_warmed_on_worker(self, tmp_path):
+        threads = []
+
+        class ThreadWarmUp:
+            def telegram(self):
+                threads.append(threading.current_thread())
+
+        path = str(tmp_path / 'accounts.jsonl')
+        accounts.save_accounts(path, [])
+        bot_runner = runner.Runner(
+            accounts.AccountRegistry(path), FakeBot(),
+            StateStore(str(tmp_path / 'state.json')),
+            warm_up=ThreadWarmUp(),
+        )
+        bot_runner.start_worker()
+        bot_runner.drain(deadline=1)
+        assert threads == [bot_runner.worker], (
+            'Telegram прогревается в потоке, который отправляет сообщения.'
+        )
@@ -0,0 +1,190 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+
+from state import account_key
+
+SPILL_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS spill (key TEXT PRIMARY KEY, value TEXT)'
+)
+
+
+class SpillStore:
+    """
+    Дисковое хранилище вытесненного состояния в SQLite.
+
+    Это кэш одного процесса: при открытии файл очищается, а без path
+    создаётся временный файл, удаляемый в close().
+    """
+
+    def __init__(self, path=None):
+        self._temporary = path is None
+        if path is None:
+            descriptor, path = tempfile.mkstemp(suffix='.sqlite3')
+            os.close(descriptor)
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute('DROP TABLE IF EXISTS spill')
+            self._connection.execute(SPILL_SCHEMA)
+
+    def put(self, key, value):
+        """Запись значения, сериализуемого в JSON."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO spill VALUES (?, ?)',
+                (key, json.dumps(value, ensure_ascii=False))
+            )
+
+    def take(self, key):
+        """Извлечение значения с удалением из хранилища или None."""
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                'SELECT value FROM spill WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._connection.execute('DELETE FROM spill WHERE key = ?', (key,))
+        return json.loads(row[0])
+
+    def discard(self, key):
+        """Удаление значения, если оно есть."""
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM spill WHERE key = ?', (key,))
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute(
+                'SELECT COUNT(*) FROM spill'
+            ).fetchone()[0]
+
+    def close(self):
+        """Закрытие базы; временный файл удаляется."""
+        with self._lock:
+            self._connection.close()
+        if self._temporary:
+            os.remove(self.path)
+
+
+class TieredCache:
+    """
+    Словарь аккаунтов с горячим уровнем в памяти и холодным на диске.
+
+    В памяти держится не больше max_hot недавно использованных записей,
+    остальные сериализуются dump(value) в SpillStore и поднимаются
+    обратно load(key, data) при следующем обращении. Без max_hot
+    это обычный словарь. Ключ на диске — хеш аккаунта, а не токен.
+    Записи, закреплённые pinned(), не вытесняются, пока с ними работают.
+    Кэш общий для нескольких потоков опроса, поэтому уровни меняются
+    под блокировкой.
+    """
+
+    def __init__(self, max_hot=None, spill=None, dump=None, load=None,
+                 namespace=''):
+        self.max_hot = max_hot
+        self.spill = spill
+        self.dump = dump
+        self.load = load
+        self.namespace = namespace
+        self.evictions = 0
+        self._hot = OrderedDict()
+        self._cold = set()
+        self._pinned = Counter()
+        self._lock = threading.RLock()
+
+    def _spill_key(self, key):
+        return f'{self.namespace}:{account_key(key)}'
+
+    def __len__(self):
+        with self._lock:
+            return len(self._hot) + len(self._cold)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._hot or key in self._cold
+
+    def __iter__(self):
+        with self._lock:
+            keys = list(self._hot) + list(self._cold)
+        yield from keys
+
+    def hot(self):
+        """Количество записей в памяти."""
+        return len(self._hot)
+
+    def get(self, key, default=None):
+        """Значение по ключу с подъёмом с диска при необходимости."""
+        with self._lock:
+            if key in self._hot:
+                self._hot.move_to_end(key)
+                return self._hot[key]
+            if key not in self._cold:
+                return default
+            self._cold.discard(key)
+            value = self.load(key, self.spill.take(self._spill_key(key)))
+            self[key] = value
+            return value
+
+    def __getitem__(self, key):
+        with self._lock:
+            if key not in self:
+                raise KeyError(key)
+            return self.get(key)
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            if key in self._cold:
+                self._cold.discard(key)
+                self.spill.discard(self._spill_key(key))
+            self._hot[key] = value
+            self._hot.move_to_end(key)
+            self._evict()
+
+    @contextmanager
+    def pinned(self, key):
+        """Значение по ключу, закреплённое в памяти до выхода из with."""
+        with self._lock:
+            self._pinned[key] += 1
+            try:
+                value = self[key]
+            except KeyError:
+                self._unpin(key)
+                raise
+        try:
+            yield value
+        finally:
+            with self._lock:
+                self._unpin(key)
+                self._evict()
+
+    def _unpin(self, key):
+        self._pinned[key] -= 1
+        if not self._pinned[key]:
+            del self._pinned[key]
+
+    def discard(self, key):
+        """Удаление записи из обоих уровней, если она есть."""
+        with self._lock:
+            if key in self._cold:
+                self._cold.discard(key)
+                self.spill.discard(self._spill_key(key))
+            self._hot.pop(key, None)
+
+    def _evict(self):
+        if self.max_hot is None:
+            return
+        while len(self._hot) > self.max_hot:
+            key = next(
+                (key for key in self._hot if key not in self._pinned), None
+            )
+            if key is None:
+                return
+            value = self._hot.pop(key)
+            self.spill.put(self._spill_key(key), self.dump(value))
+            self._cold.add(key)
+            self.evictions += 1
@@ -0,0 +1,303 @@
+import json
+import threading
+import time
+from functools import partial
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import exceptions
+
+DEFAULT_TRANSPORT = 'requests'
+POOLED_TRANSPORT = 'requests-pooled'
+HTTP2_CONNECTIONS = 4
+GOAWAY_RETRIES = 3
+
+
+class TransportResponse:
+    """Ответ транспорта: код, сырое тело и разбор JSON."""
+
+    def __init__(self, status_code, content):
+        self.status_code = status_code
+        self.content = content
+
+    def json(self):
+        """Тело ответа как объект Python."""
+        return json.loads(self.content)
+
+
+def empty_answer(url, headers, params):
+    """Ответ заглушки по умолчанию: новых работ нет."""
+    return 200, {'homeworks': [], 'current_date': int(time.time())}
+
+
+def stub_response(handler, url, headers, params):
+    """Ответ заглушки из результата handler: (код, dict или bytes)."""
+    status_code, payload = handler(url, headers, params)
+    if not isinstance(payload, bytes):
+        payload = json.dumps(payload).encode()
+    return TransportResponse(status_code, payload)
+
+
+class RequestsTransport:
+    """
+    Синхронные запросы через requests.
+
+    По умолчанию это requests.get без пула соединений. При pooled=True
+    у каждого потока своя requests.Session (она не потокобезопасна),
+    а пул соединений urllib3 у них общий, так что соединение,
+    прогретое warm() в одном потоке, достаётся опросу в другом.
+    """
+
+    def __init__(self, pooled=False):
+        self.pooled = pooled
+        self._adapter = HTTPAdapter() if pooled else None
+        self._local = threading.local()
+        self._sessions = []
+        self._lock = threading.Lock()
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            session.mount('https://', self._adapter)
+            session.mount('http://', self._adapter)
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def get(self, url, headers, params, timeout=None):
+        """GET-запрос; ошибки соединения — requests.RequestException."""
+        if not self.pooled:
+            return requests.get(
+                url, headers=headers, params=params, timeout=timeout
+            )
+        return self._session().get(
+            url, headers=headers, params=params, timeout=timeout
+        )
+
+    def warm(self, url, timeout=None):
+        """Открытие соединения с хостом url запросом HEAD, если есть пул."""
+        if self.pooled:
+            self._session().head(url, timeout=timeout)
+
+    def close(self):
+        """Закрытие сессий потоков и общего пула."""
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
+        if self._adapter is not None:
+            self._adapter.close()
+
+
+class HttpxTransport:
+    """
+    Синхронный клиент httpx с пулом соединений.
+
+    При http2=True запросы к одному хосту идут потоками одного
+    соединения; нужен пакет httpx[http2].
+    """
+
+    def __init__(self, http2=False):
+        import httpx
+
+        self._errors = httpx.HTTPError
+        self._client = httpx.Client(http2=http2)
+
+    def get(self, url, headers, params, timeout=None):
+        """GET-запрос; ошибки httpx оборачиваются в RequestError."""
+        try:
+            return self._client.get(
+                url, headers=headers, params=params, timeout=timeout
+            )
+        except self._errors as error:
+            raise exceptions.RequestError(str(error))
+
+    def warm(self, url, timeout=None):
+        """Открытие соединения с хостом url запросом HEAD."""
+        try:
+            self._client.head(url, timeout=timeout)
+        except self._errors as error:
+            raise exceptions.RequestError(str(error))
+
+    def close(self):
+        """Закрытие соединений клиента."""
+        self._client.close()
+
+
+class StubTransport:
+    """
+    Транспорт без сети для бенчмарков и тестов.
+
+    handler(url, headers, params) возвращает код ответа и тело —
+    словарь или готовые байты.
+    """
+
+    def __init__(self, handler=empty_answer):
+        self.handler = handler
+        self.calls = 0
+
+    def get(self, url, headers, params, timeout=None):
+        """Ответ handler без сетевого запроса."""
+        self.calls += 1
+        return stub_response(self.handler, url, headers, params)
+
+    def warm(self, url, timeout=None):
+        """Заглушке нечего прогревать."""
+
+    def close(self):
+        """Заглушке нечего закрывать."""
+
+
+class AsyncHttpxTransport:
+    """
+    Асинхронный клиент httpx; при http2=True — мультиплексирование.
+
+    http1=False включает HTTP/2 без TLS (prior knowledge) — так
+    работает локальный стенд без сертификатов.
+    """
+
+    def __init__(self, http2=False, connections=None, http1=True):
+        import httpx
+
+        self._errors = httpx.HTTPError
+        self._protocol_errors = httpx.RemoteProtocolError
+        limits = httpx.Limits(max_connections=connections)
+        self._client = httpx.AsyncClient(
+            http1=http1, http2=http2, limits=limits
+        )
+
+    async def get(self, url, headers, params, timeout=None):
+        """
+        GET-запрос; ошибки httpx оборачиваются в RequestError.
+
+        Сервер HTTP/2 закрывает соединение после лимита запросов
+        (GOAWAY), и потоки в полёте обрываются; GET идемпотентен,
+        поэтому такой запрос повторяется по новому соединению.
+        """
+        for attempt in range(GOAWAY_RETRIES + 1):
+            try:
+                return await self._client.get(
+                    url, headers=headers, params=params, timeout=timeout
+                )
+            except self._protocol_errors as error:
+                if attempt == GOAWAY_RETRIES:
+                    raise exceptions.RequestError(str(error))
+            except self._errors as error:
+                raise exceptions.RequestError(str(error))
+
+    async def warm(self, url, timeout=None):
+        """Открытие соединения с хостом url запросом HEAD."""
+        try:
+            await self._client.head(url, timeout=timeout)
+        except self._errors as error:
+            raise exceptions.RequestError(str(error))
+
+    async def close(self):
+        """Закрытие соединений клиента."""
+        await self._client.aclose()
+
+
+class AiohttpTransport:
+    """Асинхронный клиент aiohttp с общим пулом соединений."""
+
+    def __init__(self):
+        import aiohttp
+
+        self._aiohttp = aiohttp
+        self._session = None
+
+    def _open(self):
+        if self._session is None:
+            self._session = self._aiohttp.ClientSession()
+        return self._session
+
+    async def get(self, url, headers, params, timeout=None):
+        """GET-запрос с чтением тела целиком."""
+        aiohttp = self._aiohttp
+        self._open()
+        try:
+            async with self._session.get(
+                url, headers=headers, params=params,
+                timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as response:
+                return TransportResponse(
+                    response.status, await response.read()
+                )
+        except aiohttp.ClientError as error:
+            raise exceptions.RequestError(str(error))
+
+    async def warm(self, url, timeout=None):
+        """Открытие соединения с хостом url запросом HEAD."""
+        aiohttp = self._aiohttp
+        try:
+            async with self._open().head(
+                url, timeout=aiohttp.ClientTimeout(total=timeout)
+            ):
+                pass
+        except aiohttp.ClientError as error:
+            raise exceptions.RequestError(str(error))
+
+    async def close(self):
+        """Закрытие сессии aiohttp."""
+        if self._session is not None:
+            await self._session.close()
+
+
+class AsyncStubTransport(StubTransport):
+    """Асинхронная заглушка без сети."""
+
+    async def get(self, url, headers, params, timeout=None):
+        """Ответ handler без сетевого запроса."""
+        self.calls += 1
+        return stub_response(self.handler, url, headers, params)
+
+    async def warm(self, url, timeout=None):
+        """Заглушке нечего прогревать."""
+
+    async def close(self):
+        """Заглушке нечего закрывать."""
+
+
+TRANSPORTS = {
+    'requests': RequestsTransport,
+    POOLED_TRANSPORT: partial(RequestsTransport, pooled=True),
+    'httpx': HttpxTransport,
+    'httpx-http2': partial(HttpxTransport, http2=True),
+    'stub': StubTransport,
+}
+
+ASYNC_TRANSPORTS = {
+    'httpx': AsyncHttpxTransport,
+    'httpx-http2': partial(
+        AsyncHttpxTransport, http2=True, connections=HTTP2_CONNECTIONS
+    ),
+    'httpx-h2c': partial(
+        AsyncHttpxTransport, http2=True, http1=False,
+        connections=HTTP2_CONNECTIONS
+    ),
+    'aiohttp': AiohttpTransport,
+    'stub': AsyncStubTransport,
+}
+
+
+def make_transport(name=DEFAULT_TRANSPORT, registry=TRANSPORTS):
+    """
+    Транспорт по имени из настроек.
+
+    Клиенты httpx и aiohttp необязательны: без установленного пакета
+    выбор такого транспорта завершается ImportError.
+    """
+    try:
+        factory = registry[name]
+    except KeyError:
+        raise ValueError(
+            f'Неизвестный транспорт {name}, доступны: {", ".join(registry)}'
+        )
+    return factory()
+
+
+def make_async_transport(name):
+    """Асинхронный транспорт по имени из настроек."""
+    return make_transport(name, ASYNC_TRANSPORTS)
@@ -0,0 +1,157 @@
+import logging
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+
+from exceptions import PERMANENT_STATUSES, RequestError
+
+DNS_TTL = 300
+WARM_UP_TIMEOUT = 5
+HTTPS_PORT = 443
+TELEGRAM_HOST = 'api.telegram.org'
+
+logger = logging.getLogger('homework.warmup')
+
+
+class DnsCache:
+    """
+    Кэш разрешения имён для TCP-соединений с временем жизни ttl.
+
+    После install() подменяет socket.getaddrinfo, так что им пользуются
+    requests, httpx и asyncio. Кэшируются только успешные запросы
+    SOCK_STREAM без флагов, остальные идут в системный резолвер.
+    """
+
+    def __init__(self, ttl=DNS_TTL, resolver=socket.getaddrinfo,
+                 clock=time.monotonic):
+        self.ttl = ttl
+        self.resolver = resolver
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._previous = resolver
+
+    def resolve(self, host, port):
+        """Адреса host:port для TCP из кэша или резолвера."""
+        key = (host, port)
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        addresses = self.resolver(host, port, 0, socket.SOCK_STREAM)
+        with self._lock:
+            self._entries[key] = (now + self.ttl, addresses)
+        return addresses
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        """Замена socket.getaddrinfo с той же сигнатурой."""
+        if host is None or type != socket.SOCK_STREAM or flags:
+            return self.resolver(host, port, family, type, proto, flags)
+        addresses = [
+            address for address in self.resolve(host, port)
+            if family in (0, address[0]) and proto in (0, address[2])
+        ]
+        return addresses or self.resolver(host, port, family, type, proto)
+
+    def install(self):
+        """Подмена socket.getaddrinfo кэширующей версией."""
+        if socket.getaddrinfo != self.getaddrinfo:
+            self._previous = socket.getaddrinfo
+            socket.getaddrinfo = self.getaddrinfo
+        return self
+
+    def uninstall(self):
+        """Возврат функции, которая стояла до install()."""
+        if socket.getaddrinfo == self.getaddrinfo:
+            socket.getaddrinfo = self._previous
+
+
+dns_cache = DnsCache()
+
+
+class WarmUp:
+    """
+    Прогрев перед первым опросом в фоновых потоках.
+
+    start() параллельно разрешает имена API домашек и Telegram и
+    открывает соединение в пуле транспорта, пока основной поток грузит
+    состояние. telebot держит сессию на поток (requests.Session не
+    потокобезопасна), поэтому соединение с Telegram и проверку токена
+    get_me делает telegram() в потоке, который будет отправлять.
+    Ошибки прогрева только логируются: опрос повторит их сам.
+    stop() снимает кэш имён.
+    """
+
+    def __init__(self, bot, transport, url, dns=dns_cache,
+                 timeout=WARM_UP_TIMEOUT):
+        self.bot = bot
+        self.transport = transport
+        self.url = url
+        self.dns = dns
+        self.timeout = timeout
+        self.timings = {}
+        self._threads = []
+
+    def practicum(self):
+        """Имя и соединение API домашек."""
+        self.dns.resolve(urlsplit(self.url).hostname, HTTPS_PORT)
+        self.transport.warm(self.url, self.timeout)
+
+    def resolve_telegram(self):
+        """Имя Telegram."""
+        self.dns.resolve(TELEGRAM_HOST, HTTPS_PORT)
+
+    def telegram(self):
+        """Соединение и токен Telegram в сессии текущего потока."""
+        self._run('telegram', self.bot.get_me)
+
+    def _run(self, name, step):
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception as error:
+            if getattr(error, 'error_code', None) in PERMANENT_STATUSES:
+                logger.critical(f'Telegram не принял TELEGRAM_TOKEN: {error}')
+            else:
+                logger.warning(f'Прогрев {name} не удался: {error}')
+            return
+        self.timings[name] = time.perf_counter() - started
+        logger.debug(f'Прогрев {name}: {self.timings[name]:.3f} с')
+
+    def start(self):
+        """Запуск прогрева; не ждёт его окончания."""
+        self.dns.install()
+        for name, step in (
+            ('practicum', self.practicum),
+            ('telegram-dns', self.resolve_telegram),
+        ):
+            thread = threading.Thread(
+                target=self._run, args=(name, step),
+                name=f'warm-up-{name}', daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def wait(self, timeout=None):
+        """Ожидание окончания прогрева."""
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def stop(self):
+        """Возврат системного разрешения имён при остановке."""
+        self.dns.uninstall()
+
+
+async def warm_async(transport, url, timeout=WARM_UP_TIMEOUT):
+    """Прогрев пула асинхронного транспорта; ошибки только логируются."""
+    try:
+        await transport.warm(url, timeout)
+    except RequestError as error:
+        logger.warning(f'Прогрев practicum не удался: {error}')